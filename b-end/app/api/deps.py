@@ -1,32 +1,46 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from app.models.schemas import TokenData
-from app.core.database import get_database
-from app.core.config import settings
+from jose import JWTError
+from app.core.security import decode_token
+from app.core.revocation import revocation_list
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_database)):
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    # User dibangun dari claim access token, tanpa query ke database.
+    # Status user dicek ulang ke database saat refresh (POST /auth/refresh),
+    # pencabutan token dicek lewat revocation list.
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
+        payload = decode_token(token)
     except JWTError:
         raise credentials_exception
-    user = await db.users.find_one({"email": token_data.email})
-    if user is None:
+    # Bloom filter di memori; database hanya dicek jika token mungkin dicabut
+    if await revocation_list.is_revoked(payload):
         raise credentials_exception
-    return user
+    return {
+        "_id": payload.get("user_id"),
+        "email": payload["sub"],
+        "username": payload.get("username"),
+        "is_active": payload.get("is_active", False),
+        "is_admin": payload.get("is_admin", False),
+        "jti": payload.get("jti"),
+        "exp": payload.get("exp"),
+    }
+
 
 async def get_current_active_user(current_user=Depends(get_current_user)):
     if not current_user.get("is_active", False):
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user
+
+
+async def get_current_admin_user(current_user=Depends(get_current_active_user)):
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
@@ -1,10 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from app.models.schemas import UserCreate, UserLogin, ResponseEnvelope, Token
-from app.core.security import create_access_token, verify_password, get_password_hash
-from app.core.database import get_database
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Request, status
+from fastapi.concurrency import run_in_threadpool
+from app.models.schemas import UserCreate, UserLogin, ResponseEnvelope, Token, RefreshRequest
+from app.core.security import (
+    create_access_token, create_refresh_token, decode_token, user_token_claims,
+    verify_password_and_check_rehash, get_password_hash, password_rehash_total,
+    REFRESH_TOKEN_TYPE
+)
+from app.core.database import get_database, ensure_user_indexes, USER_UNIQUE_FIELDS
 from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.core.rate_limit import login_rate_limiter, client_ip, normalize_username
+from app.api.deps import get_current_user, get_current_active_user, get_current_admin_user
 from datetime import timedelta
+from typing import Optional
 from fastapi.responses import JSONResponse
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from jose import JWTError
+import asyncio
 import logging
 from fastapi.security import OAuth2PasswordRequestForm
 
@@ -12,38 +27,67 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def issue_tokens(db_user: dict) -> dict:
+    """Buat pasangan access token (berisi claim user) dan refresh token."""
+    claims = user_token_claims(db_user)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": create_access_token(data=claims, expires_delta=access_token_expires),
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(data=claims),
+        "expires_in": int(access_token_expires.total_seconds()),
+    }
+
+
+async def rehash_password(db, user_id, password: str) -> None:
+    """Hash ulang password dengan cost terbaru (dijalankan setelah response login terkirim)."""
+    try:
+        hashed = await run_in_threadpool(get_password_hash, password)
+        await db.users.update_one({"_id": user_id}, {"$set": {"password": hashed}})
+        password_rehash_total.inc(outcome="success")
+    except Exception as e:
+        password_rehash_total.inc(outcome="error")
+        logger.warning(f"Gagal hash ulang password user {user_id}: {str(e)}")
+
+
+def duplicate_field(error: DuplicateKeyError) -> Optional[str]:
+    """Field unik yang bentrok, dari ``keyPattern`` (atau nama index di pesan error)."""
+    details = error.details or {}
+    fields = list(details.get("keyPattern") or details.get("keyValue") or {})
+    if fields:
+        return fields[0]
+    message = str(error)
+    return next((field for field in USER_UNIQUE_FIELDS if f"{field}_1" in message), None)
+
+
+DUPLICATE_MESSAGES = {
+    "email": "Email already registered",
+    "username": "Username already taken",
+}
+
+
 @router.post("/register", response_model=ResponseEnvelope, status_code=201)
 async def register(user: UserCreate, db=Depends(get_database)):
-    # Cek apakah email sudah terdaftar
-    existing_user = await db.users.find_one({"email": user.email})
-    if existing_user:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={
-                "status": "error",
-                "message": "Email already registered",
-                "data": None,
-                "meta": None
-            }
-        )
-
-    # Cek apakah username sudah digunakan
-    existing_username = await db.users.find_one({"username": user.username})
-    if existing_username:
+    # Hash password di threadpool, berjalan bersamaan dengan pengecekan index
+    hashing = asyncio.ensure_future(run_in_threadpool(get_password_hash, user.password))
+    try:
+        indexed = await ensure_user_indexes(db)
+    finally:
+        hashed_password = await hashing
+    if not indexed:
+        # Tanpa unique index registrasi bersamaan bisa membuat user dobel
         return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={
                 "status": "error",
-                "message": "Username already taken",
+                "message": "Registration temporarily unavailable",
                 "data": None,
                 "meta": None
             }
         )
 
-    # Hash password
-    hashed_password = get_password_hash(user.password)
-
-    # Simpan user baru
+    # Simpan user baru; email/username yang sudah dipakai ditolak oleh unique index,
+    # jadi tidak ada race antara pengecekan dan insert
     user_data = {
         "email": user.email,
         "username": user.username,
@@ -52,7 +96,20 @@ async def register(user: UserCreate, db=Depends(get_database)):
         "is_active": True
     }
 
-    result = await db.users.insert_one(user_data)
+    try:
+        result = await db.users.insert_one(user_data)
+    except DuplicateKeyError as e:
+        field = duplicate_field(e)
+        logger.warning(f"Registration rejected, duplicate {field}: {user.username}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "status": "error",
+                "message": DUPLICATE_MESSAGES.get(field, "User already exists"),
+                "data": None,
+                "meta": None
+            }
+        )
 
     # Return user data tanpa password
     user_response = {
@@ -72,9 +129,22 @@ async def register(user: UserCreate, db=Depends(get_database)):
 
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_database)):
+async def login(request: Request, background_tasks: BackgroundTasks,
+                form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_database)):
     try:
-        username = form_data.username.lower().strip()
+        username = normalize_username(form_data.username)
+
+        # Rate limit per IP dan per username, sebelum query user dan bcrypt
+        if settings.LOGIN_RATE_LIMIT_ENABLED:
+            wait = await login_rate_limiter.hit(
+                [("ip", client_ip(request)), ("username", username)], db)
+            if wait is not None:
+                logger.warning(f"Login rate limited: {username}")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please try again later",
+                    headers={"Retry-After": str(wait)}
+                )
 
         # Cari user berdasarkan email atau username
         db_user = await db.users.find_one({
@@ -91,30 +161,26 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get
                 detail="Incorrect username or password"
             )
 
-        # Verifikasi password
-        if not verify_password(form_data.password, db_user["password"]):
+        # Verifikasi password di threadpool agar bcrypt tidak memblokir event loop
+        verified, needs_rehash = await run_in_threadpool(
+            verify_password_and_check_rehash, form_data.password, db_user["password"])
+        if not verified:
             logger.warning(f"Invalid password for user: {username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password"
             )
 
-        # Generate access token
-        access_token_expires = timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={
-                "sub": db_user["email"],
-                "user_id": str(db_user["_id"]),
-                "username": db_user["username"]
-            },
-            expires_delta=access_token_expires
-        )
+        # Login berhasil: percobaan gagal sebelumnya untuk username ini tidak dihitung lagi
+        if settings.LOGIN_RATE_LIMIT_ENABLED:
+            await login_rate_limiter.clear("username", username, db)
 
-        return {
-            "access_token": access_token,
-            "token_type": "bearer"
-        }
+        # Hash tersimpan memakai cost lama: upgrade setelah response dikirim
+        if needs_rehash:
+            background_tasks.add_task(rehash_password, db, db_user["_id"], form_data.password)
+
+        # Generate access token dan refresh token
+        return issue_tokens(db_user)
 
     except HTTPException:
         raise
@@ -124,3 +190,100 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error"
         )
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(request: RefreshRequest, db=Depends(get_database)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(request.refresh_token, REFRESH_TOKEN_TYPE)
+        user_id = ObjectId(payload.get("user_id"))
+    except (JWTError, InvalidId, TypeError):
+        raise credentials_exception
+    if await revocation_list.is_revoked(payload, db):
+        raise credentials_exception
+
+    # Satu-satunya titik di mana status user dicek ulang ke database
+    db_user = await db.users.find_one({"_id": user_id})
+    if not db_user or db_user["email"] != payload["sub"]:
+        raise credentials_exception
+    if db_user.get("token_version", 0) != payload.get("tv", 0):
+        logger.warning(f"Revoked refresh token used for user: {db_user['email']}")
+        raise credentials_exception
+    if not db_user.get("is_active", False):
+        raise HTTPException(status_code=400, detail="Inactive user")
+
+    # Rotasi: refresh token yang baru dipakai dicabut agar tidak bisa dipakai lagi
+    await revocation_list.revoke_token(db, payload["jti"], payload["exp"])
+    return issue_tokens(db_user)
+
+
+@router.post("/logout", response_model=ResponseEnvelope)
+async def logout(request: Optional[RefreshRequest] = None,
+                 current_user=Depends(get_current_user), db=Depends(get_database)):
+    # Cabut access token yang dipakai, dan refresh token jika dikirim
+    await revocation_list.revoke_token(db, current_user["jti"], current_user["exp"])
+    if request is not None:
+        try:
+            payload = decode_token(request.refresh_token, REFRESH_TOKEN_TYPE)
+        except JWTError:
+            payload = None
+        if payload and payload["sub"] == current_user["email"]:
+            await revocation_list.revoke_token(db, payload["jti"], payload["exp"])
+    return ResponseEnvelope(
+        status="success",
+        message="Logged out successfully",
+        data=None,
+        meta=None
+    )
+
+
+@router.post("/revoke", response_model=ResponseEnvelope)
+async def revoke_sessions(current_user=Depends(get_current_active_user), db=Depends(get_database)):
+    # Naikkan token_version (refresh token lama ditolak) dan cabut semua access token
+    # yang sudah terbit lewat revocation list
+    user = await db.users.find_one_and_update(
+        {"email": current_user["email"]}, {"$inc": {"token_version": 1}},
+        return_document=ReturnDocument.AFTER)
+    if user is not None:
+        await revocation_list.revoke_user(db, str(user["_id"]), user["token_version"])
+    return ResponseEnvelope(
+        status="success",
+        message="All sessions revoked",
+        data=None,
+        meta=None
+    )
+
+
+@router.post("/users/{user_id}/deactivate", response_model=ResponseEnvelope)
+async def deactivate_user(user_id: str, current_user=Depends(get_current_admin_user), db=Depends(get_database)):
+    try:
+        object_id = ObjectId(user_id)
+    except InvalidId:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": "error", "message": "Invalid user ID", "data": None, "meta": None}
+        )
+
+    user = await db.users.find_one_and_update(
+        {"_id": object_id},
+        {"$set": {"is_active": False}, "$inc": {"token_version": 1}},
+        return_document=ReturnDocument.AFTER)
+    if user is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"status": "error", "message": "User not found", "data": None, "meta": None}
+        )
+
+    # Token yang sudah terbit langsung ditolak, tidak menunggu expired
+    await revocation_list.revoke_user(db, user_id, user["token_version"])
+    return ResponseEnvelope(
+        status="success",
+        message="User deactivated",
+        data=None,
+        meta=None
+    )
@@ -6,7 +6,7 @@ from datetime import datetime
 from app.core.database import get_database
 from app.models.schemas import BlogBase, BlogResponse, ResponseEnvelope
 from app.api.deps import get_current_user
-from app.utils.file_handler import save_upload_file
+from app.utils.upload_session import resolve_upload
 
 router = APIRouter()
 
@@ -22,19 +22,21 @@ def convert_objectid(doc: Dict[str, Any]) -> Dict[str, Any]:
 async def create_blog(
     title: str = Form(...),
     content: str = Form(...),
-    image: UploadFile = File(...),
+    image: UploadFile = File(None),
+    upload_id: str = Form(None),
     current_user=Depends(get_current_user),
     db=Depends(get_database)
 ):
     """Create a new blog"""
     try:
         # Save image if provided
-        image_path = await save_upload_file(image)
+        image_path, image_meta = await resolve_upload(db, image, upload_id, current_user["email"])
 
         blog_data = {
             "title": title,
             "content": content,
             "image": image_path,
+            "image_meta": image_meta,
             "author": current_user["email"],
             "created_at": datetime.utcnow()
         }
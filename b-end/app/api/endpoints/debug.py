@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Literal, Optional
+from app.core import memory_profiler
+from app.api.deps import get_current_admin_user
+from app.core.config import settings
+from app.core.profiler import ProfilerBusyError, render_collapsed, sample_stacks
+from app.models.schemas import ResponseEnvelope
+
+router = APIRouter(tags=["debug"])
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Sampling Profiler",
+    description="""
+    Mengambil sampel stack semua thread worker ini selama `seconds` detik.
+
+    Output berupa collapsed stack (`thread;frame;frame jumlah`) yang bisa
+    langsung dibuka di speedscope atau diproses dengan flamegraph.pl.
+    Hanya dapat diakses oleh admin.
+    """
+)
+async def profile(
+    seconds: float = Query(5, gt=0, description="Durasi profiling dalam detik"),
+    thread: Optional[str] = Query(None, description="Hanya tampilkan stack dari thread dengan nama ini"),
+    current_user=Depends(get_current_admin_user)
+):
+    if not settings.PROFILER_ENABLED:
+        error_response = ResponseEnvelope(
+            status="error",
+            message="Profiler tidak aktif"
+        )
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content=error_response.model_dump()
+        )
+
+    seconds = min(seconds, settings.PROFILER_MAX_SECONDS)
+    try:
+        # Sampler berjalan di thread pool sehingga event loop tetap melayani request
+        result = await run_in_threadpool(
+            sample_stacks, seconds, settings.PROFILER_INTERVAL_MS / 1000
+        )
+    except ProfilerBusyError:
+        error_response = ResponseEnvelope(
+            status="error",
+            message="Profiling lain sedang berjalan di worker ini"
+        )
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content=error_response.model_dump()
+        )
+
+    return PlainTextResponse(
+        render_collapsed(result["stacks"], thread),
+        headers={
+            "X-Profile-Samples": str(result["samples"]),
+            "X-Profile-Overhead": f"{result['overhead']:.4f}",
+        }
+    )
+
+
+@router.post(
+    "/memory/start",
+    response_model=ResponseEnvelope,
+    summary="Mulai Tracing Memori",
+    description="Menyalakan tracemalloc di worker ini dan menyimpan snapshot baseline."
+)
+async def start_memory_trace(current_user=Depends(get_current_admin_user)):
+    await run_in_threadpool(memory_profiler.start, settings.MEMORY_TRACE_FRAMES)
+    return ResponseEnvelope(
+        status="success",
+        message="Tracing memori dimulai",
+        data={"frames": settings.MEMORY_TRACE_FRAMES}
+    )
+
+
+@router.get(
+    "/memory/snapshot",
+    response_model=ResponseEnvelope,
+    summary="Diff Snapshot Memori",
+    description="""
+    Membandingkan snapshot tracemalloc saat ini dengan baseline,
+    dikelompokkan per file (`filename`) atau per baris (`lineno`).
+    Gunakan `reset=true` untuk menjadikan snapshot ini baseline baru.
+    """
+)
+async def memory_snapshot(
+    group_by: Literal["lineno", "filename"] = Query("lineno"),
+    limit: int = Query(25, gt=0, le=500),
+    reset: bool = Query(False, description="Jadikan snapshot ini baseline baru"),
+    current_user=Depends(get_current_admin_user)
+):
+    if not memory_profiler.is_tracing():
+        error_response = ResponseEnvelope(
+            status="error",
+            message="Tracing memori belum dimulai"
+        )
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content=error_response.model_dump()
+        )
+
+    # Mengambil snapshot cukup berat, jalankan di luar event loop
+    diff = await run_in_threadpool(memory_profiler.snapshot_diff, group_by, limit, reset)
+    return ResponseEnvelope(
+        status="success",
+        message="Snapshot memori berhasil diambil",
+        data=diff
+    )
+
+
+@router.post(
+    "/memory/stop",
+    response_model=ResponseEnvelope,
+    summary="Hentikan Tracing Memori",
+    description="Mematikan tracemalloc dan membuang baseline."
+)
+async def stop_memory_trace(current_user=Depends(get_current_admin_user)):
+    await run_in_threadpool(memory_profiler.stop)
+    return ResponseEnvelope(
+        status="success",
+        message="Tracing memori dihentikan"
+    )
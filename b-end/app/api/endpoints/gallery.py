@@ -3,12 +3,11 @@ from fastapi.responses import JSONResponse
 from app.models.schemas import GalleryBase, GalleryResponse, ResponseEnvelope
 from app.core.database import get_database
 from app.api.deps import get_current_active_user, get_current_user
-from app.utils.file_handler import save_upload_file
-from app.core.config import settings
+from app.utils.upload_session import resolve_upload
+from app.utils.file_handler import schedule_upload_removal
 from typing import List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-import os
 
 router = APIRouter(tags=["gallery"])
 
@@ -33,27 +32,31 @@ def convert_objectid(doc: Dict[str, Any]) -> Dict[str, Any]:
     
     **Batasan:**
     - Ukuran maksimal file: 5MB
+    - File yang lebih besar (termasuk video MP4/WebM) diunggah lewat `/uploads`
+      lalu dikirim sebagai `upload_id`
     """
 )
 async def create_gallery(
     title: str = Form(None, description="Judul foto", examples=["Workshop Batch 2023"]),
     description: str = Form(None, description="Deskripsi foto", examples=["Dokumentasi kegiatan workshop..."]),
     image: UploadFile = File(
-        ..., 
+        None, 
         description="File foto (JPG, PNG, GIF, max 5MB)",
         media_type="image/*"
     ),
+    upload_id: str = Form(None, description="ID sesi upload bertahap yang sudah difinalisasi (pengganti image)"),
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
     try:
         # Upload gambar
-        image_url = await save_upload_file(image)
+        image_url, image_meta = await resolve_upload(db, image, upload_id, current_user["email"])
         
         gallery_data = {
             "title": title or "",
             "description": description or "",
             "image": image_url,
+            "image_meta": image_meta,
             "created_at": datetime.utcnow(),
             "author": current_user["email"]
         }
@@ -159,15 +162,13 @@ async def delete_gallery(gallery_id: str, current_user = Depends(get_current_use
             )
             return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=error_response.dict())
 
-        # Hapus file foto
-        if gallery.get("image"):
-            image_path = os.path.join(settings.STATIC_DIR, gallery["image"].lstrip("/static/"))
-            if os.path.exists(image_path):
-                os.remove(image_path)
-
         # Hapus data dari database
         await db.gallery.delete_one({"_id": ObjectId(gallery_id)})
 
+        # File foto dihapus job background
+        if gallery.get("image"):
+            await schedule_upload_removal(db, gallery["image"])
+
         return ResponseEnvelope(
             status="success",
             message="Foto berhasil dihapus",
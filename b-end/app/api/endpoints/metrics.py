@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import registry
+
+router = APIRouter(tags=["metrics"])
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(
+    "",
+    response_class=PlainTextResponse,
+    summary="Metrik Prometheus",
+    description="Mengambil metrik aplikasi dalam format teks Prometheus."
+)
+async def get_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    # Baca snapshot worker lain di threadpool agar event loop tidak terblokir
+    content = await run_in_threadpool(registry.render, settings.METRICS_MULTIPROC_DIR or None)
+    return PlainTextResponse(content, media_type=CONTENT_TYPE_LATEST)
@@ -3,12 +3,11 @@ from fastapi.responses import JSONResponse
 from app.models.schemas import PartnerBase, PartnerResponse, ResponseEnvelope
 from app.core.database import get_database
 from app.api.deps import get_current_active_user
-from app.utils.file_handler import save_upload_file
-from app.core.config import settings
+from app.utils.upload_session import resolve_upload
+from app.utils.file_handler import schedule_upload_removal
 from typing import List, Dict, Any
 from datetime import datetime
 from bson import ObjectId
-import os
 
 router = APIRouter(tags=["partners"])
 
@@ -33,6 +32,7 @@ def convert_objectid(doc: Dict[str, Any]) -> Dict[str, Any]:
     
     **Batasan:**
     - Ukuran maksimal file: 5MB
+    - File yang lebih besar diunggah lewat `/uploads` lalu dikirim sebagai `upload_id`
     """
 )
 async def create_partner(
@@ -40,10 +40,11 @@ async def create_partner(
     description: str = Form(None, description="Deskripsi partner/mitra", examples=["Mitra dalam penyelenggaraan workshop..."]),
     website_url: str = Form(..., description="URL website partner", examples=["https://www.ui.ac.id"]),
     logo: UploadFile = File(
-        ..., 
+        None, 
         description="File logo partner (JPG, PNG, GIF, max 5MB)",
         media_type="image/*"
     ),
+    upload_id: str = Form(None, description="ID sesi upload bertahap yang sudah difinalisasi (pengganti logo)"),
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
@@ -62,13 +63,14 @@ async def create_partner(
         )
     
     # Upload logo
-    logo_url = await save_upload_file(logo)
+    logo_url, logo_meta = await resolve_upload(db, logo, upload_id, current_user["email"])
     
     partner_data = {
         "name": name,
         "description": description or "",
         "website_url": website_url,
         "logo": logo_url,
+        "logo_meta": logo_meta,
         "created_at": datetime.utcnow(),
         "author": current_user["email"]
     }
@@ -166,17 +168,12 @@ async def delete_partner(
             content=error_response.model_dump()
         )
     
-    # Hapus file logo jika ada
-    if partner.get("logo"):
-        try:
-            logo_path = os.path.join(settings.STATIC_DIR, partner["logo"].lstrip("/static/"))
-            if os.path.exists(logo_path):
-                os.remove(logo_path)
-        except Exception as e:
-            logger.error(f"Error deleting logo file: {str(e)}")
-    
     await db.partners.delete_one({"_id": ObjectId(partner_id)})
     
+    # File logo dihapus job background
+    if partner.get("logo"):
+        await schedule_upload_removal(db, partner["logo"])
+    
     return ResponseEnvelope(
         status="success",
         message="Partner berhasil dihapus"
@@ -3,7 +3,7 @@ from fastapi.responses import JSONResponse
 from app.models.schemas import ProgramBase, ProgramResponse, ResponseEnvelope
 from app.core.database import get_database
 from app.api.deps import get_current_active_user
-from app.utils.file_handler import save_upload_file
+from app.utils.upload_session import resolve_upload
 from typing import List, Literal, Union, Optional, Dict, Any
 from datetime import datetime
 from bson import ObjectId
@@ -44,6 +44,7 @@ def convert_objectid(doc: Dict[str, Any]) -> Dict[str, Any]:
     
     **Batasan:**
     - Ukuran maksimal file: 5MB
+    - File yang lebih besar diunggah lewat `/uploads` lalu dikirim sebagai `upload_id`
     """
 )
 async def create_program(
@@ -54,21 +55,23 @@ async def create_program(
     description: str = Form(..., description="Deskripsi program", examples=[
                             "Workshop untuk pemulihan kesehatan mental..."]),
     image: UploadFile = File(
-        ...,
+        None,
         description="File gambar untuk program (JPG, PNG, GIF, max 5MB)",
         media_type="image/*"
     ),
+    upload_id: str = Form(None, description="ID sesi upload bertahap yang sudah difinalisasi (pengganti image)"),
     db=Depends(get_database),
     current_user=Depends(get_current_active_user)
 ):
     # Upload gambar
-    image_url = await save_upload_file(image)
+    image_url, image_meta = await resolve_upload(db, image, upload_id, current_user["email"])
 
     program_data = {
         "title": title,
         "subtitle": subtitle,
         "description": description,
         "image": image_url,
+        "image_meta": image_meta,
         "created_at": datetime.utcnow()
     }
 
@@ -0,0 +1,167 @@
+from fastapi import APIRouter, Depends, Header, Query, Request, status
+from fastapi.responses import JSONResponse
+from app.models.schemas import ResponseEnvelope, UploadSessionCreate, UploadSessionResponse
+from app.core.config import settings
+from app.core.database import get_database
+from app.api.deps import get_current_active_user
+from app.utils.upload_session import (
+    UploadSessionError, abort_session, create_session, finalize_session,
+    get_session, session_view, write_chunk
+)
+from typing import Optional
+
+router = APIRouter(tags=["uploads"])
+
+
+def error_response(e: UploadSessionError) -> JSONResponse:
+    # Data sesi (offset terakhir) ikut dikirim agar client bisa melanjutkan upload
+    error_response = ResponseEnvelope(
+        status="error",
+        message=e.message,
+        data=session_view(e.session) if e.session else None
+    )
+    return JSONResponse(status_code=e.status_code, content=error_response.model_dump(mode="json"))
+
+
+@router.post(
+    "",
+    response_model=ResponseEnvelope[UploadSessionResponse],
+    status_code=status.HTTP_201_CREATED,
+    summary="Membuat Sesi Upload Bertahap",
+    description="""
+    Membuat sesi upload bertahap (resumable) untuk file besar.
+
+    **Alur:**
+    1. Buat sesi dengan ukuran total file
+    2. Kirim chunk berurutan dengan `PUT /uploads/{upload_id}?offset=N` (body berisi byte chunk,
+       header `X-Chunk-SHA256` berisi SHA-256 chunk)
+    3. Jika terputus, ambil offset terakhir dengan `GET /uploads/{upload_id}` lalu lanjutkan
+    4. Finalisasi dengan `POST /uploads/{upload_id}/complete`
+    5. Kirim `upload_id` sebagai pengganti file ke endpoint create (program, blog, galeri, partner)
+
+    **Format yang Didukung:** JPG/JPEG, PNG, GIF, MP4, WebM
+    """
+)
+async def create_upload_session(
+    payload: UploadSessionCreate,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    try:
+        session = await create_session(
+            db, current_user["email"], payload.size, payload.filename, payload.sha256)
+    except UploadSessionError as e:
+        return error_response(e)
+    return ResponseEnvelope(
+        status="success",
+        message="Sesi upload berhasil dibuat",
+        data=session_view(session)
+    )
+
+
+@router.put(
+    "/{upload_id}",
+    response_model=ResponseEnvelope[UploadSessionResponse],
+    summary="Mengirim Chunk",
+    description=f"""
+    Mengirim satu chunk pada offset tertentu. Body request berisi byte chunk apa adanya
+    (`Content-Type: application/octet-stream`).
+
+    **Batasan:**
+    - Offset harus sama dengan offset sesi (409 berisi offset yang benar jika tidak)
+    - Ukuran chunk maksimal: {settings.UPLOAD_CHUNK_MAX_SIZE // (1024 * 1024)}MB
+    - Mengirim ulang chunk terakhir dengan checksum yang sama tidak menulis ulang data
+    """
+)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Posisi byte awal chunk"),
+    x_chunk_sha256: Optional[str] = Header(None, description="SHA-256 chunk (hex)"),
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.UPLOAD_CHUNK_MAX_SIZE:
+        return error_response(UploadSessionError(
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, "Chunk melebihi ukuran maksimal"))
+    try:
+        session = await write_chunk(
+            db, upload_id, current_user["email"], offset, request.stream(), x_chunk_sha256)
+    except UploadSessionError as e:
+        return error_response(e)
+    return ResponseEnvelope(
+        status="success",
+        message="Chunk berhasil diterima",
+        data=session_view(session)
+    )
+
+
+@router.get(
+    "/{upload_id}",
+    response_model=ResponseEnvelope[UploadSessionResponse],
+    summary="Status Sesi Upload",
+    description="Mengambil status sesi upload, termasuk offset chunk berikutnya."
+)
+async def get_upload_session(
+    upload_id: str,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    try:
+        session = await get_session(db, upload_id, current_user["email"])
+    except UploadSessionError as e:
+        return error_response(e)
+    return ResponseEnvelope(
+        status="success",
+        message="Status sesi upload berhasil diambil",
+        data=session_view(session)
+    )
+
+
+@router.post(
+    "/{upload_id}/complete",
+    response_model=ResponseEnvelope[UploadSessionResponse],
+    summary="Finalisasi Upload",
+    description="""
+    Menggabungkan upload yang sudah lengkap menjadi file final. Format dicek dari isi file,
+    metadata EXIF/XMP dibuang dan checksum seluruh file diverifikasi jika diberikan saat
+    membuat sesi. Hasilnya berisi URL dan metadata gambar.
+    """
+)
+async def complete_upload_session(
+    upload_id: str,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    try:
+        session = await finalize_session(db, upload_id, current_user["email"])
+    except UploadSessionError as e:
+        return error_response(e)
+    return ResponseEnvelope(
+        status="success",
+        message="Upload berhasil difinalisasi",
+        data=session_view(session)
+    )
+
+
+@router.delete(
+    "/{upload_id}",
+    response_model=ResponseEnvelope,
+    summary="Membatalkan Sesi Upload",
+    description="Membatalkan sesi upload yang belum difinalisasi dan menghapus chunk yang sudah diterima."
+)
+async def delete_upload_session(
+    upload_id: str,
+    db=Depends(get_database),
+    current_user=Depends(get_current_active_user)
+):
+    try:
+        await abort_session(db, upload_id, current_user["email"])
+    except UploadSessionError as e:
+        return error_response(e)
+    return ResponseEnvelope(
+        status="success",
+        message="Sesi upload berhasil dibatalkan",
+        data=None
+    )
@@ -0,0 +1,122 @@
+"""
+Admission control: batas konkurensi per kelas route dan load shedding.
+
+Setiap kelas route (baca publik, auth, upload, lainnya) punya budget
+konkurensi sendiri sehingga login yang berat (bcrypt) dan upload tidak bisa
+menghabiskan kapasitas untuk request baca yang murah. Request yang menunggu
+lebih lama dari ``ADMISSION_QUEUE_TIMEOUT`` (atau datang saat antrian penuh)
+langsung ditolak dengan 503 + ``Retry-After``.
+"""
+import asyncio
+import time
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+PUBLIC_READ = "public_read"
+AUTH = "auth"
+UPLOAD = "upload"
+DEFAULT = "default"
+
+# Route yang tidak pernah di-shed (monitoring harus tetap bisa diakses)
+EXEMPT_PATHS = ("/metrics",)
+
+admission_shed_total = registry.counter(
+    "admission_shed_total", "Jumlah request yang ditolak admission control",
+    ("route_class", "reason"))
+admission_queue_depth = registry.gauge(
+    "admission_queue_depth", "Jumlah request yang menunggu slot", ("route_class",))
+admission_in_flight = registry.gauge(
+    "admission_in_flight", "Jumlah request yang sedang diproses", ("route_class",))
+admission_wait_seconds = registry.histogram(
+    "admission_wait_seconds", "Waktu tunggu request sebelum mendapat slot", ("route_class",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+
+class ConcurrencyLimiter:
+    """Semaphore dengan batas waktu tunggu dan batas panjang antrian."""
+
+    def __init__(self, name: str, limit: int, queue_timeout: float, max_queue: int = 0):
+        self.name = name
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.in_flight = 0
+        self._semaphore: Optional[asyncio.Semaphore] = asyncio.Semaphore(limit) if limit > 0 else None
+
+    async def acquire(self) -> Optional[str]:
+        """Ambil slot. Mengembalikan alasan penolakan, atau None jika berhasil."""
+        if self._semaphore is None:
+            self._enter()
+            return None
+
+        if self._semaphore.locked():
+            if self.max_queue and self.waiting >= self.max_queue:
+                return "queue_full"
+            self.waiting += 1
+            admission_queue_depth.set(self.waiting, route_class=self.name)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                return "queue_timeout"
+            finally:
+                self.waiting -= 1
+                admission_queue_depth.set(self.waiting, route_class=self.name)
+                admission_wait_seconds.observe(time.perf_counter() - start, route_class=self.name)
+        else:
+            await self._semaphore.acquire()
+            admission_wait_seconds.observe(0.0, route_class=self.name)
+
+        self._enter()
+        return None
+
+    def _enter(self):
+        self.in_flight += 1
+        admission_in_flight.set(self.in_flight, route_class=self.name)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        admission_in_flight.set(self.in_flight, route_class=self.name)
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+def classify_request(method: str, path: str, content_type: str = "") -> str:
+    """Tentukan kelas route dari method, path dan content-type request."""
+    if path.startswith("/auth"):
+        return AUTH
+    if method in ("POST", "PUT", "PATCH") and (
+        content_type.startswith("multipart/form-data") or path.startswith("/uploads")
+    ):
+        return UPLOAD
+    if method in ("GET", "HEAD"):
+        return PUBLIC_READ
+    return DEFAULT
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+
+
+def get_limiter(route_class: str) -> ConcurrencyLimiter:
+    limiter = _limiters.get(route_class)
+    if limiter is None:
+        limits = {
+            PUBLIC_READ: settings.ADMISSION_PUBLIC_READ_LIMIT,
+            AUTH: settings.ADMISSION_AUTH_LIMIT,
+            UPLOAD: settings.ADMISSION_UPLOAD_LIMIT,
+            DEFAULT: settings.ADMISSION_DEFAULT_LIMIT,
+        }
+        limiter = _limiters[route_class] = ConcurrencyLimiter(
+            route_class,
+            limits[route_class],
+            settings.ADMISSION_QUEUE_TIMEOUT,
+            settings.ADMISSION_MAX_QUEUE,
+        )
+    return limiter
+
+
+def record_shed(route_class: str, reason: str) -> None:
+    admission_shed_total.inc(route_class=route_class, reason=reason)
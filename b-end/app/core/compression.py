@@ -0,0 +1,249 @@
+"""
+Kompresi response (gzip/brotli) sebagai middleware ASGI murni.
+
+Encoding dipilih dari ``Accept-Encoding`` (brotli diutamakan jika paket
+``brotli`` terpasang dan client menerimanya). Hanya response JSON/teks yang
+dikompresi, dan hanya jika ukurannya minimal ``minimum_size`` byte.
+
+Response yang dikirim dalam satu pesan body (JSONResponse, ResponseEnvelope)
+dikompresi utuh dan hasilnya disimpan di cache LRU berdasarkan digest body,
+sehingga payload populer (mis. daftar blog halaman pertama) cukup dikompresi
+sekali. Response streaming dikompresi per chunk tanpa cache.
+"""
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.metrics import record_cache_lookup, registry
+
+try:
+    import brotli
+except ImportError:  # brotli opsional, fallback ke gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/javascript", "application/xml",
+    "image/svg+xml", "text/",
+)
+# Body sebesar ini dikompresi di thread pool (zlib/brotli melepas GIL)
+THREADPOOL_MIN_SIZE = 256 * 1024
+
+compression_bytes_total = registry.counter(
+    "compression_bytes_total", "Ukuran body sebelum/sesudah kompresi", ("encoding", "stage"))
+compression_cache_bytes = registry.gauge(
+    "compression_cache_bytes", "Ukuran cache hasil kompresi")
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """``"gzip;q=0.8, br"`` -> ``{"gzip": 0.8, "br": 1.0}``."""
+    encodings = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    accepted = parse_accept_encoding(header)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "").lower()
+    return (
+        "content-encoding" not in headers
+        and "content-range" not in headers
+        and any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+    )
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    # wbits 31 = format gzip (header + trailer)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str, level: int):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.finish
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = self._compressor.flush
+
+    def compress(self, chunk: bytes, final: bool) -> bytes:
+        data = self._compress(chunk)
+        if final:
+            data += self._flush()
+        return data
+
+
+class CompressedCache:
+    """LRU hasil kompresi, dibatasi total byte. Key: (encoding, level, digest body)."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[Tuple[str, int, bytes], bytes]" = OrderedDict()
+        self.size = 0
+
+    @staticmethod
+    def key(body: bytes, encoding: str, level: int) -> Tuple[str, int, bytes]:
+        return encoding, level, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key) -> Optional[bytes]:
+        value = self.entries.get(key)
+        record_cache_lookup("compression", value is not None)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value: bytes) -> None:
+        if not self.max_bytes or len(value) > self.max_bytes // 4 or key in self.entries:
+            return
+        self.entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+        compression_cache_bytes.set(self.size)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+        compression_cache_bytes.set(0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 5, cache_max_bytes: int = 0):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        self.cache = CompressedCache(cache_max_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    async def compress_body(self, body: bytes, encoding: str) -> bytes:
+        level = self.levels[encoding]
+        key = self.cache.key(body, encoding, level)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if len(body) >= THREADPOOL_MIN_SIZE:
+            compressed = await anyio.to_thread.run_sync(compress, body, encoding, level)
+        else:
+            compressed = compress(body, encoding, level)
+        self.cache.put(key, compressed)
+        return compressed
+
+
+class CompressionResponder:
+    """Menahan ``http.response.start`` sampai pesan body pertama untuk memutuskan kompresi."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message = None
+        self.stream: Optional[StreamCompressor] = None
+        self.passthrough = False
+
+    def _prepare_headers(self, start: dict, length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # Representasi berbeda dari body asli: ETag tidak lagi strong
+            headers["ETag"] = f"W/{etag}"
+        if length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+
+    def _count(self, original: int, compressed: int) -> None:
+        compression_bytes_total.inc(original, encoding=self.encoding, stage="original")
+        compression_bytes_total.inc(compressed, encoding=self.encoding, stage="compressed")
+
+    async def send(self, message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            status = message["status"]
+            if status < 200 or status in (204, 206, 304) or not is_compressible(Headers(raw=message["headers"])):
+                self.passthrough = True
+                await self._send(message)
+            else:
+                self.start_message = message
+            return
+        if self.passthrough:
+            await self._send(message)
+            return
+        if message_type != "http.response.body":
+            # Mis. ekstensi ASGI (pathsend/zerocopysend): kirim apa adanya tanpa kompresi
+            if self.start_message is not None:
+                start, self.start_message = self.start_message, None
+                self.passthrough = True
+                await self._send(start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            if not more_body:
+                # Body utuh dalam satu pesan: kompresi sekali, pakai cache
+                if len(body) < self.middleware.minimum_size:
+                    self.passthrough = True
+                    await self._send(start)
+                    await self._send(message)
+                    return
+                compressed = await self.middleware.compress_body(body, self.encoding)
+                self._prepare_headers(start, len(compressed))
+                self._count(len(body), len(compressed))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": compressed})
+                return
+            # Streaming: ukuran total tidak diketahui, kompresi per chunk
+            self._prepare_headers(start, None)
+            self.stream = StreamCompressor(self.encoding, self.middleware.levels[self.encoding])
+            await self._send(start)
+
+        data = self.stream.compress(body, final=not more_body)
+        self._count(len(body), len(data))
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -22,6 +22,13 @@ class Settings(BaseSettings):
     SECRET_KEY: str = config("SECRET_KEY")
     ALGORITHM: str = config("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = config("ACCESS_TOKEN_EXPIRE_MINUTES", cast=int)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = config("REFRESH_TOKEN_EXPIRE_DAYS", default=7, cast=int)
+    
+    # Password hashing settings (bcrypt, 0 = kalibrasi otomatis ke PASSWORD_HASH_TARGET_MS)
+    PASSWORD_HASH_ROUNDS: int = config("PASSWORD_HASH_ROUNDS", default=12, cast=int)
+    PASSWORD_HASH_TARGET_MS: float = config("PASSWORD_HASH_TARGET_MS", default=250.0, cast=float)
+    PASSWORD_HASH_MIN_ROUNDS: int = config("PASSWORD_HASH_MIN_ROUNDS", default=10, cast=int)
+    PASSWORD_HASH_MAX_ROUNDS: int = config("PASSWORD_HASH_MAX_ROUNDS", default=16, cast=int)
     
     # CORS settings
     ALLOWED_ORIGINS: List[str] = json.loads(config("ALLOWED_ORIGINS"))
@@ -32,6 +39,111 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB in bytes
     ALLOWED_FILE_TYPES: List[str] = ["image/jpeg", "image/png", "image/gif"]
     
+    # Server settings (dipakai oleh app/server.py)
+    SERVER_HOST: str = config("SERVER_HOST", default="0.0.0.0")
+    SERVER_PORT: int = config("SERVER_PORT", default=8000, cast=int)
+    SERVER_WORKERS: int = config("SERVER_WORKERS", default=os.cpu_count() or 1, cast=int)
+    SERVER_BACKLOG: int = config("SERVER_BACKLOG", default=2048, cast=int)
+    SERVER_KEEPALIVE: int = config("SERVER_KEEPALIVE", default=5, cast=int)
+    SERVER_LIMIT_CONCURRENCY: int = config("SERVER_LIMIT_CONCURRENCY", default=0, cast=int)
+    SERVER_GRACEFUL_TIMEOUT: int = config("SERVER_GRACEFUL_TIMEOUT", default=30, cast=int)
+    WORKER_MAX_MEMORY_MB: int = config("WORKER_MAX_MEMORY_MB", default=0, cast=int)
+    
+    # Admission control settings (batas konkurensi per kelas route, 0 = tanpa batas)
+    ADMISSION_CONTROL_ENABLED: bool = config("ADMISSION_CONTROL_ENABLED", default=True, cast=bool)
+    ADMISSION_PUBLIC_READ_LIMIT: int = config("ADMISSION_PUBLIC_READ_LIMIT", default=128, cast=int)
+    ADMISSION_AUTH_LIMIT: int = config("ADMISSION_AUTH_LIMIT", default=8, cast=int)
+    ADMISSION_UPLOAD_LIMIT: int = config("ADMISSION_UPLOAD_LIMIT", default=4, cast=int)
+    ADMISSION_DEFAULT_LIMIT: int = config("ADMISSION_DEFAULT_LIMIT", default=32, cast=int)
+    ADMISSION_QUEUE_TIMEOUT: float = config("ADMISSION_QUEUE_TIMEOUT", default=1.0, cast=float)
+    ADMISSION_MAX_QUEUE: int = config("ADMISSION_MAX_QUEUE", default=256, cast=int)
+    ADMISSION_RETRY_AFTER: int = config("ADMISSION_RETRY_AFTER", default=2, cast=int)
+    
+    # Deadline settings (budget per kelas route dalam milidetik, dipakai sebagai maxTimeMS)
+    DEADLINE_ENABLED: bool = config("DEADLINE_ENABLED", default=True, cast=bool)
+    DEADLINE_PUBLIC_READ_MS: int = config("DEADLINE_PUBLIC_READ_MS", default=5000, cast=int)
+    DEADLINE_AUTH_MS: int = config("DEADLINE_AUTH_MS", default=5000, cast=int)
+    DEADLINE_UPLOAD_MS: int = config("DEADLINE_UPLOAD_MS", default=30000, cast=int)
+    DEADLINE_DEFAULT_MS: int = config("DEADLINE_DEFAULT_MS", default=10000, cast=int)
+    DEADLINE_MAX_MS: int = config("DEADLINE_MAX_MS", default=30000, cast=int)
+    
+    # Logging settings
+    LOG_LEVEL: str = config("LOG_LEVEL", default="INFO")
+    LOG_JSON: bool = config("LOG_JSON", default=True, cast=bool)
+    LOG_QUEUE_SIZE: int = config("LOG_QUEUE_SIZE", default=10000, cast=int)
+    LOG_SAMPLE_RATE: float = config("LOG_SAMPLE_RATE", default=1.0, cast=float)
+    LOG_SAMPLED_LOGGERS: str = config("LOG_SAMPLED_LOGGERS", default="app.access,uvicorn.access")
+    
+    # Profiler settings (endpoint /debug/profile, khusus admin)
+    PROFILER_ENABLED: bool = config("PROFILER_ENABLED", default=True, cast=bool)
+    PROFILER_INTERVAL_MS: int = config("PROFILER_INTERVAL_MS", default=10, cast=int)
+    PROFILER_MAX_SECONDS: int = config("PROFILER_MAX_SECONDS", default=60, cast=int)
+    
+    # Memory profiling settings (tracemalloc, dikendalikan dari /debug/memory)
+    MEMORY_TRACE_FRAMES: int = config("MEMORY_TRACE_FRAMES", default=1, cast=int)
+    MEMORY_ROUTE_SAMPLE_RATE: float = config("MEMORY_ROUTE_SAMPLE_RATE", default=0.0, cast=float)
+    
+    # Login rate limit settings (sliding window per IP dan per username)
+    LOGIN_RATE_LIMIT_ENABLED: bool = config("LOGIN_RATE_LIMIT_ENABLED", default=True, cast=bool)
+    LOGIN_RATE_LIMIT_WINDOW: int = config("LOGIN_RATE_LIMIT_WINDOW", default=60, cast=int)
+    LOGIN_RATE_LIMIT_PER_IP: int = config("LOGIN_RATE_LIMIT_PER_IP", default=20, cast=int)
+    LOGIN_RATE_LIMIT_PER_USERNAME: int = config("LOGIN_RATE_LIMIT_PER_USERNAME", default=10, cast=int)
+    LOGIN_RATE_LIMIT_BACKEND: str = config("LOGIN_RATE_LIMIT_BACKEND", default="memory")
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = config("LOGIN_RATE_LIMIT_MAX_KEYS", default=100000, cast=int)
+    LOGIN_RATE_LIMIT_TRUST_FORWARDED: bool = config("LOGIN_RATE_LIMIT_TRUST_FORWARDED", default=False, cast=bool)
+    
+    # Token revocation settings (bloom filter per worker, disinkronkan dari koleksi revoked_tokens)
+    REVOCATION_FILTER_CAPACITY: int = config("REVOCATION_FILTER_CAPACITY", default=100000, cast=int)
+    REVOCATION_FILTER_ERROR_RATE: float = config("REVOCATION_FILTER_ERROR_RATE", default=0.001, cast=float)
+    REVOCATION_SYNC_INTERVAL: float = config("REVOCATION_SYNC_INTERVAL", default=5.0, cast=float)
+    REVOCATION_SYNC_LOOKBACK: float = config("REVOCATION_SYNC_LOOKBACK", default=60.0, cast=float)
+    
+    # Compression settings (gzip/brotli sesuai Accept-Encoding, brotli jika paket brotli terpasang)
+    COMPRESSION_ENABLED: bool = config("COMPRESSION_ENABLED", default=True, cast=bool)
+    COMPRESSION_MIN_SIZE: int = config("COMPRESSION_MIN_SIZE", default=1024, cast=int)
+    COMPRESSION_GZIP_LEVEL: int = config("COMPRESSION_GZIP_LEVEL", default=6, cast=int)
+    COMPRESSION_BROTLI_QUALITY: int = config("COMPRESSION_BROTLI_QUALITY", default=5, cast=int)
+    COMPRESSION_CACHE_MAX_BYTES: int = config("COMPRESSION_CACHE_MAX_BYTES", default=16 * 1024 * 1024, cast=int)
+    
+    # Static file settings (/static; nama file ber-hash dianggap immutable)
+    STATIC_IMMUTABLE_MAX_AGE: int = config("STATIC_IMMUTABLE_MAX_AGE", default=31536000, cast=int)
+    STATIC_MAX_AGE: int = config("STATIC_MAX_AGE", default=3600, cast=int)
+    STATIC_ACCEL_REDIRECT: bool = config("STATIC_ACCEL_REDIRECT", default=False, cast=bool)
+    STATIC_ACCEL_PREFIX: str = config("STATIC_ACCEL_PREFIX", default="/_static_internal/")
+    
+    # Image metadata settings (dimensi, warna dominan dan placeholder LQIP saat upload)
+    IMAGE_META_WORKERS: int = config("IMAGE_META_WORKERS", default=2, cast=int)
+    IMAGE_PLACEHOLDER_SIZE: int = config("IMAGE_PLACEHOLDER_SIZE", default=16, cast=int)
+    IMAGE_MAX_PIXELS: int = config("IMAGE_MAX_PIXELS", default=40_000_000, cast=int)
+    
+    # Image variant settings (varian AVIF/WebP dibuat di process pool, dipilih sesuai header Accept)
+    IMAGE_VARIANT_FORMATS: str = config("IMAGE_VARIANT_FORMATS", default="avif,webp")
+    IMAGE_VARIANT_WORKERS: int = config("IMAGE_VARIANT_WORKERS", default=1, cast=int)
+    IMAGE_VARIANT_WEBP_QUALITY: int = config("IMAGE_VARIANT_WEBP_QUALITY", default=80, cast=int)
+    IMAGE_VARIANT_AVIF_QUALITY: int = config("IMAGE_VARIANT_AVIF_QUALITY", default=60, cast=int)
+    
+    # Upload bertahap settings (/uploads, sesi resumable untuk file besar; file sementara di luar static)
+    UPLOAD_SESSION_DIR: str = config("UPLOAD_SESSION_DIR", default="upload_sessions")
+    UPLOAD_SESSION_MAX_SIZE: int = config("UPLOAD_SESSION_MAX_SIZE", default=200 * 1024 * 1024, cast=int)
+    UPLOAD_CHUNK_MAX_SIZE: int = config("UPLOAD_CHUNK_MAX_SIZE", default=8 * 1024 * 1024, cast=int)
+    UPLOAD_SESSION_TTL_HOURS: int = config("UPLOAD_SESSION_TTL_HOURS", default=24, cast=int)
+    UPLOAD_SESSION_CLEANUP_INTERVAL: float = config("UPLOAD_SESSION_CLEANUP_INTERVAL", default=300.0, cast=float)
+    
+    # Job background settings (antrean job di MongoDB, diproses worker di setiap proses aplikasi)
+    JOB_WORKERS: int = config("JOB_WORKERS", default=2, cast=int)
+    JOB_POLL_INTERVAL: float = config("JOB_POLL_INTERVAL", default=1.0, cast=float)
+    JOB_LEASE_SECONDS: int = config("JOB_LEASE_SECONDS", default=300, cast=int)
+    JOB_MAX_ATTEMPTS: int = config("JOB_MAX_ATTEMPTS", default=5, cast=int)
+    JOB_BACKOFF_BASE: float = config("JOB_BACKOFF_BASE", default=2.0, cast=float)
+    JOB_BACKOFF_MAX: float = config("JOB_BACKOFF_MAX", default=600.0, cast=float)
+    JOB_RETENTION_HOURS: int = config("JOB_RETENTION_HOURS", default=24, cast=int)
+    
+    # Metrics settings
+    METRICS_ENABLED: bool = config("METRICS_ENABLED", default=True, cast=bool)
+    METRICS_MULTIPROC_DIR: str = config("METRICS_MULTIPROC_DIR", default="")
+    METRICS_FLUSH_INTERVAL: float = config("METRICS_FLUSH_INTERVAL", default=5.0, cast=float)
+    EVENT_LOOP_LAG_INTERVAL: float = config("EVENT_LOOP_LAG_INTERVAL", default=0.5, cast=float)
+    
     # Admin settings
     ADMIN_EMAIL: str = config("ADMIN_EMAIL")
     ADMIN_USERNAME: str = config("ADMIN_USERNAME")
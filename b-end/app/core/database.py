@@ -1,9 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.core.metrics import mongo_command_listener
 import logging
 import asyncio
-from typing import Optional
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+import time
+from typing import Dict, Optional
+from pymongo.errors import ConnectionFailure, OperationFailure, ServerSelectionTimeoutError
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,16 @@ db = None
 MAX_RETRIES = 5
 RETRY_DELAY = 2
 
+# Unique index yang menjamin email/username tidak dobel (registrasi cukup satu insert)
+USER_UNIQUE_FIELDS = ("email", "username")
+_indexed_databases = set()
+# Pembuatan index yang sedang berjalan per database
+_index_tasks: Dict[str, asyncio.Task] = {}
+# Waktu (monotonic) pembuatan index terakhir gagal per database; selama
+# USER_INDEX_RETRY_SECONDS belum lewat, index tidak dibuat ulang di setiap registrasi
+USER_INDEX_RETRY_SECONDS = 60.0
+_index_failures: Dict[str, float] = {}
+
 async def connect_to_mongo():
     """Create database connection with retry mechanism."""
     global client, db
@@ -23,7 +35,10 @@ async def connect_to_mongo():
     while retries < MAX_RETRIES:
         try:
             # Setup koneksi MongoDB
-            client = AsyncIOMotorClient(settings.MONGODB_URL)
+            client = AsyncIOMotorClient(
+                settings.MONGODB_URL,
+                event_listeners=[mongo_command_listener]
+            )
             
             # Test koneksi
             await client.admin.command('ping')
@@ -77,3 +92,49 @@ async def get_collection(collection_name: str):
     """Get a specific collection with automatic database connection."""
     database = await get_database()
     return database[collection_name]
+
+async def _create_user_indexes(database) -> bool:
+    try:
+        errors = []
+        for field in USER_UNIQUE_FIELDS:
+            try:
+                await database.users.create_index(field, unique=True, name=f"{field}_1")
+            except OperationFailure as e:
+                errors.append(f"users.{field}: {str(e)}")
+        if not errors:
+            _indexed_databases.add(database.name)
+            _index_failures.pop(database.name, None)
+            return True
+        if database.name not in _index_failures:
+            # Dicatat sekali per rangkaian kegagalan; biasanya karena data lama sudah berisi duplikat
+            logger.error(
+                f"Gagal membuat unique index di database '{database.name}' ({'; '.join(errors)}). "
+                f"Hapus email/username ganda di koleksi users; registrasi ditolak (503) "
+                f"dan index dicoba lagi setiap {USER_INDEX_RETRY_SECONDS:.0f} detik")
+        _index_failures[database.name] = time.monotonic()
+        return False
+    finally:
+        _index_tasks.pop(database.name, None)
+
+async def ensure_user_indexes(database=None) -> bool:
+    """
+    Buat unique index untuk users.email dan users.username (dipanggil saat
+    startup dan sebelum registrasi di setiap database). Idempotent: database
+    hanya ditandai setelah semua index berhasil dibuat, pemanggil bersamaan
+    menunggu pembuatan yang sama, dan pembuatan yang gagal baru dicoba lagi
+    setelah ``USER_INDEX_RETRY_SECONDS``. ``True`` jika unique index sudah ada.
+    """
+    database = database if database is not None else db
+    if database is None:
+        return False
+    if database.name in _indexed_databases:
+        return True
+    failed_at = _index_failures.get(database.name)
+    if failed_at is not None and time.monotonic() - failed_at < USER_INDEX_RETRY_SECONDS:
+        return False
+    task = _index_tasks.get(database.name)
+    if task is None:
+        task = asyncio.ensure_future(_create_user_indexes(database))
+        _index_tasks[database.name] = task
+    # shield: request yang dibatalkan tidak membatalkan pembuatan index untuk pemanggil lain
+    return await asyncio.shield(task)
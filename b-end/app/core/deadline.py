@@ -0,0 +1,67 @@
+"""
+Deadline per request yang diteruskan ke MongoDB.
+
+Budget waktu ditentukan per kelas route (lihat ``app.core.admission``) dan
+bisa diperkecil oleh client melalui header ``X-Request-Timeout`` (milidetik).
+Selama request diproses, budget dipasang dengan ``pymongo.timeout`` sehingga
+setiap operasi Motor (find, aggregate, count, dst.) otomatis mengirim
+``maxTimeMS`` sesuai sisa waktu. Motor menyalin contextvars ke thread
+executor-nya, jadi deadline ikut terbawa ke driver.
+"""
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+
+from app.core.admission import AUTH, DEFAULT, PUBLIC_READ, UPLOAD
+from app.core.config import settings
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def budget_for(route_class: str, header_value: Optional[str] = None) -> float:
+    """Budget (detik) untuk kelas route, dengan override dari header jika valid."""
+    budgets = {
+        PUBLIC_READ: settings.DEADLINE_PUBLIC_READ_MS,
+        AUTH: settings.DEADLINE_AUTH_MS,
+        UPLOAD: settings.DEADLINE_UPLOAD_MS,
+        DEFAULT: settings.DEADLINE_DEFAULT_MS,
+    }
+    budget_ms = budgets.get(route_class, settings.DEADLINE_DEFAULT_MS)
+    if header_value:
+        try:
+            requested_ms = int(header_value)
+        except ValueError:
+            requested_ms = 0
+        if requested_ms > 0:
+            budget_ms = min(requested_ms, settings.DEADLINE_MAX_MS)
+    return budget_ms / 1000
+
+
+def set_deadline(budget: float):
+    """Pasang deadline untuk konteks saat ini, mengembalikan token untuk reset."""
+    return _deadline.set(time.monotonic() + budget)
+
+
+def reset_deadline(token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Sisa waktu request (detik), atau None jika tidak ada deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def deadline_expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    return isinstance(exc, PyMongoError) and exc.timeout
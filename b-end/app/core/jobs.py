@@ -0,0 +1,258 @@
+"""
+Antrean job background yang tahan restart.
+
+Pekerjaan setelah write (membuat varian gambar, menghapus file upload) tidak
+dijalankan di dalam request: endpoint memanggil ``enqueue`` yang hanya
+menyimpan dokumen ke koleksi ``jobs`` lalu langsung kembali. Worker async di
+setiap proses aplikasi mengklaim job secara atomik (``find_one_and_update``
+dengan lease ``locked_until`` yang diperpanjang selama handler berjalan),
+sehingga job bisa diambil worker di proses mana pun dan job milik worker yang
+mati diambil ulang setelah lease habis.
+
+Job yang gagal dicoba ulang dengan backoff eksponensial sampai
+``max_attempts``; setelah itu berstatus ``failed`` dengan pesan kesalahan di
+``last_error``. Job selesai/gagal dihapus TTL index setelah JOB_RETENTION_HOURS.
+
+Handler didaftarkan dengan decorator ``job_handler`` dan harus idempotent:
+satu job bisa dijalankan lebih dari sekali (mis. worker mati setelah handler
+selesai tetapi sebelum statusnya ditulis).
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.metrics import (
+    job_duration_seconds, job_queue_depth, job_wait_seconds, jobs_enqueued_total, jobs_processed_total
+)
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "jobs"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Interval pembaruan gauge job_queue_depth (detik)
+DEPTH_SAMPLE_INTERVAL = 10.0
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+_tasks: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+
+
+def job_handler(kind: str):
+    """Daftarkan handler ``async def handler(payload)`` untuk job ``kind``."""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Jeda sebelum percobaan berikutnya setelah ``attempts`` kali gagal."""
+    return min(settings.JOB_BACKOFF_BASE * 2 ** (attempts - 1), settings.JOB_BACKOFF_MAX)
+
+
+async def enqueue(db, kind: str, payload: dict, delay: float = 0.0,
+                  max_attempts: Optional[int] = None) -> str:
+    """Simpan job baru dan kembalikan ID-nya tanpa menunggu job diproses."""
+    if kind not in _handlers:
+        raise ValueError(f"Handler job tidak dikenal: {kind}")
+    now = datetime.utcnow()
+    job_id = uuid.uuid4().hex
+    await db[COLLECTION].insert_one({
+        "_id": job_id,
+        "kind": kind,
+        "payload": payload,
+        "status": PENDING,
+        "attempts": 0,
+        "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+        "run_at": now + timedelta(seconds=delay),
+        "created_at": now,
+        "locked_until": None,
+        "last_error": None,
+    })
+    jobs_enqueued_total.inc(kind=kind)
+    if _wakeup is not None and not delay:
+        _wakeup.set()
+    return job_id
+
+
+async def claim_job(db) -> Optional[dict]:
+    """Ambil satu job yang jatuh tempo (atau yang lease-nya habis) secara atomik."""
+    now = datetime.utcnow()
+    return await db[COLLECTION].find_one_and_update(
+        {
+            "kind": {"$in": list(_handlers)},
+            "$or": [
+                {"status": PENDING, "run_at": {"$lte": now}},
+                {"status": RUNNING, "locked_until": {"$lt": now}},
+            ],
+        },
+        {
+            "$set": {"status": RUNNING, "lease": uuid.uuid4().hex, "started_at": now,
+                     "locked_until": now + timedelta(seconds=settings.JOB_LEASE_SECONDS)},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _heartbeat(db, owned: dict) -> None:
+    """Perpanjang lease selama handler berjalan agar job panjang tidak diambil worker lain."""
+    lease = timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    while True:
+        await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+        try:
+            result = await db[COLLECTION].update_one(
+                {**owned, "status": RUNNING}, {"$set": {"locked_until": datetime.utcnow() + lease}})
+        except Exception as e:
+            logger.warning(f"Gagal memperpanjang lease job {owned['_id']}: {str(e)}")
+            continue
+        if not result.matched_count:
+            logger.warning(f"Lease job {owned['_id']} sudah diambil worker lain")
+            return
+
+
+async def run_job(db, job: dict) -> str:
+    """
+    Jalankan job yang sudah diklaim; kembalikan hasilnya (``done``, ``retry``,
+    ``failed``, atau ``lost`` jika lease sudah diambil worker lain).
+    """
+    kind = job["kind"]
+    owned = {"_id": job["_id"], "lease": job["lease"]}
+    job_wait_seconds.observe(max(0.0, (job["started_at"] - job["run_at"]).total_seconds()), kind=kind)
+    start = time.perf_counter()
+    heartbeat = asyncio.create_task(_heartbeat(db, owned))
+    error = None
+    try:
+        await _handlers[kind](job["payload"])
+    except asyncio.CancelledError:
+        heartbeat.cancel()
+        # Worker dihentikan (shutdown): job dilepas agar segera diambil worker lain
+        try:
+            await db[COLLECTION].update_one(owned, {
+                "$set": {"status": PENDING, "locked_until": None, "run_at": datetime.utcnow()},
+                "$inc": {"attempts": -1},
+            })
+        except Exception as e:
+            logger.warning(f"Gagal melepas job {job['_id']}: {str(e)}")
+        raise
+    except Exception as e:
+        error = e
+    finally:
+        heartbeat.cancel()
+
+    now = datetime.utcnow()
+    if error is None:
+        outcome = DONE
+        update = {"status": DONE, "finished_at": now}
+    elif job["attempts"] >= job["max_attempts"]:
+        outcome = FAILED
+        update = {"status": FAILED, "finished_at": now}
+        logger.error(f"Job {kind} {job['_id']} gagal setelah {job['attempts']} percobaan: {str(error)}")
+    else:
+        outcome = "retry"
+        update = {"status": PENDING, "run_at": now + timedelta(seconds=backoff_seconds(job["attempts"]))}
+        logger.warning(f"Job {kind} {job['_id']} gagal (percobaan {job['attempts']}), dicoba ulang: {str(error)}")
+    if error is not None:
+        update["last_error"] = str(error) or type(error).__name__
+    update["locked_until"] = None
+    result = await db[COLLECTION].update_one(owned, {"$set": update})
+    if not result.modified_count:
+        # Lease habis dan job diklaim ulang: status dan hasilnya ditulis worker yang memegang lease
+        outcome = "lost"
+        logger.warning(f"Job {kind} {job['_id']} selesai setelah lease-nya diambil worker lain")
+    job_duration_seconds.observe(time.perf_counter() - start, kind=kind, outcome=outcome)
+    jobs_processed_total.inc(kind=kind, outcome=outcome)
+    return outcome
+
+
+async def run_pending_jobs(db, limit: Optional[int] = None) -> int:
+    """Proses job yang sudah jatuh tempo sampai antrean kosong; kembalikan jumlah job."""
+    count = 0
+    while limit is None or count < limit:
+        job = await claim_job(db)
+        if job is None:
+            break
+        await run_job(db, job)
+        count += 1
+    return count
+
+
+async def sample_queue_depth(db) -> Dict[str, int]:
+    depth = {}
+    for job_status in (PENDING, RUNNING, FAILED):
+        depth[job_status] = await db[COLLECTION].count_documents({"status": job_status})
+        job_queue_depth.set(depth[job_status], status=job_status)
+    return depth
+
+
+async def ensure_job_indexes(db) -> None:
+    await db[COLLECTION].create_index([("status", 1), ("run_at", 1)])
+    await db[COLLECTION].create_index(
+        "finished_at", expireAfterSeconds=settings.JOB_RETENTION_HOURS * 3600)
+
+
+async def _worker_loop(db, interval: float) -> None:
+    while True:
+        _wakeup.clear()
+        try:
+            job = await claim_job(db)
+            if job is not None:
+                await run_job(db, job)
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Worker job gagal mengambil/menjalankan job: {str(e)}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _depth_loop(db, interval: float) -> None:
+    while True:
+        try:
+            await sample_queue_depth(db)
+        except Exception as e:
+            logger.warning(f"Gagal menghitung kedalaman antrean job: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+async def start_job_workers():
+    """Buat index koleksi jobs dan jalankan JOB_WORKERS worker (startup)."""
+    from app.core import database
+
+    global _wakeup
+    if database.db is None:
+        return
+    await ensure_job_indexes(database.db)
+    _wakeup = asyncio.Event()
+    for _ in range(settings.JOB_WORKERS):
+        _tasks.append(asyncio.create_task(_worker_loop(database.db, settings.JOB_POLL_INTERVAL)))
+    _tasks.append(asyncio.create_task(_depth_loop(database.db, DEPTH_SAMPLE_INTERVAL)))
+
+
+async def stop_job_workers():
+    """Hentikan worker; job yang sedang berjalan dikembalikan ke antrean."""
+    global _wakeup
+    tasks = list(_tasks)
+    _tasks.clear()
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    _wakeup = None
@@ -0,0 +1,127 @@
+"""
+Logging terstruktur (JSON) yang tidak memblokir event loop.
+
+Semua record dimasukkan ke antrian terbatas melalui ``QueueHandler``;
+penulisan ke stderr dilakukan oleh thread ``QueueListener``. Jika sink
+lambat dan antrian penuh, record dibuang (dan dihitung di metrik) alih-alih
+membuat event loop menunggu. Log info bervolume tinggi (access log) bisa
+di-sampling dengan ``LOG_SAMPLE_RATE``.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+request_path_var: ContextVar[Optional[str]] = ContextVar("request_path", default=None)
+
+logs_dropped_total = registry.counter(
+    "logs_dropped_total", "Jumlah record log yang dibuang karena antrian penuh")
+
+# Atribut standar LogRecord yang tidak perlu ikut ditulis sebagai field tambahan
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "color_message"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RequestContextFilter(logging.Filter):
+    """Tambahkan request id dan path dari context request ke setiap record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = request_id_var.get()
+        if getattr(record, "path", None) is None:
+            record.path = request_path_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Sampling record INFO ke bawah dari logger bervolume tinggi."""
+
+    def __init__(self, rate: float, logger_names):
+        super().__init__()
+        self.rate = rate
+        self.logger_names = tuple(logger_names)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno > logging.INFO:
+            return True
+        if not record.name.startswith(self.logger_names):
+            return True
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            logs_dropped_total.inc()
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Pasang QueueHandler di root logger dan logger uvicorn, lalu jalankan listener."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+    sampled = [name.strip() for name in settings.LOG_SAMPLED_LOGGERS.split(",") if name.strip()]
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE, sampled))
+
+    sink = logging.StreamHandler(sys.stderr)
+    if settings.LOG_JSON:
+        sink.setFormatter(JsonFormatter())
+    else:
+        sink.setFormatter(logging.Formatter(
+            "%(levelname)s:%(name)s:%(request_id)s:%(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    # Uvicorn memasang handler stderr sendiri; arahkan juga ke antrian
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = [queue_handler] if name != "uvicorn.error" else []
+        uvicorn_logger.propagate = name == "uvicorn.error"
+
+    _listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Hentikan listener dan tulis sisa record di antrian."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,105 @@
+"""
+Profiling memori berbasis tracemalloc.
+
+Tracing dinyalakan/dimatikan saat runtime dari endpoint admin. Saat tracing
+aktif, snapshot bisa dibandingkan dengan baseline dan dikelompokkan per file
+atau per baris untuk mencari sumber pertumbuhan RSS. Sampler per route
+(``MEMORY_ROUTE_SAMPLE_RATE``) mencatat peak alokasi request yang di-sampling
+ke metrik ``route_alloc_peak_bytes``.
+
+Catatan: peak tracemalloc bersifat global per proses, sehingga nilai per route
+adalah perkiraan jika ada request lain yang berjalan bersamaan.
+"""
+import random
+import threading
+import tracemalloc
+from typing import List, Optional
+
+from app.core.metrics import SIZE_BUCKETS, registry
+
+route_alloc_peak_bytes = registry.histogram(
+    "route_alloc_peak_bytes", "Peak alokasi memori per request (sampling tracemalloc)",
+    ("route",), buckets=SIZE_BUCKETS)
+
+_IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>",
+                  "<frozen importlib._bootstrap_external>", "<unknown>")
+
+_lock = threading.Lock()
+_baseline: Optional[tracemalloc.Snapshot] = None
+
+
+def _filtered(snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+    return snapshot.filter_traces(
+        [tracemalloc.Filter(False, pattern) for pattern in _IGNORED_FILES])
+
+
+def start(frames: int = 1) -> None:
+    """Mulai tracing dan simpan snapshot baseline."""
+    global _baseline
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _baseline = _filtered(tracemalloc.take_snapshot())
+
+
+def stop() -> None:
+    global _baseline
+    with _lock:
+        _baseline = None
+        tracemalloc.stop()
+
+
+def is_tracing() -> bool:
+    return tracemalloc.is_tracing()
+
+
+def snapshot_diff(group_by: str = "lineno", limit: int = 25, reset_baseline: bool = False) -> dict:
+    """Bandingkan snapshot saat ini dengan baseline, dikelompokkan per file/baris."""
+    global _baseline
+    with _lock:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc tidak aktif")
+        snapshot = _filtered(tracemalloc.take_snapshot())
+        if _baseline is None:
+            _baseline = snapshot
+        stats = snapshot.compare_to(_baseline, group_by)
+        if reset_baseline:
+            _baseline = snapshot
+
+    current, peak = tracemalloc.get_traced_memory()
+    top: List[dict] = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        top.append({
+            "location": frame.filename if group_by == "filename" else f"{frame.filename}:{frame.lineno}",
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        })
+    return {
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "group_by": group_by,
+        "top": top,
+    }
+
+
+class RouteAllocationSample:
+    """Ukur peak alokasi satu request; dipakai oleh middleware."""
+
+    def __init__(self):
+        tracemalloc.reset_peak()
+        self.start_bytes = tracemalloc.get_traced_memory()[0]
+
+    def finish(self, route: str) -> None:
+        if not tracemalloc.is_tracing():
+            return
+        peak = tracemalloc.get_traced_memory()[1]
+        route_alloc_peak_bytes.observe(max(0, peak - self.start_bytes), route=route)
+
+
+def maybe_sample_route(rate: float) -> Optional[RouteAllocationSample]:
+    if rate <= 0 or not tracemalloc.is_tracing() or random.random() >= rate:
+        return None
+    return RouteAllocationSample()
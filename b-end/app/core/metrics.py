@@ -0,0 +1,404 @@
+"""
+Registry metrics in-process dengan output format teks Prometheus.
+
+Setiap worker menyimpan metriknya sendiri di memori. Jika
+``METRICS_MULTIPROC_DIR`` diisi, setiap worker secara berkala menulis
+snapshot ke ``<dir>/metrics-<pid>.json`` dan endpoint ``/metrics``
+menggabungkan semua snapshot tersebut, sehingga angka yang di-scrape
+mencakup seluruh worker uvicorn.
+"""
+import asyncio
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5,
+                   0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 * 1024,
+                2 * 1024 * 1024, 5 * 1024 * 1024, 10 * 1024 * 1024)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Label {sorted(labels)} tidak sesuai dengan {self.labelnames} untuk {self.name}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"values": [[list(k), v] for k, v in self._values.items()]}
+
+
+class Gauge(_Metric):
+    """Gauge dengan mode agregasi lintas worker: ``sum`` atau ``max``."""
+
+    type_name = "gauge"
+
+    def __init__(self, *args, multiprocess_mode: str = "sum", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.multiprocess_mode = multiprocess_mode
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"values": [[list(k), v] for k, v in self._values.items()]}
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label: [jumlah per bucket (non-kumulatif)..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = len(self.buckets) - 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def time(self, **labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"values": [[list(k), list(v)] for k, v in self._values.items()]}
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} sudah terdaftar dengan definisi berbeda")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              multiprocess_mode: str = "sum") -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames,
+                                    multiprocess_mode=multiprocess_mode))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            "pid": os.getpid(),
+            "metrics": {m.name: m.snapshot() for m in metrics},
+        }
+
+    # --- Mode multi-worker ---
+
+    def write_snapshot(self, directory: str) -> None:
+        """Tulis snapshot worker ini secara atomik ke direktori multiproses."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _collect_snapshots(self, directory: Optional[str]) -> List[dict]:
+        if not directory:
+            return [self.snapshot()]
+        try:
+            self.write_snapshot(directory)
+        except OSError as e:
+            logger.warning(f"Gagal menulis snapshot metrics: {str(e)}")
+            return [self.snapshot()]
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self, directory: Optional[str] = None) -> str:
+        """Render semua metrik dalam format teks Prometheus (0.0.4)."""
+        snapshots = self._collect_snapshots(directory)
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines: List[str] = []
+        for metric in metrics:
+            merged: Dict[LabelValues, object] = {}
+            for snap in snapshots:
+                data = snap.get("metrics", {}).get(metric.name)
+                if not data:
+                    continue
+                alive = snap.get("pid") == os.getpid() or _pid_alive(snap.get("pid"))
+                for labels, value in data["values"]:
+                    key = tuple(labels)
+                    if isinstance(metric, Histogram):
+                        row = merged.setdefault(key, [0.0] * (len(metric.buckets) + 2))
+                        if len(value) == len(row):
+                            for i, v in enumerate(value):
+                                row[i] += v
+                    elif isinstance(metric, Gauge):
+                        if not alive:
+                            continue
+                        if metric.multiprocess_mode == "max":
+                            merged[key] = max(merged.get(key, -math.inf), value)
+                        else:
+                            merged[key] = merged.get(key, 0.0) + value
+                    else:
+                        merged[key] = merged.get(key, 0.0) + value
+
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for key in sorted(merged):
+                value = merged[key]
+                if isinstance(metric, Histogram):
+                    cumulative = 0.0
+                    for bound, count in zip(metric.buckets, value):
+                        cumulative += count
+                        labels = _format_labels(metric.labelnames + ("le",),
+                                                key + (_format_value(bound),))
+                        lines.append(f"{metric.name}_bucket{labels} {_format_value(cumulative)}")
+                    labels = _format_labels(metric.labelnames, key)
+                    lines.append(f"{metric.name}_sum{labels} {_format_value(value[-2])}")
+                    lines.append(f"{metric.name}_count{labels} {_format_value(value[-1])}")
+                else:
+                    labels = _format_labels(metric.labelnames, key)
+                    lines.append(f"{metric.name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = MetricsRegistry()
+
+# --- Metrik aplikasi ---
+
+http_requests_total = registry.counter(
+    "http_requests_total", "Jumlah request HTTP", ("method", "route", "status"))
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds", "Latency request HTTP", ("method", "route", "status"))
+mongo_command_duration_seconds = registry.histogram(
+    "mongo_command_duration_seconds", "Latency command MongoDB",
+    ("collection", "command", "outcome"))
+upload_size_bytes = registry.histogram(
+    "upload_size_bytes", "Ukuran file yang diunggah", (), buckets=SIZE_BUCKETS)
+upload_duration_seconds = registry.histogram(
+    "upload_duration_seconds", "Durasi penyimpanan file upload", ("outcome",))
+upload_metadata_stripped_bytes_total = registry.counter(
+    "upload_metadata_stripped_bytes_total", "Byte EXIF/XMP yang dibuang dari file upload", ("format",))
+upload_sessions_total = registry.counter(
+    "upload_sessions_total", "Sesi upload bertahap per hasil", ("outcome",))
+image_variants_total = registry.counter(
+    "image_variants_total", "Varian AVIF/WebP yang diproses per format dan hasil", ("format", "outcome"))
+static_image_responses_total = registry.counter(
+    "static_image_responses_total", "Response gambar /static per format yang dikirim", ("format",))
+jobs_enqueued_total = registry.counter(
+    "jobs_enqueued_total", "Job background yang dimasukkan ke antrean", ("kind",))
+jobs_processed_total = registry.counter(
+    "jobs_processed_total", "Job background yang diproses per hasil", ("kind", "outcome"))
+job_queue_depth = registry.gauge(
+    "job_queue_depth", "Jumlah job di antrean per status", ("status",), multiprocess_mode="max")
+job_wait_seconds = registry.histogram(
+    "job_wait_seconds", "Waktu tunggu job sejak jatuh tempo sampai mulai diproses", ("kind",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0))
+job_duration_seconds = registry.histogram(
+    "job_duration_seconds", "Durasi eksekusi job background", ("kind", "outcome"))
+password_hash_duration_seconds = registry.histogram(
+    "password_hash_duration_seconds", "Durasi operasi bcrypt", ("operation",))
+cache_requests_total = registry.counter(
+    "cache_requests_total", "Jumlah lookup cache", ("cache", "result"))
+event_loop_lag_seconds = registry.gauge(
+    "event_loop_lag_seconds", "Keterlambatan event loop terakhir", (), multiprocess_mode="max")
+event_loop_lag_histogram = registry.histogram(
+    "event_loop_lag_distribution_seconds", "Distribusi keterlambatan event loop",
+    (), buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    cache_requests_total.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Mencatat latency setiap command MongoDB per collection/operasi."""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, object], str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "-"
+        self._pending[(event.request_id, event.connection_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        collection = self._pending.pop((event.request_id, event.connection_id), "-")
+        mongo_command_duration_seconds.observe(
+            event.duration_micros / 1_000_000,
+            collection=collection, command=event.command_name, outcome=outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+mongo_command_listener = MongoCommandListener()
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        event_loop_lag_seconds.set(lag)
+        event_loop_lag_histogram.observe(lag)
+
+
+async def flush_snapshots(directory: str, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            registry.write_snapshot(directory)
+        except OSError as e:
+            logger.warning(f"Gagal menulis snapshot metrics: {str(e)}")
+
+
+_background_tasks: List[asyncio.Task] = []
+
+
+async def start_metrics_tasks():
+    """Jalankan monitor event loop dan flusher snapshot (dipanggil saat startup)."""
+    if not settings.METRICS_ENABLED:
+        return
+    _background_tasks.append(asyncio.create_task(
+        monitor_event_loop_lag(settings.EVENT_LOOP_LAG_INTERVAL)))
+    if settings.METRICS_MULTIPROC_DIR:
+        _background_tasks.append(asyncio.create_task(
+            flush_snapshots(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_INTERVAL)))
+
+
+async def stop_metrics_tasks():
+    """Hentikan task metrics dan tulis snapshot terakhir."""
+    while _background_tasks:
+        _background_tasks.pop().cancel()
+    if settings.METRICS_ENABLED and settings.METRICS_MULTIPROC_DIR:
+        try:
+            registry.write_snapshot(settings.METRICS_MULTIPROC_DIR)
+        except OSError as e:
+            logger.warning(f"Gagal menulis snapshot metrics: {str(e)}")
@@ -0,0 +1,83 @@
+"""
+Sampling profiler untuk worker yang sedang berjalan.
+
+Sebuah thread mengambil snapshot stack semua thread (thread event loop dan
+thread executor) lewat ``sys._current_frames()`` pada interval tetap, lalu
+menggabungkannya menjadi format collapsed stack
+(``thread;frame;frame <jumlah>``) yang bisa langsung dipakai oleh
+flamegraph.pl, speedscope atau inferno. Tidak ada hook tracing yang
+dipasang, sehingga overhead hanya berasal dari pengambilan snapshot.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+def _collapse(frame, thread_name: str, max_depth: int) -> str:
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    labels.reverse()
+    return ";".join(label.replace(" ", "_") for label in labels)
+
+
+def sample_stacks(seconds: float, interval: float = 0.01, max_depth: int = 64) -> Dict[str, object]:
+    """Ambil sampel stack semua thread selama ``seconds`` detik.
+
+    Hanya satu sesi profiling yang boleh berjalan per proses.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("Profiling sedang berjalan")
+    try:
+        own_ident = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        busy = 0.0
+        deadline = time.perf_counter() + seconds
+        while True:
+            start = time.perf_counter()
+            if start >= deadline:
+                break
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stacks[_collapse(frame, names.get(ident, f"thread-{ident}"), max_depth)] += 1
+            samples += 1
+            elapsed = time.perf_counter() - start
+            busy += elapsed
+            time.sleep(max(0.0, interval - elapsed))
+        return {
+            "stacks": stacks,
+            "samples": samples,
+            "duration": seconds,
+            # Proporsi waktu yang dipakai sampler (perkiraan overhead)
+            "overhead": busy / seconds if seconds else 0.0,
+        }
+    finally:
+        _profile_lock.release()
+
+
+def render_collapsed(stacks: Counter, thread_filter: Optional[str] = None) -> str:
+    lines = [
+        f"{stack} {count}"
+        for stack, count in stacks.most_common()
+        if thread_filter is None or stack.startswith(thread_filter)
+    ]
+    return "\n".join(lines) + "\n"
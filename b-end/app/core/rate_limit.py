@@ -0,0 +1,192 @@
+"""
+Rate limiter sliding window untuk login.
+
+Setiap percobaan login dihitung per IP dan per username (dinormalisasi),
+dan ditolak dengan 429 sebelum ada query user maupun verifikasi bcrypt.
+Algoritmanya sliding window counter: hitungan window sebelumnya diberi bobot
+sesuai sisa overlap dengan window berjalan, sehingga memori per key konstan
+(dua angka) dan tidak ada lonjakan di batas window seperti fixed window.
+
+Backend:
+- ``memory``: state di proses (per worker), LRU dibatasi ``max_keys``
+- ``mongodb``: state bersama semua worker di koleksi ``rate_limits`` (TTL index)
+"""
+import math
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+COLLECTION = "rate_limits"
+
+rate_limit_requests_total = registry.counter(
+    "rate_limit_requests_total", "Hasil pengecekan rate limiter", ("limiter", "result"))
+rate_limit_tracked_keys = registry.gauge(
+    "rate_limit_tracked_keys", "Jumlah key yang dilacak rate limiter in-memory", ("limiter",))
+
+
+def normalize_username(username: str) -> str:
+    return (username or "").strip().lower()
+
+
+def estimate(previous: int, current: int, now: float, window: float) -> float:
+    elapsed = (now % window) / window
+    return previous * (1 - elapsed) + current
+
+
+def retry_after(previous: int, current: int, now: float, window: float, limit: int) -> int:
+    """Detik sampai estimasi hitungan turun di bawah limit."""
+    into_window = now % window
+    if current >= limit or previous == 0:
+        wait = window - into_window
+    else:
+        # previous * (1 - t / window) + current < limit
+        needed = (1 - (limit - current) / previous) * window
+        wait = needed - into_window
+    return max(1, math.ceil(wait))
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self.buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def _counts(self, key: str, index: int) -> Tuple[int, int]:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return 0, 0
+        bucket_index, current, previous = bucket
+        if bucket_index == index:
+            return previous, current
+        if bucket_index == index - 1:
+            return current, 0
+        return 0, 0
+
+    async def counts(self, key: str, index: int, db=None) -> Tuple[int, int]:
+        return self._counts(key, index)
+
+    async def increment(self, key: str, index: int, window: float, db=None) -> None:
+        previous, current = self._counts(key, index)
+        self.buckets[key] = [index, current + 1, previous]
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+
+    async def clear(self, key: str, db=None) -> None:
+        self.buckets.pop(key, None)
+
+    def reset(self) -> None:
+        self.buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+
+class MongoBackend:
+    """State dibagi antar worker; satu dokumen per key per window."""
+
+    async def counts(self, key: str, index: int, db=None) -> Tuple[int, int]:
+        docs = await db[COLLECTION].find(
+            {"_id": {"$in": [f"{key}|{index - 1}", f"{key}|{index}"]}}).to_list(2)
+        by_id = {doc["_id"]: doc.get("count", 0) for doc in docs}
+        return by_id.get(f"{key}|{index - 1}", 0), by_id.get(f"{key}|{index}", 0)
+
+    async def increment(self, key: str, index: int, window: float, db=None) -> None:
+        # Dokumen dihapus TTL index setelah tidak lagi dipakai sebagai window sebelumnya
+        expires_at = datetime.utcfromtimestamp((index + 2) * window)
+        await db[COLLECTION].update_one(
+            {"_id": f"{key}|{index}"},
+            {"$inc": {"count": 1}, "$set": {"expires_at": expires_at}},
+            upsert=True)
+
+    async def clear(self, key: str, db=None) -> None:
+        await db[COLLECTION].delete_many({"_id": {"$regex": f"^{re.escape(key)}\\|"}})
+
+    async def ensure_indexes(self, db) -> None:
+        await db[COLLECTION].create_index("expires_at", expireAfterSeconds=0)
+
+    def reset(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return 0
+
+
+class SlidingWindowLimiter:
+    def __init__(self, name: str, window: float, limits: dict, backend):
+        self.name = name
+        self.window = window
+        # Batas per scope, mis. {"ip": 20, "username": 10}; 0 = tanpa batas
+        self.limits = limits
+        self.backend = backend
+
+    def _key(self, scope: str, value: str) -> str:
+        return f"{self.name}:{scope}:{value}"
+
+    async def hit(self, identities: Sequence[Tuple[str, str]], db=None,
+                  now: Optional[float] = None) -> Optional[int]:
+        """
+        Catat satu percobaan untuk setiap identitas ``(scope, value)``.
+        Kembalikan ``Retry-After`` (detik) jika salah satu melewati batas; percobaan
+        yang ditolak tidak ikut dihitung.
+        """
+        now = time.time() if now is None else now
+        index = int(now // self.window)
+        keys = []
+        for scope, value in identities:
+            limit = self.limits.get(scope, 0)
+            if not limit or not value:
+                continue
+            key = self._key(scope, value)
+            previous, current = await self.backend.counts(key, index, db)
+            if estimate(previous, current, now, self.window) >= limit:
+                rate_limit_requests_total.inc(limiter=self.name, result=f"limited_{scope}")
+                return retry_after(previous, current, now, self.window, limit)
+            keys.append(key)
+
+        for key in keys:
+            await self.backend.increment(key, index, self.window, db)
+        rate_limit_requests_total.inc(limiter=self.name, result="allowed")
+        rate_limit_tracked_keys.set(len(self.backend), limiter=self.name)
+        return None
+
+    async def clear(self, scope: str, value: str, db=None) -> None:
+        await self.backend.clear(self._key(scope, value), db)
+
+    def reset(self) -> None:
+        self.backend.reset()
+
+
+def _backend(name: str):
+    if name == "mongodb":
+        return MongoBackend()
+    return MemoryBackend(settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+
+login_rate_limiter = SlidingWindowLimiter(
+    "login",
+    settings.LOGIN_RATE_LIMIT_WINDOW,
+    {"ip": settings.LOGIN_RATE_LIMIT_PER_IP, "username": settings.LOGIN_RATE_LIMIT_PER_USERNAME},
+    _backend(settings.LOGIN_RATE_LIMIT_BACKEND),
+)
+
+
+async def ensure_rate_limit_indexes():
+    """Buat TTL index untuk backend mongodb (dipanggil saat startup)."""
+    from app.core import database
+
+    backend = login_rate_limiter.backend
+    if isinstance(backend, MongoBackend) and database.db is not None:
+        await backend.ensure_indexes(database.db)
+
+
+def client_ip(request) -> str:
+    if settings.LOGIN_RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else ""
@@ -0,0 +1,226 @@
+"""
+Daftar pencabutan token (revocation list) berbasis ``jti``.
+
+Token yang dicabut disimpan di koleksi ``revoked_tokens`` dengan TTL index
+pada ``expires_at``, sehingga entri hilang sendiri setelah tokennya expired.
+Setiap worker menyimpan bloom filter di memori yang disinkronkan secara
+incremental (berdasarkan ``revoked_at``, dengan jendela REVOCATION_SYNC_LOOKBACK
+karena jam tiap worker berbeda dan commit bisa terlambat), jadi pengecekan untuk token yang
+tidak dicabut (kasus umum) cukup beberapa operasi bit tanpa akses database.
+Hanya jika filter menjawab "mungkin dicabut" barulah database dicek untuk
+menyingkirkan false positive. Filter dibangun ulang dari entri yang masih hidup
+setiap ACCESS_TOKEN_EXPIRE_MINUTES (dan saat penuh), sehingga entri yang sudah
+expired tidak terus memicu query database.
+
+Dua jenis entri:
+- ``jti:<jti>``: satu token (logout)
+- ``user:<user_id>``: semua token user dengan claim ``tv`` lebih kecil dari
+  ``token_version`` terbaru (cabut semua sesi / user dinonaktifkan)
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "revoked_tokens"
+
+revocation_checks_total = registry.counter(
+    "revocation_checks_total", "Hasil pengecekan token terhadap revocation list",
+    ("result",))
+revocation_filter_entries = registry.gauge(
+    "revocation_filter_entries", "Jumlah entri di bloom filter revocation", multiprocess_mode="max")
+
+
+class BloomFilter:
+    """Bloom filter sederhana di atas ``bytearray`` (double hashing blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def _epoch(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp() if value.tzinfo else (value - datetime(1970, 1, 1)).total_seconds()
+    return float(value or 0)
+
+
+class RevocationList:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.db = None
+        self.reset()
+
+    def reset(self) -> None:
+        self.filter = BloomFilter(self.capacity, self.error_rate)
+        self.last_revoked_at: Optional[datetime] = None
+        # _id -> revoked_at untuk entri di jendela lookback, agar yang dibaca ulang tidak ditambah lagi
+        self._recent: Dict[str, datetime] = {}
+        self.rebuilt_at = time.monotonic()
+
+    def _add(self, key: str) -> None:
+        self.filter.add(key)
+        revocation_filter_entries.set(self.filter.count)
+
+    async def ensure_indexes(self, db) -> None:
+        collection = db[COLLECTION]
+        await collection.create_index("expires_at", expireAfterSeconds=0)
+        await collection.create_index("revoked_at")
+
+    def _since_watermark(self) -> dict:
+        if self.last_revoked_at is None:
+            return {}
+        # revoked_at berasal dari jam worker yang menulis: entri yang commit terlambat
+        # bisa berada sedikit di bawah watermark, jadi jendela lookback dibaca ulang
+        lookback = timedelta(seconds=settings.REVOCATION_SYNC_LOOKBACK)
+        return {"revoked_at": {"$gte": self.last_revoked_at - lookback}}
+
+    async def _load(self, db, query: dict) -> int:
+        cursor = db[COLLECTION].find(query, {"_id": 1, "revoked_at": 1}).sort("revoked_at", 1)
+        added = 0
+        async for entry in cursor:
+            revoked_at = entry["revoked_at"]
+            if self.last_revoked_at is None or revoked_at > self.last_revoked_at:
+                self.last_revoked_at = revoked_at
+            if entry["_id"] in self._recent:
+                self._recent[entry["_id"]] = revoked_at
+                continue
+            self._recent[entry["_id"]] = revoked_at
+            self._add(entry["_id"])
+            added += 1
+        if self.last_revoked_at is not None:
+            horizon = self.last_revoked_at - timedelta(seconds=settings.REVOCATION_SYNC_LOOKBACK)
+            self._recent = {key: at for key, at in self._recent.items() if at >= horizon}
+        return added
+
+    async def sync(self, db=None) -> int:
+        """Tambahkan entri yang dicabut sejak sinkronisasi terakhir ke filter."""
+        db = db if db is not None else self.db
+        if db is None:
+            return 0
+        self.db = db
+        added = await self._load(db, self._since_watermark())
+        if self.filter.count > self.capacity:
+            # Filter terlalu penuh (false positive naik): perbesar lalu bangun ulang
+            self.capacity *= 2
+            await self.rebuild(db)
+        elif time.monotonic() - self.rebuilt_at >= settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60:
+            # Entri yang sudah expired (mis. user:<id> setelah dinonaktifkan) hanya keluar
+            # dari filter saat dibangun ulang; tanpa ini setiap request user tersebut
+            # tetap mengecek database di semua worker
+            await self.rebuild(db)
+        return added
+
+    async def rebuild(self, db) -> None:
+        """Bangun filter baru dari entri yang masih hidup lalu ganti filter lama sekaligus."""
+        logger.info(f"Membangun ulang bloom filter revocation (kapasitas {self.capacity})")
+        fresh = RevocationList(self.capacity, self.error_rate)
+        await fresh._load(db, {"expires_at": {"$gt": datetime.utcnow()}})
+        # Filter lama tetap dipakai selama filter baru dibaca, jadi tidak ada jeda tanpa filter
+        self.filter, self.last_revoked_at, self._recent = fresh.filter, fresh.last_revoked_at, fresh._recent
+        self.rebuilt_at = time.monotonic()
+        # Pencabutan oleh worker ini selama rebuild hanya masuk ke filter lama
+        await self._load(db, self._since_watermark())
+        revocation_filter_entries.set(self.filter.count)
+
+    async def _store(self, db, key: str, expires_at: datetime, **fields) -> None:
+        now = datetime.utcnow()
+        await db[COLLECTION].update_one(
+            {"_id": key},
+            {"$set": {"revoked_at": now, "expires_at": expires_at, **fields}},
+            upsert=True)
+        # Worker ini langsung tahu; worker lain menyusul saat sync berikutnya
+        self.db = db
+        self._add(key)
+
+    async def revoke_token(self, db, jti: str, exp) -> None:
+        """Cabut satu token sampai waktu ``exp``-nya."""
+        expires_at = datetime.utcfromtimestamp(_epoch(exp))
+        await self._store(db, f"jti:{jti}", expires_at)
+
+    async def revoke_user(self, db, user_id: str, token_version: int) -> None:
+        """Cabut semua access token user yang terbit sebelum ``token_version`` dinaikkan."""
+        lifetime = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        await self._store(db, f"user:{user_id}", datetime.utcnow() + lifetime, token_version=token_version)
+
+    async def is_revoked(self, payload: dict, db=None) -> bool:
+        """Cek payload token; database hanya disentuh jika bloom filter menjawab positif."""
+        jti_key = f"jti:{payload.get('jti')}"
+        user_key = f"user:{payload.get('user_id')}"
+        candidates = [key for key in (jti_key, user_key) if key in self.filter]
+        if not candidates:
+            revocation_checks_total.inc(result="miss")
+            return False
+
+        db = db if db is not None else self.db
+        if db is None:
+            revocation_checks_total.inc(result="revoked")
+            return True
+        entries = await db[COLLECTION].find({"_id": {"$in": candidates}}).to_list(None)
+        for entry in entries:
+            if entry["_id"] == jti_key:
+                revocation_checks_total.inc(result="revoked")
+                return True
+            if payload.get("tv", 0) < entry.get("token_version", 0):
+                revocation_checks_total.inc(result="revoked")
+                return True
+        revocation_checks_total.inc(result="false_positive")
+        return False
+
+
+revocation_list = RevocationList(
+    settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_ERROR_RATE)
+
+_sync_tasks: List[asyncio.Task] = []
+
+
+async def _sync_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await revocation_list.sync()
+        except Exception as e:
+            logger.warning(f"Gagal sinkronisasi revocation list: {str(e)}")
+
+
+async def start_revocation_sync():
+    """Buat index, muat revocation list dan jalankan sinkronisasi berkala (startup)."""
+    from app.core import database
+
+    if database.db is None:
+        return
+    await revocation_list.ensure_indexes(database.db)
+    await revocation_list.sync(database.db)
+    _sync_tasks.append(asyncio.create_task(_sync_loop(settings.REVOCATION_SYNC_INTERVAL)))
+
+
+async def stop_revocation_sync():
+    while _sync_tasks:
+        _sync_tasks.pop().cancel()
@@ -1,39 +1,153 @@
 from datetime import datetime, timedelta
-from typing import Optional
+import logging
+import time
+import uuid
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.metrics import password_hash_duration_seconds, registry
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__rounds=12
-)
+logger = logging.getLogger(__name__)
+
+password_hash_rounds = registry.gauge(
+    "password_hash_rounds", "Cost bcrypt yang dipakai untuk hash baru", multiprocess_mode="max")
+password_rehash_total = registry.counter(
+    "password_rehash_total", "Jumlah password yang di-hash ulang saat login", ("outcome",))
+
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int = 10, max_rounds: int = 16) -> int:
+    """
+    Cari cost bcrypt tertinggi yang waktu verifikasinya masih <= ``target_ms``
+    di mesin ini. Setiap kenaikan cost menggandakan waktu, jadi cukup mengukur
+    satu cost lalu mengekstrapolasi.
+    """
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=min_rounds)
+    sample = context.hash("calibration-password")
+    start = time.perf_counter()
+    context.verify("calibration-password", sample)
+    base_ms = max((time.perf_counter() - start) * 1000, 0.001)
+
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    logger.info(
+        f"Kalibrasi bcrypt: {base_ms:.1f}ms pada cost {min_rounds}, "
+        f"dipilih cost {rounds} (target {target_ms:.0f}ms)")
+    return rounds
+
+
+def build_password_context(rounds: int) -> CryptContext:
+    # min_rounds = max_rounds = rounds: needs_update() menandai hash dengan cost
+    # berbeda (lebih lemah maupun lebih lambat) untuk di-hash ulang saat login
+    rounds = max(MIN_ROUNDS, min(MAX_ROUNDS, rounds))
+    password_hash_rounds.set(rounds)
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def configured_rounds() -> int:
+    """PASSWORD_HASH_ROUNDS, atau hasil kalibrasi jika diset 0."""
+    if settings.PASSWORD_HASH_ROUNDS > 0:
+        return settings.PASSWORD_HASH_ROUNDS
+    return calibrate_rounds(
+        settings.PASSWORD_HASH_TARGET_MS,
+        settings.PASSWORD_HASH_MIN_ROUNDS,
+        settings.PASSWORD_HASH_MAX_ROUNDS,
+    )
+
+
+password_rounds = configured_rounds()
+pwd_context = build_password_context(password_rounds)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     try:
-        return pwd_context.verify(plain_password, hashed_password)
+        with password_hash_duration_seconds.time(operation="verify"):
+            return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        print(f"Password verification error: {str(e)}")
+        logger.error(f"Password verification error: {str(e)}")
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except Exception:
         return False
 
 
+def verify_password_and_check_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, bool]:
+    """Verifikasi password dan cek apakah hash perlu diperbarui (cost berubah)."""
+    verified = verify_password(plain_password, hashed_password)
+    return verified, verified and password_needs_rehash(hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     try:
-        return pwd_context.hash(password)
+        with password_hash_duration_seconds.time(operation="hash"):
+            return pwd_context.hash(password)
     except Exception as e:
-        print(f"Password hashing error: {str(e)}")
+        logger.error(f"Password hashing error: {str(e)}")
         raise
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+def user_token_claims(user: dict) -> dict:
+    """Claim user yang disematkan ke token supaya auth tidak perlu query database."""
+    return {
+        "sub": user["email"],
+        "user_id": str(user["_id"]),
+        "username": user["username"],
+        "is_active": bool(user.get("is_active", False)),
+        "is_admin": bool(user.get("is_admin", False)),
+        "tv": user.get("token_version", 0),
+    }
+
+
+def _encode_token(data: dict, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.utcnow()
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    to_encode.update({
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": now + expires_delta,
+    })
+    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    return _encode_token(data, ACCESS_TOKEN_TYPE, expires_delta or timedelta(minutes=15))
+
+
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    # Refresh token hanya membawa identitas user; status user dicek ulang saat refresh
+    claims = {key: data[key] for key in ("sub", "user_id", "tv") if key in data}
+    return _encode_token(
+        claims, REFRESH_TOKEN_TYPE,
+        expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> dict:
+    """Decode dan validasi token; ``JWTError`` jika tidak valid atau jenisnya salah."""
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    if payload.get("type") != token_type or not payload.get("sub"):
+        raise JWTError(f"Expected {token_type} token")
+    return payload
+
+
+if __name__ == "__main__":
+    for target in (100, 250, 500, 1000):
+        print(f"target {target}ms -> PASSWORD_HASH_ROUNDS={calibrate_rounds(target)}")
@@ -0,0 +1,143 @@
+"""
+Penyajian file statis (``/static``) dengan header cache yang agresif.
+
+- Nama file ber-hash (nama upload ``YYYYMMDD_HHMMSS_<hex>.jpg`` unik dan tidak
+  pernah ditimpa) dikirim dengan ``Cache-Control: immutable`` dan max-age
+  panjang, sehingga browser/CDN tidak perlu validasi ulang
+- File lain memakai max-age pendek dan dijawab ``304`` untuk request
+  kondisional (``If-None-Match`` / ``If-Modified-Since``)
+- Varian pre-compressed (``file.svg.br`` / ``file.svg.gz``) dipakai jika ada
+  dan diterima client
+- Untuk gambar JPEG/PNG/GIF, varian AVIF/WebP (``foto.jpg.avif``) dipilih
+  sesuai header ``Accept`` dengan ``Vary: Accept``; file asli dikirim jika
+  varian belum dibuat, dengan max-age pendek agar varian dipakai setelah siap
+- Range request ditangani ``FileResponse`` Starlette
+- URL upload datar lama (``/static/uploads/<nama>``) dilayani dari lokasi
+  shard-nya setelah file dipindah ``app.utils.migrate_uploads``
+
+Dengan ``accel_prefix`` (mode X-Accel-Redirect), Python hanya mencari file dan
+mengirim header; isi file dikirim nginx langsung dari disk dengan sendfile.
+"""
+import os
+import re
+from mimetypes import guess_type
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+from app.core.compression import COMPRESSIBLE_TYPES, parse_accept_encoding
+from app.core.metrics import static_image_responses_total
+from app.utils.image_variants import SOURCE_TYPES, VARIANTS, variant_path
+from app.utils.upload_paths import flat_upload_name, sharded_relative
+
+# Nama berakhiran hex minimal 8 karakter sebelum ekstensi, mis. 20250101_120000_ab12cd34.jpg
+HASHED_NAME = re.compile(r"[_.-][0-9a-f]{8,}(?:\.[A-Za-z0-9]+)+$")
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def is_hashed_name(name: str) -> bool:
+    return HASHED_NAME.search(name) is not None
+
+
+class UploadFileResponse(FileResponse):
+    # Chunk lebih besar dari default (64 KB): lebih sedikit read/send per gambar
+    chunk_size = 256 * 1024
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *args, immutable_max_age: int = 31536000, max_age: int = 3600,
+                 accel_prefix: Optional[str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.immutable_max_age = immutable_max_age
+        self.max_age = max_age
+        self.accel_prefix = accel_prefix
+        self.root = os.path.realpath(self.directory) if self.directory else None
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is None:
+            name = flat_upload_name(path.replace(os.sep, "/"))
+            if name is not None:
+                return super().lookup_path(os.path.join(*sharded_relative(name).split("/")))
+        return full_path, stat_result
+
+    def cache_control(self, path: str) -> str:
+        if is_hashed_name(os.path.basename(path)):
+            return f"public, max-age={self.immutable_max_age}, immutable"
+        return f"public, max-age={self.max_age}"
+
+    def precompressed(self, full_path: str, media_type: str,
+                      request_headers: Headers) -> Tuple[Optional[str], Optional[str], Optional[os.stat_result]]:
+        """Cari varian .br/.gz yang diterima client; ``(encoding, path, stat)`` atau ``None``."""
+        if not media_type.startswith(COMPRESSIBLE_TYPES):
+            return None, None, None
+        accepted = parse_accept_encoding(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in PRECOMPRESSED:
+            if accepted.get(encoding, 0) <= 0:
+                continue
+            try:
+                variant_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            return encoding, full_path + suffix, variant_stat
+        return None, None, None
+
+    def accepted_variants(self, request_headers: Headers) -> List[Tuple[str, str]]:
+        """Varian ``(nama, media_type)`` yang diterima client, urut dari q tertinggi."""
+        # Parser Accept-Encoding juga berlaku untuk Accept (daftar nilai dengan q)
+        accepted = parse_accept_encoding(request_headers.get("accept", ""))
+        # Hanya format yang disebut eksplisit: image/* tidak menjamin client bisa decode AVIF
+        return sorted(
+            (variant for variant in VARIANTS if accepted.get(variant[1], 0) > 0),
+            key=lambda variant: -accepted[variant[1]])
+
+    def image_variant(self, full_path: str,
+                      candidates: List[Tuple[str, str]]) -> Tuple[Optional[str], Optional[str], Optional[os.stat_result]]:
+        """Varian pertama dari ``candidates`` yang ada di disk; ``(media_type, path, stat)`` atau ``None``."""
+        for name, variant_type in candidates:
+            path = variant_path(full_path, name)
+            try:
+                return variant_type, path, os.stat(path)
+            except OSError:
+                continue
+        return None, None, None
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        full_path = os.fspath(full_path)
+        request_headers = Headers(scope=scope)
+        media_type = guess_type(full_path)[0] or "text/plain"
+        headers = {"Cache-Control": self.cache_control(full_path)}
+
+        if media_type in SOURCE_TYPES:
+            headers["Vary"] = "Accept"
+            candidates = self.accepted_variants(request_headers)
+            variant_type, variant_file, variant_stat = self.image_variant(full_path, candidates)
+            static_image_responses_total.inc(format=variant_type.split("/")[1] if variant_type else "original")
+            if variant_type is not None:
+                media_type, full_path, stat_result = variant_type, variant_file, variant_stat
+            elif candidates:
+                # Varian belum dibuat: file asli tidak boleh di-cache immutable untuk Accept ini,
+                # agar browser/CDN mengambil varian setelah job selesai
+                headers["Cache-Control"] = f"public, max-age={self.max_age}"
+
+        if self.accel_prefix:
+            relative = os.path.relpath(full_path, self.root).replace(os.sep, "/")
+            headers["X-Accel-Redirect"] = self.accel_prefix + quote(relative)
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+        encoding, compressed_path, compressed_stat = self.precompressed(full_path, media_type, request_headers)
+        if media_type.startswith(COMPRESSIBLE_TYPES):
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            full_path, stat_result = compressed_path, compressed_stat
+
+        response = UploadFileResponse(
+            full_path, status_code=status_code, headers=headers,
+            media_type=media_type, stat_result=stat_result)
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
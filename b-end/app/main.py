@@ -1,17 +1,39 @@
 from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import connect_to_mongo, close_mongo_connection
-from app.api.endpoints import programs, auth, blog, gallery, partners
-import uvicorn
-from fastapi.staticfiles import StaticFiles
+from app.core.database import connect_to_mongo, close_mongo_connection, ensure_user_indexes
+from app.api.endpoints import programs, auth, blog, gallery, partners, uploads, metrics, debug
+from app.core.admission import EXEMPT_PATHS, classify_request, get_limiter, record_shed
+from app.core.deadline import (
+    DEADLINE_HEADER, budget_for, set_deadline, reset_deadline,
+    deadline_expired, is_timeout_error
+)
+from app.models.schemas import ResponseEnvelope
+from app.core.config import settings
+from app.core.memory_profiler import maybe_sample_route
+from app.core.logging_config import setup_logging, request_id_var, request_path_var
+from app.core.revocation import start_revocation_sync, stop_revocation_sync
+from app.core.jobs import start_job_workers, stop_job_workers
+from app.core.rate_limit import ensure_rate_limit_indexes
+from app.core.compression import CompressionMiddleware
+from app.core.static_files import CachedStaticFiles
+from app.utils.upload_session import start_upload_session_cleanup, stop_upload_session_cleanup
+from app.utils.image_variants import shutdown_variant_pool
+from app.core.metrics import (
+    http_requests_total, http_request_duration_seconds,
+    start_metrics_tasks, stop_metrics_tasks
+)
 from decouple import config
+import pymongo
 import uuid
+import time
 import logging
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.responses import JSONResponse
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (JSON, non-blocking lewat QueueHandler/QueueListener)
+setup_logging()
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
 
 # Load environment variables
 DEBUG_MODE = config("DEBUG_MODE", default=False, cast=bool)
@@ -44,6 +66,18 @@ app = FastAPI(
         {
             "name": "partners",
             "description": "Endpoint untuk manajemen mitra/partner"
+        },
+        {
+            "name": "uploads",
+            "description": "Upload bertahap (resumable) untuk file besar"
+        },
+        {
+            "name": "metrics",
+            "description": "Metrik aplikasi dalam format Prometheus"
+        },
+        {
+            "name": "debug",
+            "description": "Endpoint diagnostik khusus admin (profiling CPU dan memori)"
         }
     ]
 )
@@ -57,21 +91,159 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Kompresi gzip/brotli; didaftarkan sebelum middleware lain agar waktu kompresi
+# ikut terukur di metrik dan dibatasi admission control
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache_max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES,
+    )
+
+
+@app.middleware("http")
+async def sample_route_allocations(request: Request, call_next):
+    # Hanya aktif jika tracemalloc sedang berjalan dan MEMORY_ROUTE_SAMPLE_RATE > 0
+    sample = maybe_sample_route(settings.MEMORY_ROUTE_SAMPLE_RATE)
+    response = await call_next(request)
+    if sample is not None:
+        route = request.scope.get("route")
+        sample.finish(getattr(route, "path", "unmatched"))
+    return response
+
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    if not settings.ADMISSION_CONTROL_ENABLED or request.url.path in EXEMPT_PATHS:
+        return await call_next(request)
+
+    route_class = classify_request(
+        request.method, request.url.path, request.headers.get("content-type", ""))
+    limiter = get_limiter(route_class)
+    reason = await limiter.acquire()
+    if reason is not None:
+        # Tolak lebih awal daripada membiarkan request mengantri sampai timeout di client
+        record_shed(route_class, reason)
+        error_response = ResponseEnvelope(
+            status="error",
+            message="Server sedang sibuk, silakan coba lagi nanti"
+        )
+        return JSONResponse(
+            status_code=503,
+            content=error_response.model_dump(),
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER)}
+        )
+    try:
+        return await call_next(request)
+    finally:
+        limiter.release()
+
+
+def deadline_exceeded_response() -> JSONResponse:
+    error_response = ResponseEnvelope(
+        status="error",
+        message="Waktu pemrosesan request habis"
+    )
+    return JSONResponse(status_code=504, content=error_response.model_dump())
+
+
+@app.middleware("http")
+async def apply_request_deadline(request: Request, call_next):
+    if not settings.DEADLINE_ENABLED or request.url.path in EXEMPT_PATHS:
+        return await call_next(request)
+
+    route_class = classify_request(
+        request.method, request.url.path, request.headers.get("content-type", ""))
+    budget = budget_for(route_class, request.headers.get(DEADLINE_HEADER))
+    token = set_deadline(budget)
+    try:
+        # pymongo.timeout mengirim sisa budget sebagai maxTimeMS di setiap operasi
+        with pymongo.timeout(budget):
+            response = await call_next(request)
+        expired = deadline_expired()
+    except Exception as e:
+        if is_timeout_error(e):
+            return deadline_exceeded_response()
+        raise
+    finally:
+        reset_deadline(token)
+
+    # Router yang menangkap semua exception mengubah timeout menjadi 500
+    if response.status_code >= 500 and expired:
+        return deadline_exceeded_response()
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Gunakan template route (mis. /blogs/{blog_id}) agar kardinalitas label tetap kecil
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None)
+        if route_path is None:
+            route_path = "/static" if request.url.path.startswith("/static/") else "unmatched"
+        labels = {"method": request.method, "route": route_path, "status": str(status_code)}
+        http_requests_total.inc(**labels)
+        http_request_duration_seconds.observe(time.perf_counter() - start, **labels)
 
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
+    # Middleware terluar: request id juga tersedia untuk response 503/504 dan di setiap log
     request_id = str(uuid.uuid4())
     request.state.request_id = request_id
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
+    request_id_token = request_id_var.set(request_id)
+    path_token = request_path_var.set(request.url.path)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        route = request.scope.get("route")
+        access_logger.info(
+            "request completed",
+            extra={
+                "method": request.method,
+                "route": getattr(route, "path", None),
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+        )
+        return response
+    finally:
+        request_id_var.reset(request_id_token)
+        request_path_var.reset(path_token)
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Mount static files (Cache-Control immutable untuk nama ber-hash, ETag/304, pre-compressed,
+# atau X-Accel-Redirect ke nginx jika STATIC_ACCEL_REDIRECT aktif)
+app.mount("/static", CachedStaticFiles(
+    directory="static",
+    immutable_max_age=settings.STATIC_IMMUTABLE_MAX_AGE,
+    max_age=settings.STATIC_MAX_AGE,
+    accel_prefix=settings.STATIC_ACCEL_PREFIX if settings.STATIC_ACCEL_REDIRECT else None,
+), name="static")
 
 # Events
 app.add_event_handler("startup", connect_to_mongo)
+# Worker job dihentikan sebelum koneksi ditutup agar job yang berjalan bisa dikembalikan ke antrean
+app.add_event_handler("shutdown", stop_job_workers)
 app.add_event_handler("shutdown", close_mongo_connection)
+app.add_event_handler("startup", start_metrics_tasks)
+app.add_event_handler("shutdown", stop_metrics_tasks)
+app.add_event_handler("startup", start_revocation_sync)
+app.add_event_handler("startup", ensure_rate_limit_indexes)
+app.add_event_handler("startup", ensure_user_indexes)
+app.add_event_handler("startup", start_upload_session_cleanup)
+app.add_event_handler("startup", start_job_workers)
+app.add_event_handler("shutdown", stop_revocation_sync)
+app.add_event_handler("shutdown", stop_upload_session_cleanup)
+app.add_event_handler("shutdown", shutdown_variant_pool)
 
 # Routes
 app.include_router(auth.router, prefix="/auth", tags=["authentication"])
@@ -79,6 +251,9 @@ app.include_router(programs.router, prefix="/programs", tags=["programs"])
 app.include_router(blog.router, prefix="/blogs", tags=["blogs"])
 app.include_router(gallery.router, prefix="/gallery", tags=["gallery"])
 app.include_router(partners.router, prefix="/partners", tags=["partners"])
+app.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"])
 
 # Tambahkan security scheme ke FastAPI
 app.swagger_ui_init_oauth = {
@@ -88,9 +263,6 @@ app.swagger_ui_init_oauth = {
 }
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=DEBUG_MODE
-    )
+    # Gunakan launcher produksi (multi-worker, uvloop/httptools)
+    from app.server import serve
+    serve()
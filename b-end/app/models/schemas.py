@@ -20,6 +20,16 @@ PyObjectId = Annotated[str, BeforeValidator(validate_object_id)]
 # Generic type untuk ResponseEnvelope
 T = TypeVar('T')
 
+# Model untuk metadata gambar upload
+
+
+class ImageMeta(BaseModel):
+    format: str = Field(..., description="Format gambar (jpeg, png, gif, webp)")
+    width: int = Field(..., description="Lebar gambar dalam piksel")
+    height: int = Field(..., description="Tinggi gambar dalam piksel")
+    dominant_color: Optional[str] = Field(None, description="Warna dominan (#rrggbb)")
+    placeholder: Optional[str] = Field(None, description="Placeholder LQIP sebagai data URI")
+
 # Model untuk Program
 
 
@@ -28,6 +38,7 @@ class ProgramBase(BaseModel):
     subtitle: str = Field(..., min_length=3, description="Sub judul program")
     description: str = Field(..., description="Deskripsi lengkap program")
     image: str = Field(..., description="URL gambar program")
+    image_meta: Optional[ImageMeta] = Field(None, description="Metadata gambar program")
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="Waktu pembuatan")
 
@@ -59,6 +70,7 @@ class BlogBase(BaseModel):
     title: str = Field(..., min_length=3, description="Judul blog")
     content: str = Field(..., description="Konten blog")
     image: str = Field(..., description="URL gambar blog")
+    image_meta: Optional[ImageMeta] = Field(None, description="Metadata gambar blog")
     author: str = Field(..., description="Email pembuat blog")
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="Waktu pembuatan")
@@ -91,6 +103,7 @@ class GalleryBase(BaseModel):
     title: Optional[str] = Field(None, description="Judul foto")
     description: Optional[str] = Field(None, description="Deskripsi foto")
     image: str = Field(..., description="URL foto")
+    image_meta: Optional[ImageMeta] = Field(None, description="Metadata foto")
     author: str = Field(..., description="Email pengunggah foto")
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="Waktu unggah")
@@ -125,6 +138,7 @@ class PartnerBase(BaseModel):
                                        description="Deskripsi partner/mitra")
     website_url: HttpUrl = Field(..., description="URL website partner")
     logo: str = Field(..., description="URL logo partner")
+    logo_meta: Optional[ImageMeta] = Field(None, description="Metadata logo partner")
     author: str = Field(..., description="Email penambah partner")
     created_at: datetime = Field(
         default_factory=datetime.utcnow, description="Waktu penambahan")
@@ -151,6 +165,36 @@ class PartnerResponse(PartnerBase):
         json_encoders={ObjectId: str}
     )
 
+# Model untuk Upload Bertahap (resumable)
+
+
+class UploadSessionCreate(BaseModel):
+    filename: Optional[str] = Field(None, max_length=255, description="Nama file asli (informasi saja)")
+    size: int = Field(..., gt=0, description="Ukuran total file dalam byte")
+    sha256: Optional[str] = Field(None, pattern="^[0-9a-fA-F]{64}$",
+                                  description="SHA-256 seluruh file, diverifikasi saat finalisasi")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "filename": "dokumentasi-workshop.mp4",
+                "size": 52428800,
+                "sha256": None
+            }
+        }
+    )
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str = Field(..., description="ID sesi upload")
+    status: str = Field(..., description="Status sesi (open, finalizing, complete, consumed)")
+    size: int = Field(..., description="Ukuran total file dalam byte")
+    offset: int = Field(..., description="Jumlah byte yang sudah diterima (offset chunk berikutnya)")
+    chunk_size: int = Field(..., description="Ukuran chunk maksimal dalam byte")
+    expires_at: datetime = Field(..., description="Waktu sesi kedaluwarsa")
+    url: Optional[str] = Field(None, description="URL file setelah finalisasi")
+    image_meta: Optional[ImageMeta] = Field(None, description="Metadata gambar setelah finalisasi")
+
 # Model untuk Response Envelope
 
 
@@ -178,17 +222,25 @@ class ResponseEnvelope(BaseModel, Generic[T]):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
 
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
                 "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
-                "token_type": "bearer"
+                "token_type": "bearer",
+                "refresh_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9...",
+                "expires_in": 1800
             }
         }
     )
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str = Field(..., description="Refresh token dari login")
+
+
 class TokenData(BaseModel):
     email: Optional[str] = None
     user_id: Optional[str] = None
@@ -0,0 +1,146 @@
+"""
+Entry point produksi untuk menjalankan API.
+
+Menjalankan satu proses master yang melakukan pre-fork ``SERVER_WORKERS``
+worker uvicorn yang berbagi satu socket. Worker yang mati (atau yang
+berhenti sendiri karena memori melewati ``WORKER_MAX_MEMORY_MB``) otomatis
+diganti oleh master.
+
+Penggunaan:
+    python -m app.server
+"""
+import importlib.util
+import logging
+import os
+import shutil
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from app.core.config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+# Cek memori worker setiap N tick (1 tick uvicorn = 0.1 detik)
+MEMORY_CHECK_TICKS = 50
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def resolve_loop() -> str:
+    return "uvloop" if _has_module("uvloop") else "asyncio"
+
+
+def resolve_http() -> str:
+    return "httptools" if _has_module("httptools") else "h11"
+
+
+def current_rss_mb() -> float:
+    """RSS proses saat ini dalam MB (Linux: /proc, lainnya: peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS melaporkan byte, Linux kilobyte
+        return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+class WorkerServer(uvicorn.Server):
+    """Server uvicorn yang berhenti dengan graceful saat memori worker terlalu besar."""
+
+    def __init__(self, config: uvicorn.Config, max_memory_mb: int = 0):
+        super().__init__(config)
+        self.max_memory_mb = max_memory_mb
+
+    async def on_tick(self, counter: int) -> bool:
+        if (
+            self.max_memory_mb
+            and not self.should_exit
+            and counter % MEMORY_CHECK_TICKS == 0
+        ):
+            rss = current_rss_mb()
+            if rss > self.max_memory_mb:
+                logger.warning(
+                    f"Worker [{os.getpid()}] memakai {rss:.0f}MB "
+                    f"(batas {self.max_memory_mb}MB), restart dengan graceful shutdown"
+                )
+                # Berhenti menerima koneksi baru, selesaikan request aktif, lalu
+                # keluar; master akan menjalankan worker pengganti.
+                self.should_exit = True
+        return await super().on_tick(counter)
+
+
+def build_config(**overrides) -> uvicorn.Config:
+    options = dict(
+        app="app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        loop=resolve_loop(),
+        http=resolve_http(),
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY or None,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        access_log=settings.DEBUG_MODE,
+    )
+    options.update(overrides)
+    return uvicorn.Config(**options)
+
+
+def _reset_metrics_dir():
+    # Snapshot worker dari run sebelumnya tidak boleh ikut dijumlahkan
+    directory = settings.METRICS_MULTIPROC_DIR
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def _pin_password_rounds():
+    """
+    Kalibrasi cost bcrypt sekali di master lalu wariskan ke worker lewat
+    environment, supaya semua worker memakai cost yang sama (hasil kalibrasi
+    per worker bisa berbeda dan membuat hash terus di-hash ulang).
+    """
+    if settings.PASSWORD_HASH_ROUNDS > 0:
+        return
+    from app.core.security import password_rounds
+    os.environ["PASSWORD_HASH_ROUNDS"] = str(password_rounds)
+    logger.info(f"Cost bcrypt hasil kalibrasi: {password_rounds}")
+
+
+def serve():
+    if settings.DEBUG_MODE:
+        # Mode development: satu proses dengan auto-reload
+        uvicorn.run("app.main:app", host=settings.SERVER_HOST,
+                    port=settings.SERVER_PORT, reload=True)
+        return
+
+    config = build_config()
+    server = WorkerServer(config, max_memory_mb=settings.WORKER_MAX_MEMORY_MB)
+    _reset_metrics_dir()
+    _pin_password_rounds()
+    logger.info(
+        f"Menjalankan {config.workers} worker (loop={config.loop}, http={config.http}, "
+        f"backlog={config.backlog}, keep-alive={config.timeout_keep_alive}s)"
+    )
+
+    # Satu worker tanpa batas memori cukup dijalankan langsung; dengan batas memori
+    # tetap lewat master, karena worker yang berhenti sendiri harus diganti
+    if config.workers <= 1 and not settings.WORKER_MAX_MEMORY_MB:
+        server.run()
+        return
+
+    sock = config.bind_socket()
+    Multiprocess(config, target=server.run, sockets=[sock]).run()
+
+
+if __name__ == "__main__":
+    serve()
@@ -4,52 +4,96 @@ from httpx import AsyncClient
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.main import app
 from app.core.config import settings
+from app.core.database import get_database
+from app.core.jobs import run_pending_jobs
+from app.core.rate_limit import login_rate_limiter
 import asyncio
 import os
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Backend database untuk test: "memory" (mongomock-motor, tanpa mongod) atau
+# "mongodb" (server sungguhan di MONGODB_URL)
+TEST_MONGO_BACKEND = os.getenv("TEST_MONGO_BACKEND", "memory")
+
+
+def memory_client():
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()
+
+
+def mongodb_client():
+    return AsyncIOMotorClient(settings.MONGODB_URL)
+
+
+# Backend lain bisa ditambahkan di sini dengan nama yang dipakai di TEST_MONGO_BACKEND
+BACKENDS = {
+    "memory": memory_client,
+    "mongodb": mongodb_client,
+}
+
+
+def unique_db_name() -> str:
+    """Nama database unik per test, aman untuk worker pytest-xdist paralel."""
+    worker = os.getenv("PYTEST_XDIST_WORKER", "main")
+    return f"{settings.MONGODB_TEST_DB}_{worker}_{uuid.uuid4().hex[:12]}"
+
+
 @pytest.fixture(scope="session", autouse=True)
 def set_test_db():
     """Set test database."""
     settings.MONGODB_DATABASE = settings.MONGODB_TEST_DB
+    # Tanpa varian AVIF/WebP background: test hanya menghapus file upload aslinya
+    settings.IMAGE_VARIANT_FORMATS = ""
     return settings
 
+
+@pytest_asyncio.fixture(scope="session")
+async def mongo_client():
+    """Client database dipakai bersama oleh seluruh test dalam satu worker."""
+    if TEST_MONGO_BACKEND not in BACKENDS:
+        raise pytest.UsageError(
+            f"TEST_MONGO_BACKEND tidak dikenal: {TEST_MONGO_BACKEND} (pilihan: {', '.join(BACKENDS)})")
+    client = BACKENDS[TEST_MONGO_BACKEND]()
+    pending_drops = set()
+    client.pending_drops = pending_drops
+    logger.info(f"Test database backend: {TEST_MONGO_BACKEND}")
+
+    yield client
+
+    # Tunggu semua drop database di background selesai sebelum client ditutup
+    if pending_drops:
+        await asyncio.gather(*pending_drops, return_exceptions=True)
+    client.close()
+
+
 @pytest_asyncio.fixture(scope="function")
-async def db_client():
-    """Create database client."""
-    client = AsyncIOMotorClient(settings.MONGODB_URL)
-    db = client[settings.MONGODB_TEST_DB]
-    
-    # Bersihkan koleksi sebelum test
-    try:
-        collections = await db.list_collection_names()
-        for collection in collections:
-            await db[collection].delete_many({})
-            logger.info(f"Cleaned collection: {collection}")
-    except Exception as e:
-        logger.error(f"Error cleaning collections before test: {e}")
-    
-    # Set database test ke aplikasi
+async def db_client(mongo_client):
+    """Database baru untuk setiap test, di-drop di background setelah test selesai."""
+    name = unique_db_name()
+    db = mongo_client[name]
+
+    async def override_get_database():
+        return db
+
+    app.dependency_overrides[get_database] = override_get_database
     app.state.db = db
-    
+    login_rate_limiter.reset()
+
     yield db
-    
-    # Bersihkan koleksi setelah test
-    try:
-        collections = await db.list_collection_names()
-        for collection in collections:
-            await db[collection].delete_many({})
-            logger.info(f"Cleaned collection after test: {collection}")
-    except Exception as e:
-        logger.error(f"Error cleaning collections after test: {e}")
-    
-    client.close()
+
+    # Worker job tidak berjalan tanpa startup event: jalankan job tersisa (mis. hapus file upload)
+    await run_pending_jobs(db)
+    app.dependency_overrides.pop(get_database, None)
+    task = asyncio.create_task(mongo_client.drop_database(name))
+    mongo_client.pending_drops.add(task)
+    task.add_done_callback(mongo_client.pending_drops.discard)
+
 
 @pytest_asyncio.fixture(scope="function")
 async def async_client(db_client):
     """Create async client."""
-    app.state.db = db_client
     async with AsyncClient(app=app, base_url="http://test") as client:
-        yield client 
\ No newline at end of file
+        yield client
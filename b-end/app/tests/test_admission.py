@@ -0,0 +1,42 @@
+import pytest
+import asyncio
+import logging
+from app.core.admission import (
+    ConcurrencyLimiter, classify_request, PUBLIC_READ, AUTH, UPLOAD, DEFAULT
+)
+
+logger = logging.getLogger(__name__)
+
+def test_classify_request():
+    """Test pembagian kelas route"""
+    assert classify_request("GET", "/blogs") == PUBLIC_READ
+    assert classify_request("POST", "/auth/login") == AUTH
+    assert classify_request("POST", "/gallery", "multipart/form-data; boundary=x") == UPLOAD
+    assert classify_request("DELETE", "/blogs/123") == DEFAULT
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_after_queue_timeout():
+    """Test request ditolak setelah melewati batas waktu tunggu"""
+    limiter = ConcurrencyLimiter("test", limit=1, queue_timeout=0.05)
+    assert await limiter.acquire() is None
+
+    reason = await limiter.acquire()
+    assert reason == "queue_timeout"
+
+    limiter.release()
+    assert await limiter.acquire() is None
+    limiter.release()
+
+@pytest.mark.asyncio
+async def test_limiter_sheds_when_queue_full():
+    """Test request langsung ditolak saat antrian penuh"""
+    limiter = ConcurrencyLimiter("test", limit=1, queue_timeout=1.0, max_queue=1)
+    assert await limiter.acquire() is None
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert await limiter.acquire() == "queue_full"
+
+    limiter.release()
+    assert await waiter is None
+    limiter.release()
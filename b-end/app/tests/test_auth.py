@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from httpx import AsyncClient
 import logging
@@ -145,4 +146,145 @@ async def test_login_wrong_password(async_client: AsyncClient):
         assert "Incorrect password" in data["message"]
     except Exception as e:
         logger.error(f"Error in test_login_wrong_password: {str(e)}")
-        raise 
\ No newline at end of file
+        raise 
+async def register_and_login(async_client: AsyncClient):
+    user_data = {
+        "email": "token@example.com",
+        "username": "tokenuser",
+        "full_name": "Token User",
+        "password": "testpassword123"
+    }
+    response = await async_client.post("/auth/register", json=user_data)
+    assert response.status_code == 201
+    response = await async_client.post("/auth/login", data={
+        "username": user_data["email"],
+        "password": user_data["password"]
+    })
+    assert response.status_code == 200
+    return response.json()
+
+@pytest.mark.asyncio
+async def test_access_token_is_stateless(async_client: AsyncClient, db_client):
+    """Test access token membawa claim user dan diverifikasi tanpa database"""
+    from app.api.deps import get_current_user
+    tokens = await register_and_login(async_client)
+    assert tokens["refresh_token"]
+    assert tokens["expires_in"] > 0
+
+    # User dihapus dari database: access token tetap valid sampai expired
+    await db_client.users.delete_many({})
+    user = await get_current_user(tokens["access_token"])
+    logger.info(f"User from claims: {user}")
+    assert user["email"] == "token@example.com"
+    assert user["username"] == "tokenuser"
+    assert user["is_active"] is True
+    assert user["is_admin"] is False
+    assert user["jti"]
+
+@pytest.mark.asyncio
+async def test_refresh_token_flow(async_client: AsyncClient, db_client):
+    """Test refresh menghasilkan token baru dan mengecek ulang user di database"""
+    tokens = await register_and_login(async_client)
+
+    response = await async_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    logger.info(f"Refresh response: {response.status_code} - {response.text}")
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["access_token"] != tokens["access_token"]
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+
+    # Refresh token yang sudah dipakai dicabut
+    response = await async_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+    # Access token tidak bisa dipakai sebagai refresh token
+    response = await async_client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+    # User dinonaktifkan: refresh ditolak
+    await db_client.users.update_one({"email": "token@example.com"}, {"$set": {"is_active": False}})
+    response = await async_client.post("/auth/refresh", json={"refresh_token": rotated["refresh_token"]})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_revoke_invalidates_refresh_tokens(async_client: AsyncClient):
+    """Test revoke membuat semua refresh token lama tidak berlaku"""
+    tokens = await register_and_login(async_client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = await async_client.post("/auth/revoke", headers=headers)
+    assert response.status_code == 200
+
+    response = await async_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    logger.info(f"Refresh after revoke: {response.status_code} - {response.text}")
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_concurrent_register_single_winner(async_client: AsyncClient, db_client):
+    """Test registrasi bersamaan dengan email yang sama hanya berhasil satu kali"""
+    def user_data(i):
+        return {
+            "email": "race@example.com",
+            "username": f"raceuser{i}",
+            "full_name": "Race User",
+            "password": "testpassword123"
+        }
+
+    responses = await asyncio.gather(*[
+        async_client.post("/auth/register", json=user_data(i)) for i in range(5)
+    ])
+    statuses = sorted(response.status_code for response in responses)
+    logger.info(f"Concurrent register statuses: {statuses}")
+    assert statuses == [201, 400, 400, 400, 400]
+    for response in responses:
+        if response.status_code == 400:
+            assert response.json()["message"] == "Email already registered"
+    assert await db_client.users.count_documents({"email": "race@example.com"}) == 1
+
+    # Username yang sama dengan email berbeda
+    winner = next(r for r in responses if r.status_code == 201).json()["data"]["username"]
+    response = await async_client.post("/auth/register", json={
+        **user_data(0), "email": "other@example.com", "username": winner
+    })
+    assert response.status_code == 400
+    assert response.json()["message"] == "Username already taken"
+
+@pytest.mark.asyncio
+async def test_user_indexes_shared_and_retried():
+    """Test pemanggil bersamaan menunggu pembuatan index yang sama dan kegagalan dicoba ulang"""
+    from pymongo.errors import OperationFailure
+    from app.core import database as database_module
+    from app.core.database import ensure_user_indexes
+
+    class FakeUsers:
+        def __init__(self):
+            self.calls = 0
+            self.fail = True
+
+        async def create_index(self, field, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            if self.fail:
+                raise OperationFailure("E11000 duplicate key error")
+
+    class FakeDatabase:
+        name = "index_test_database"
+        users = FakeUsers()
+
+    database = FakeDatabase()
+    results = await asyncio.gather(*[ensure_user_indexes(database) for _ in range(5)])
+    assert results == [False] * 5
+    # Satu pembuatan untuk semua pemanggil: dua index (email, username)
+    assert database.users.calls == 2
+
+    # Kegagalan di-cache: registrasi berikutnya tidak membangun index lagi
+    database.users.fail = False
+    assert await ensure_user_indexes(database) is False
+    assert database.users.calls == 2
+
+    database_module._index_failures[database.name] -= database_module.USER_INDEX_RETRY_SECONDS
+    assert await ensure_user_indexes(database) is True
+    assert database.users.calls == 4
+    assert database.name not in database_module._index_failures
+    assert await ensure_user_indexes(database) is True
+    assert database.users.calls == 4
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import pytest
+import logging
+from datetime import datetime
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+from app.utils import backup
+from app.utils.backup import dump, restore, load_manifest
+
+logger = logging.getLogger(__name__)
+
+async def seed(db):
+    await db.blogs.insert_many([
+        {"title": f"Blog {i}", "content": "isi " * 50, "author": "admin@example.com",
+         "created_at": datetime(2025, 1, 1, 12, 0, i % 60)}
+        for i in range(120)
+    ])
+    await db.users.insert_one({"_id": ObjectId(), "email": "admin@example.com", "is_admin": True})
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["bson", "ndjson"])
+async def test_dump_and_restore_roundtrip(tmp_path, fmt):
+    """Test dump lalu restore menghasilkan dokumen yang sama"""
+    source = AsyncMongoMockClient()["backup_source"]
+    await seed(source)
+    out = str(tmp_path / "backup")
+
+    manifest = await dump(source, out, fmt=fmt, batch_size=50)
+    logger.info(f"Manifest: {manifest['collections']}")
+    assert manifest["collections"]["blogs"]["count"] == 120
+    assert load_manifest(out)["format"] == fmt
+
+    target = AsyncMongoMockClient()["backup_target"]
+    results = await restore(target, out, batch_size=25, workers=3)
+    assert results["blogs"]["inserted"] == 120
+    original = await source.blogs.find().sort("_id", 1).to_list(None)
+    restored = await target.blogs.find().sort("_id", 1).to_list(None)
+    assert original == restored
+    assert await target.users.count_documents({}) == 1
+
+@pytest.mark.asyncio
+async def test_uploads_are_incremental(tmp_path):
+    """Test file upload disimpan berdasarkan hash dan tidak disalin ulang"""
+    db = AsyncMongoMockClient()["backup_uploads"]
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    (uploads / "a.jpg").write_bytes(b"gambar-a")
+    (uploads / "b.jpg").write_bytes(b"gambar-a")  # isi sama, satu blob
+    (uploads / "c.png").write_bytes(b"gambar-c")
+    store = str(tmp_path / "blobs")
+
+    first = await dump(db, str(tmp_path / "b1"), upload_dir=str(uploads), blob_store=store)
+    files = first["uploads"]["files"]
+    assert files["a.jpg"]["sha256"] == files["b.jpg"]["sha256"]
+    assert sum(len(f) for _, _, f in os.walk(store)) == 2
+
+    (uploads / "d.gif").write_bytes(b"gambar-d")
+    second = await dump(db, str(tmp_path / "b2"), upload_dir=str(uploads), blob_store=store,
+                        since=str(tmp_path / "b1"))
+    assert len(second["uploads"]["files"]) == 4
+    assert sum(len(f) for _, _, f in os.walk(store)) == 3
+
+    restored = tmp_path / "restored"
+    results = await restore(db, str(tmp_path / "b2"), upload_dir=str(restored))
+    assert results["uploads"]["copied"] == 4
+    assert (restored / "c.png").read_bytes() == b"gambar-c"
+
+@pytest.mark.asyncio
+async def test_restore_fails_when_insert_errors(tmp_path, monkeypatch):
+    """Test restore berhenti dengan error (tidak hang) jika insert_batch gagal"""
+    source = AsyncMongoMockClient()["backup_error_source"]
+    await seed(source)
+    out = str(tmp_path / "backup")
+    await dump(source, out, batch_size=10)
+
+    async def broken_insert(collection, documents):
+        raise ConnectionError("koneksi database terputus")
+
+    monkeypatch.setattr(backup, "insert_batch", broken_insert)
+    target = AsyncMongoMockClient()["backup_error_target"]
+    with pytest.raises(ConnectionError):
+        # 120 dokumen / batch 5 jauh melebihi kapasitas antrian (workers * 2)
+        await asyncio.wait_for(restore(target, out, batch_size=5, workers=2), timeout=10)
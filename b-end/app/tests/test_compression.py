@@ -0,0 +1,110 @@
+import gzip
+import pytest
+from datetime import datetime
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from app.core.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD = {"data": [{"title": f"Blog {i}", "content": "Lorem ipsum dolor sit amet. " * 40} for i in range(10)]}
+
+
+def build_app(**options):
+    async def large(request):
+        return JSONResponse(PAYLOAD)
+
+    async def small(request):
+        return PlainTextResponse("ok")
+
+    async def stream(request):
+        async def chunks():
+            for i in range(5):
+                yield ("baris %d " % i).encode() * 500
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    async def image(request):
+        return PlainTextResponse("x" * 5000, media_type="image/png")
+
+    app = Starlette(routes=[
+        Route("/large", large), Route("/small", small),
+        Route("/stream", stream), Route("/image", image),
+    ])
+    middleware = CompressionMiddleware(app, minimum_size=1024, cache_max_bytes=1024 * 1024, **options)
+    return middleware
+
+
+def test_accept_encoding_negotiation():
+    """Test pemilihan encoding dari header Accept-Encoding"""
+    assert parse_accept_encoding("gzip;q=0.5, br") == {"gzip": 0.5, "br": 1.0}
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0") is None
+    assert choose_encoding("") is None
+
+
+@pytest.mark.asyncio
+async def test_compresses_large_json_and_caches():
+    """Test response JSON besar dikompresi sekali lalu diambil dari cache"""
+    middleware = build_app()
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        headers = {"Accept-Encoding": "gzip"}
+        first = await client.get("/large", headers=headers)
+        second = await client.get("/large", headers=headers)
+
+    logger.info(f"Compressed size: {first.headers['content-length']}")
+    assert first.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["vary"]
+    assert int(first.headers["content-length"]) < len(first.content)
+    assert first.json() == PAYLOAD
+    assert second.json() == PAYLOAD
+    assert len(middleware.cache.entries) == 1
+
+
+@pytest.mark.asyncio
+async def test_skips_small_uncompressible_and_unaccepted():
+    """Test response kecil, non-teks, atau tanpa Accept-Encoding tidak dikompresi"""
+    middleware = build_app()
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+        image = await client.get("/image", headers={"Accept-Encoding": "gzip"})
+        identity = await client.get("/large", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in small.headers
+    assert small.text == "ok"
+    assert "content-encoding" not in image.headers
+    assert "content-encoding" not in identity.headers
+    assert identity.json() == PAYLOAD
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_compressed_per_chunk():
+    """Test response streaming dikompresi tanpa Content-Length"""
+    middleware = build_app(gzip_level=1)
+    async with AsyncClient(app=middleware, base_url="http://test") as client:
+        async with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == b"".join(("baris %d " % i).encode() * 500 for i in range(5))
+    assert not middleware.cache.entries
+
+
+@pytest.mark.asyncio
+async def test_api_list_response_compressed(async_client: AsyncClient, db_client):
+    """Test daftar blog dari API dikirim terkompresi"""
+    await db_client.blogs.insert_many([{
+        "title": f"Blog {i}", "content": "Lorem ipsum dolor sit amet. " * 40,
+        "image": "/static/uploads/blog.jpg", "author": "admin@example.com",
+        "created_at": datetime.utcnow()
+    } for i in range(10)])
+
+    response = await async_client.get("/blogs", params={"limit": 10}, headers={"Accept-Encoding": "gzip"})
+    logger.info(f"Blogs response: {response.status_code} {response.headers}")
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["data"]) == 10
@@ -0,0 +1,37 @@
+import pytest
+import logging
+from pymongo.errors import ExecutionTimeout, OperationFailure
+from app.core.admission import PUBLIC_READ, UPLOAD
+from app.core.config import settings
+from app.core.deadline import (
+    budget_for, set_deadline, reset_deadline, remaining, deadline_expired, is_timeout_error
+)
+
+logger = logging.getLogger(__name__)
+
+def test_budget_per_route_class():
+    """Test budget default per kelas route"""
+    assert budget_for(PUBLIC_READ) == settings.DEADLINE_PUBLIC_READ_MS / 1000
+    assert budget_for(UPLOAD) == settings.DEADLINE_UPLOAD_MS / 1000
+
+def test_budget_header_override():
+    """Test override budget melalui header dibatasi DEADLINE_MAX_MS"""
+    assert budget_for(PUBLIC_READ, "250") == 0.25
+    assert budget_for(PUBLIC_READ, str(settings.DEADLINE_MAX_MS * 10)) == settings.DEADLINE_MAX_MS / 1000
+    assert budget_for(PUBLIC_READ, "bukan-angka") == settings.DEADLINE_PUBLIC_READ_MS / 1000
+
+def test_deadline_context():
+    """Test deadline tersimpan di context request"""
+    assert remaining() is None
+    token = set_deadline(0)
+    try:
+        assert deadline_expired()
+    finally:
+        reset_deadline(token)
+    assert remaining() is None
+
+def test_timeout_error_detection():
+    """Test deteksi error timeout dari MongoDB"""
+    assert is_timeout_error(ExecutionTimeout("operation exceeded time limit", 50))
+    assert not is_timeout_error(OperationFailure("other error", 2))
+    assert not is_timeout_error(ValueError("bukan error MongoDB"))
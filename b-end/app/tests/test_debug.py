@@ -0,0 +1,70 @@
+import pytest
+from httpx import AsyncClient
+import logging
+from app.main import app
+from app.api.deps import get_current_user
+
+logger = logging.getLogger(__name__)
+
+@pytest.fixture
+def admin_user():
+    """Override user login menjadi admin tanpa akses database"""
+    app.dependency_overrides[get_current_user] = lambda: {
+        "email": "admin@example.com", "is_active": True, "is_admin": True
+    }
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+@pytest.mark.asyncio
+async def test_profile_requires_auth(async_client: AsyncClient):
+    """Test profiler tidak bisa diakses tanpa token"""
+    response = await async_client.get("/debug/profile?seconds=0.1")
+    logger.info(f"Profile without token response: {response.status_code}")
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_profile_requires_admin(async_client: AsyncClient):
+    """Test profiler hanya untuk admin"""
+    app.dependency_overrides[get_current_user] = lambda: {
+        "email": "user@example.com", "is_active": True
+    }
+    try:
+        response = await async_client.get("/debug/profile?seconds=0.1")
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+    assert response.status_code == 403
+
+@pytest.mark.asyncio
+async def test_profile_collapsed_output(async_client: AsyncClient, admin_user):
+    """Test profiler mengembalikan collapsed stack"""
+    response = await async_client.get("/debug/profile?seconds=0.2")
+    logger.info(f"Profile response: {response.status_code}")
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+    lines = response.text.strip().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert ";" in stack
+    assert int(count) > 0
+
+@pytest.mark.asyncio
+async def test_memory_snapshot_flow(async_client: AsyncClient, admin_user):
+    """Test start, diff snapshot dan stop tracemalloc"""
+    response = await async_client.get("/debug/memory/snapshot")
+    assert response.status_code == 409
+
+    response = await async_client.post("/debug/memory/start")
+    assert response.status_code == 200
+    try:
+        leak = [bytearray(1024) for _ in range(100)]
+        response = await async_client.get("/debug/memory/snapshot?group_by=lineno&limit=5")
+        logger.info(f"Memory snapshot response: {response.status_code}")
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["group_by"] == "lineno"
+        assert len(data["top"]) <= 5
+        assert any("test_debug.py" in stat["location"] for stat in data["top"])
+        del leak
+    finally:
+        response = await async_client.post("/debug/memory/stop")
+    assert response.status_code == 200
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+import logging
+from mongomock_motor import AsyncMongoMockClient
+from app.utils import generator
+from app.utils.generator import (
+    Distribution, DocumentFactory, GeneratorConfig, generate, parse_args, parse_counts
+)
+from app.models.schemas import BlogBase, GalleryBase, PartnerBase, ProgramBase
+
+logger = logging.getLogger(__name__)
+
+def test_distribution_parsing():
+    """Test parsing spesifikasi distribusi"""
+    assert Distribution("fixed:120").sample(None) == 120
+    with pytest.raises(ValueError):
+        Distribution("poisson:3")
+    with pytest.raises(ValueError):
+        Distribution("uniform:10")
+
+def test_parse_counts():
+    """Test format jumlah dokumen per koleksi"""
+    assert parse_counts("5") == {"blogs": 5, "gallery": 5, "partners": 5, "programs": 5}
+    assert parse_counts("blogs=10,programs=2") == {"blogs": 10, "programs": 2}
+
+def test_documents_match_schemas():
+    """Test dokumen hasil generator valid terhadap model Pydantic"""
+    config = GeneratorConfig(counts={}, content_length=Distribution("fixed:500"), seed=42)
+    factory = DocumentFactory(config)
+    blog = factory.blog()
+    assert len(blog["content"]) == 500
+    BlogBase(**blog)
+    for _ in range(20):
+        GalleryBase(**factory.gallery())
+    PartnerBase(**factory.partner())
+    ProgramBase(**factory.program())
+
+def test_author_skew():
+    """Test author pertama paling sering muncul dengan distribusi Zipf"""
+    config = GeneratorConfig(counts={}, authors=10, author_skew=1.5, seed=1)
+    factory = DocumentFactory(config)
+    authors = [factory.author() for _ in range(2000)]
+    assert authors.count("author0@example.com") > authors.count("author9@example.com")
+
+@pytest.mark.asyncio
+async def test_generate_batched_insert():
+    """Test generate menulis semua dokumen dalam batch"""
+    db = AsyncMongoMockClient()["generator_test"]
+    config = GeneratorConfig(counts={"blogs": 250, "programs": 40}, authors=3, seed=7)
+    reports = await generate(db, config, batch_size=100, workers=3)
+    logger.info(f"Generator reports: {reports}")
+    assert await db.blogs.count_documents({}) == 250
+    assert await db.programs.count_documents({}) == 40
+    assert await db.users.count_documents({}) == 3
+    blog_report = next(r for r in reports if r.collection == "blogs")
+    assert blog_report.batches == 3
+    assert blog_report.failed == 0
+
+def test_authors_required_for_authored_collections():
+    """Test author minimal 1 jika koleksi dengan field author dibuat"""
+    with pytest.raises(ValueError):
+        GeneratorConfig(counts={"blogs": 10}, authors=0)
+    GeneratorConfig(counts={"programs": 10}, authors=0)
+    with pytest.raises(SystemExit):
+        parse_args(["--count", "blogs=10", "--authors", "0"])
+
+@pytest.mark.asyncio
+async def test_generate_drop_keeps_real_users():
+    """Test --drop hanya menghapus author sintetis, bukan user asli"""
+    db = AsyncMongoMockClient()["generator_drop_test"]
+    await db.users.insert_one({"email": "admin@example.com", "username": "admin"})
+    config = GeneratorConfig(counts={"blogs": 20}, authors=2, seed=3)
+    await generate(db, config, batch_size=10, workers=2)
+    await generate(db, config, batch_size=10, workers=2, drop=True)
+    assert await db.blogs.count_documents({}) == 20
+    assert await db.users.count_documents({}) == 3
+    assert await db.users.find_one({"email": "admin@example.com"}) is not None
+
+@pytest.mark.asyncio
+async def test_generate_fails_when_insert_errors(monkeypatch):
+    """Test kesalahan insert menghentikan generate alih-alih menggantung"""
+    async def broken_insert(collection, documents):
+        raise ConnectionError("koneksi terputus")
+
+    monkeypatch.setattr(generator, "insert_batch", broken_insert)
+    db = AsyncMongoMockClient()["generator_error_test"]
+    config = GeneratorConfig(counts={"programs": 1000}, seed=5)
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(generate(db, config, batch_size=10, workers=2), timeout=10)
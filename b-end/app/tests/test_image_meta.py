@@ -0,0 +1,111 @@
+import io
+import os
+import struct
+import zlib
+import pytest
+from httpx import AsyncClient
+from app.utils.image_meta import ImageInfo, analyze, probe
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+    raw = b"".join(b"\x00" + b"\x10\x80\xf0" * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def jpeg_header(width: int, height: int, app_segment: bytes = b"") -> bytes:
+    """Header JPEG minimal: SOI, segmen tambahan, lalu SOF0 (tanpa data gambar)."""
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app_segment + sof
+
+
+def test_probe_headers():
+    """Test dimensi dibaca dari header PNG, GIF, WebP dan JPEG"""
+    assert probe(io.BytesIO(png_bytes(40, 30))) == ImageInfo("png", 40, 30)
+    gif = b"GIF89a" + struct.pack("<HH", 320, 200) + b"\x00" * 20
+    assert probe(io.BytesIO(gif)) == ImageInfo("gif", 320, 200)
+    webp = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x0a\x00\x00\x00" + b"\x00" * 4 \
+        + (799).to_bytes(3, "little") + (599).to_bytes(3, "little")
+    assert probe(io.BytesIO(webp)) == ImageInfo("webp", 800, 600)
+    assert probe(io.BytesIO(b"bukan gambar sama sekali")) is None
+
+
+def test_probe_jpeg_skips_large_segments():
+    """Test segmen besar (ICC/EXIF) dilewati dan orientasi EXIF diperhitungkan"""
+    icc = b"\xff\xe2" + struct.pack(">H", 60002) + b"\x00" * 60000
+    assert probe(io.BytesIO(jpeg_header(1200, 800, icc))) == ImageInfo("jpeg", 1200, 800)
+
+    # EXIF little-endian dengan satu entri: Orientation = 6 (diputar 90 derajat)
+    tiff = b"II*\x00" + struct.pack("<I", 8) + struct.pack("<H", 1) \
+        + struct.pack("<HHIHH", 0x0112, 3, 1, 6, 0) + struct.pack("<I", 0)
+    exif = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+    assert probe(io.BytesIO(jpeg_header(1200, 800, app1))) == ImageInfo("jpeg", 800, 1200)
+
+
+def test_analyze_placeholder_and_color(tmp_path):
+    """Test placeholder LQIP dan warna dominan (membutuhkan Pillow)"""
+    Image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "foto.jpg"
+    img = Image.new("RGB", (640, 480), (200, 30, 30))
+    img.paste((20, 20, 200), (0, 0, 100, 100))
+    img.save(path, "JPEG", quality=90)
+
+    meta = analyze(str(path), placeholder_size=16)
+    logger.info(f"Meta: {meta}")
+    assert (meta["format"], meta["width"], meta["height"]) == ("jpeg", 640, 480)
+    assert meta["placeholder"].startswith("data:image/jpeg;base64,")
+    assert len(meta["placeholder"]) < 2000
+    r, g, b = (int(meta["dominant_color"][i:i + 2], 16) for i in (1, 3, 5))
+    assert r > 150 and g < 80 and b < 80
+
+
+def test_analyze_skips_decode_above_pixel_limit(tmp_path, monkeypatch):
+    """Test gambar di atas IMAGE_MAX_PIXELS tidak di-decode, dimensi tetap dari header"""
+    Image = pytest.importorskip("PIL.Image")
+    from app.core.config import settings
+    from app.utils import image_meta
+    path = tmp_path / "besar.png"
+    Image.new("RGB", (400, 300), (0, 0, 0)).save(path, "PNG")
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 100_000)
+
+    def no_decode(*args):
+        raise AssertionError("gambar tidak boleh di-decode")
+
+    monkeypatch.setattr(image_meta, "_placeholder_and_color", no_decode)
+    meta = analyze(str(path))
+    assert (meta["format"], meta["width"], meta["height"]) == ("png", 400, 300)
+    assert meta["placeholder"] is None and meta["dominant_color"] is None
+
+
+@pytest.mark.asyncio
+async def test_gallery_upload_stores_image_meta(async_client: AsyncClient, db_client):
+    """Test upload galeri menyimpan image_meta"""
+    await async_client.post("/auth/register", json={
+        "email": "meta@example.com", "username": "metauser",
+        "full_name": "Meta User", "password": "testpassword123"
+    })
+    response = await async_client.post("/auth/login", data={
+        "username": "metauser", "password": "testpassword123"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await async_client.post(
+        "/gallery", headers=headers, data={"title": "Foto", "description": "Dokumentasi"},
+        files={"image": ("foto.png", png_bytes(48, 24), "image/png")})
+    logger.info(f"Create gallery response: {response.status_code} - {response.text}")
+    assert response.status_code == 201
+    data = response.json()["data"]
+    try:
+        assert data["image_meta"]["format"] == "png"
+        assert (data["image_meta"]["width"], data["image_meta"]["height"]) == (48, 24)
+        stored = await db_client.gallery.find_one({})
+        assert stored["image_meta"]["width"] == 48
+    finally:
+        os.remove(data["image"].lstrip("/"))
@@ -0,0 +1,138 @@
+import io
+import os
+import struct
+import zlib
+import pytest
+from httpx import AsyncClient
+from app.utils.image_meta import exif_orientation
+from app.utils.image_stream import (
+    EXIF_HEADER, JpegMetadataStripper, PngMetadataStripper, minimal_tiff, sniff_format
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+XMP = b"http://ns.adobe.com/xap/1.0/\x00" + b"<x:xmpmeta>" + b" " * 5000 + b"</x:xmpmeta>"
+
+
+def segment(marker: int, payload: bytes) -> bytes:
+    return bytes([0xFF, marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    body = kind + data
+    return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+
+def strip(stripper, data: bytes, chunk_size: int = 7) -> bytes:
+    """Umpankan data dalam potongan kecil agar batas segmen jatuh di tengah chunk."""
+    out = b"".join(stripper.feed(data[i:i + chunk_size]) for i in range(0, len(data), chunk_size))
+    return out + stripper.finish()
+
+
+def test_sniff_format():
+    """Test format dideteksi dari magic bytes"""
+    assert sniff_format(b"\xff\xd8\xff\xe0\x00\x10JF") == "jpeg"
+    assert sniff_format(b"\x89PNG\r\n\x1a\n") == "png"
+    assert sniff_format(b"GIF89a\x01\x00") == "gif"
+    assert sniff_format(b"\x00\x00\x00\x20ftypisom") == "mp4"
+    assert sniff_format(b"\x1a\x45\xdf\xa3\x01\x00\x00\x00") == "webm"
+    assert sniff_format(b"<html><bo") is None
+    assert sniff_format(b"") is None
+
+
+def test_jpeg_strips_exif_and_xmp():
+    """Test segmen EXIF dan XMP JPEG dibuang, segmen lain dan data gambar utuh"""
+    exif = EXIF_HEADER + minimal_tiff(1) + b"\x00" * 20000
+    app0 = segment(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+    icc = segment(0xE2, b"ICC_PROFILE\x00" + b"\x01" * 3000)
+    scan = segment(0xDA, b"\x01\x01\x00\x00\x3f\x00") + b"\x12\xff\x00\x34" * 1000 + b"\xff\xd9"
+    original = b"\xff\xd8" + app0 + segment(0xE1, exif) + segment(0xE1, XMP) + icc + scan
+
+    stripper = JpegMetadataStripper()
+    result = strip(stripper, original)
+    assert result == b"\xff\xd8" + app0 + icc + scan
+    assert stripper.stripped == len(original) - len(result)
+
+
+def test_jpeg_keeps_orientation():
+    """Test orientasi selain normal dipertahankan dalam EXIF minimal"""
+    exif = EXIF_HEADER + minimal_tiff(6) + b"\x00" * 4000
+    scan = segment(0xDA, b"\x01\x01\x00\x00\x3f\x00") + b"\x55" * 100 + b"\xff\xd9"
+    result = strip(JpegMetadataStripper(), b"\xff\xd8" + segment(0xE1, exif) + scan)
+
+    kept = result[2:-len(scan)]
+    assert len(kept) < 100
+    assert exif_orientation(kept[4:]) == 6
+    assert result.endswith(scan)
+
+
+def test_jpeg_decodes_after_strip():
+    """Test JPEG hasil strip tetap bisa di-decode dengan piksel yang sama (membutuhkan Pillow)"""
+    Image = pytest.importorskip("PIL.Image")
+    img = Image.new("RGB", (64, 48), (10, 120, 200))
+    exif = img.getexif()
+    exif[0x010F] = "Kamera Ponsel"
+    exif[0x0112] = 3
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", exif=exif.tobytes(), quality=90)
+    original = buffer.getvalue()
+
+    result = strip(JpegMetadataStripper(), original, chunk_size=1000)
+    stripped_img = Image.open(io.BytesIO(result))
+    assert stripped_img.getexif().get(0x010F) is None
+    assert stripped_img.getexif().get(0x0112) == 3
+    assert stripped_img.tobytes() == Image.open(io.BytesIO(original)).tobytes()
+
+
+def test_png_strips_exif_and_xmp():
+    """Test chunk eXIf dan XMP PNG dibuang, chunk lain tidak berubah"""
+    header = b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+    text = png_chunk(b"tEXt", b"Title\x00Foto")
+    itxt = png_chunk(b"iTXt", b"Description\x00\x00\x00\x00\x00Keterangan")
+    body = png_chunk(b"IDAT", zlib.compress(b"\x00\x01\x02\x03")) + png_chunk(b"IEND", b"")
+    xmp = png_chunk(b"iTXt", b"XML:com.adobe.xmp\x00\x00\x00\x00\x00" + b"<x/>" * 500)
+    exif = png_chunk(b"eXIf", minimal_tiff(1) + b"\x00" * 1000)
+    original = header + exif + text + xmp + itxt + body
+
+    stripper = PngMetadataStripper()
+    result = strip(stripper, original)
+    assert result == header + text + itxt + body
+    assert stripper.stripped == len(exif) + len(xmp)
+
+
+def test_invalid_structure_raises():
+    """Test struktur segmen rusak menghasilkan ValueError"""
+    with pytest.raises(ValueError):
+        strip(JpegMetadataStripper(), b"\xff\xd8\x00\x00\x00\x00")
+
+
+@pytest.mark.asyncio
+async def test_upload_sniffs_content(async_client: AsyncClient):
+    """Test upload ditolak berdasarkan isi file, bukan content_type"""
+    await async_client.post("/auth/register", json={
+        "email": "sniff@example.com", "username": "sniffuser",
+        "full_name": "Sniff User", "password": "testpassword123"
+    })
+    response = await async_client.post("/auth/login", data={
+        "username": "sniffuser", "password": "testpassword123"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    form = {"name": "Partner Sniff", "description": "Mitra untuk test sniffing",
+            "website_url": "https://example.com"}
+
+    response = await async_client.post(
+        "/partners", headers=headers, data=form,
+        files={"logo": ("logo.png", b"<html><script>alert(1)</script></html>", "image/png")})
+    logger.info(f"Fake image response: {response.status_code} - {response.text}")
+    assert response.status_code == 400
+
+    # Gambar asli dengan content_type/ekstensi yang salah tetap diterima, ekstensi dari isi file
+    gif = b"GIF89a\x01\x00\x01\x00\x00\x00\x00;"
+    response = await async_client.post(
+        "/partners", headers=headers, data=form,
+        files={"logo": ("logo.txt", gif, "application/octet-stream")})
+    assert response.status_code == 201
+    logo = response.json()["data"]["logo"]
+    assert logo.endswith(".gif")
+    os.remove(logo.lstrip("/"))
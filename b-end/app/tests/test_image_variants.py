@@ -0,0 +1,133 @@
+import os
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from app.core.static_files import CachedStaticFiles
+from app.utils.image_variants import (
+    create_variants, enabled_formats, remove_variants, shutdown_variant_pool, transcode
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASHED = "20250101_120000_ab12cd34.jpg"
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    (uploads / HASHED).write_bytes(b"\xff\xd8" + b"\x00" * 4000)
+    (uploads / f"{HASHED}.webp").write_bytes(b"RIFF\x00\x00\x00\x00WEBP" + b"\x00" * 1000)
+    (uploads / f"{HASHED}.avif").write_bytes(b"\x00\x00\x00\x1cftypavif" + b"\x00" * 500)
+    return tmp_path
+
+
+def client_for(directory, **options):
+    app = Starlette(routes=[Mount("/static", CachedStaticFiles(directory=directory, **options))])
+    return AsyncClient(app=app, base_url="http://test")
+
+
+def photo_jpeg(path):
+    Image = pytest.importorskip("PIL.Image")
+    img = Image.new("RGB", (320, 240))
+    img.putdata([(x % 256, y % 256, (x * y) % 256) for y in range(240) for x in range(320)])
+    img.save(path, "JPEG", quality=95)
+
+
+@pytest.mark.asyncio
+async def test_accept_negotiation(static_dir):
+    """Test varian dipilih sesuai Accept dengan Vary: Accept"""
+    url = f"/static/uploads/{HASHED}"
+    async with client_for(static_dir) as client:
+        response = await client.get(url, headers={"Accept": "image/avif,image/webp,image/*,*/*;q=0.8"})
+        assert response.headers["content-type"] == "image/avif"
+        assert response.headers["vary"] == "Accept"
+        assert "immutable" in response.headers["cache-control"]
+        assert len(response.content) == (static_dir / "uploads" / f"{HASHED}.avif").stat().st_size
+
+        # ETag per varian: 304 hanya untuk representasi yang sama
+        etag = response.headers["etag"]
+        response = await client.get(url, headers={"Accept": "image/avif", "If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = await client.get(url, headers={"Accept": "image/avif;q=0.5,image/webp"})
+        assert response.headers["content-type"] == "image/webp"
+
+        response = await client.get(url, headers={"Accept": "image/*,*/*"})
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["vary"] == "Accept"
+        # Client tanpa AVIF/WebP selalu menerima file asli: tetap immutable
+        assert "immutable" in response.headers["cache-control"]
+
+
+@pytest.mark.asyncio
+async def test_fallback_when_variant_missing(static_dir):
+    """Test file asli dikirim jika varian belum ada, tanpa immutable agar varian dipakai setelah siap"""
+    remove_variants(str(static_dir / "uploads" / HASHED))
+    async with client_for(static_dir) as client:
+        response = await client.get(f"/static/uploads/{HASHED}", headers={"Accept": "image/avif,image/webp"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/jpeg"
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["cache-control"] == "public, max-age=3600"
+
+
+@pytest.mark.asyncio
+async def test_accel_redirect_to_variant(static_dir):
+    """Test mode X-Accel-Redirect mengarah ke file varian"""
+    async with client_for(static_dir, accel_prefix="/_static_internal/") as client:
+        response = await client.get(f"/static/uploads/{HASHED}", headers={"Accept": "image/webp"})
+    assert response.headers["x-accel-redirect"] == f"/_static_internal/uploads/{HASHED}.webp"
+    assert response.headers["content-type"] == "image/webp"
+
+
+def test_transcode_creates_smaller_variants(tmp_path):
+    """Test varian WebP dibuat lebih kecil dan bisa di-decode (membutuhkan Pillow)"""
+    Image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "foto.jpg"
+    photo_jpeg(path)
+
+    results = transcode(str(path), ["webp"], {"webp": 80})
+    logger.info(f"Transcode: {results}")
+    assert results["webp"][0] == "created"
+    with Image.open(f"{path}.webp") as variant:
+        assert variant.format == "WEBP"
+        assert variant.size == (320, 240)
+    assert not os.path.exists(f"{path}.webp.tmp")
+
+
+@pytest.mark.asyncio
+async def test_create_variants_in_process_pool(tmp_path, monkeypatch):
+    """Test varian dibuat lewat process pool sesuai IMAGE_VARIANT_FORMATS"""
+    pytest.importorskip("PIL.Image")
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "IMAGE_VARIANT_FORMATS", "webp,unknown")
+    assert enabled_formats() == ["webp"]
+
+    path = tmp_path / "foto.jpg"
+    photo_jpeg(path)
+    results = await create_variants(str(path))
+    assert results["webp"][0] == "created"
+    assert os.path.exists(f"{path}.webp")
+    assert await create_variants(str(tmp_path / "catatan.txt")) == {}
+    await shutdown_variant_pool()
+
+
+@pytest.mark.asyncio
+async def test_create_variants_skips_images_above_pixel_limit(tmp_path, monkeypatch):
+    """Test gambar di atas IMAGE_MAX_PIXELS tidak dikirim ke process pool"""
+    pytest.importorskip("PIL.Image")
+    from app.core.config import settings
+    from app.utils import image_variants
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 320 * 240 - 1)
+
+    def no_pool():
+        raise AssertionError("gambar tidak boleh di-decode")
+
+    monkeypatch.setattr(image_variants, "get_pool", no_pool)
+    path = tmp_path / "foto.jpg"
+    photo_jpeg(path)
+    assert await create_variants(str(path), ["webp"]) == {"webp": ("too_large", 0)}
+    assert not os.path.exists(f"{path}.webp")
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import pytest
+from datetime import datetime, timedelta
+from app.core import jobs
+from app.core.config import settings
+from app.core.jobs import (
+    DONE, FAILED, PENDING, backoff_seconds, claim_job, enqueue, job_handler, run_job,
+    run_pending_jobs, sample_queue_depth
+)
+from app.core.metrics import job_queue_depth, jobs_processed_total
+from app.utils.file_handler import DELETE_UPLOAD_JOB, schedule_upload_removal
+from app.utils.upload_paths import new_upload_location
+import logging
+
+logger = logging.getLogger(__name__)
+
+calls = []
+
+
+@job_handler("test_record")
+async def record_job(payload: dict) -> None:
+    calls.append(payload)
+
+
+@job_handler("test_flaky")
+async def flaky_job(payload: dict) -> None:
+    calls.append(payload)
+    if len(calls) < payload["succeed_on"]:
+        raise RuntimeError("gagal sementara")
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_and_process(db_client):
+    """Test job disimpan di koleksi jobs dan diproses worker"""
+    job_id = await enqueue(db_client, "test_record", {"n": 1})
+    job = await db_client.jobs.find_one({"_id": job_id})
+    assert job["status"] == PENDING and job["attempts"] == 0
+    assert calls == []
+
+    assert await run_pending_jobs(db_client) == 1
+    assert calls == [{"n": 1}]
+    job = await db_client.jobs.find_one({"_id": job_id})
+    assert job["status"] == DONE and job["attempts"] == 1
+    assert isinstance(job["finished_at"], datetime)
+    assert await run_pending_jobs(db_client) == 0
+
+    with pytest.raises(ValueError):
+        await enqueue(db_client, "tidak_ada", {})
+
+
+@pytest.mark.asyncio
+async def test_delayed_job_waits(db_client):
+    """Test job dengan delay belum diambil sebelum jatuh tempo"""
+    await enqueue(db_client, "test_record", {"n": 2}, delay=60)
+    assert await claim_job(db_client) is None
+
+
+@pytest.mark.asyncio
+async def test_retry_with_backoff(db_client, monkeypatch):
+    """Test job gagal dicoba ulang dengan backoff lalu ditandai failed"""
+    monkeypatch.setattr(settings, "JOB_BACKOFF_BASE", 2.0)
+    monkeypatch.setattr(settings, "JOB_BACKOFF_MAX", 5.0)
+    assert [backoff_seconds(n) for n in (1, 2, 3, 4)] == [2.0, 4.0, 5.0, 5.0]
+
+    job_id = await enqueue(db_client, "test_flaky", {"succeed_on": 10}, max_attempts=2)
+    before = jobs_processed_total._values.get(("test_flaky", "retry"), 0)
+    assert await run_job(db_client, await claim_job(db_client)) == "retry"
+    job = await db_client.jobs.find_one({"_id": job_id})
+    assert job["status"] == PENDING
+    assert job["last_error"] == "gagal sementara"
+    assert job["run_at"] > datetime.utcnow() + timedelta(seconds=1)
+    assert jobs_processed_total._values[("test_flaky", "retry")] == before + 1
+
+    # Belum jatuh tempo: tidak diambil
+    assert await run_pending_jobs(db_client) == 0
+    await db_client.jobs.update_one({"_id": job_id}, {"$set": {"run_at": datetime.utcnow()}})
+    assert await run_pending_jobs(db_client) == 1
+    job = await db_client.jobs.find_one({"_id": job_id})
+    assert job["status"] == FAILED and job["attempts"] == 2
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(db_client):
+    """Test job milik worker yang mati diambil ulang setelah lease habis"""
+    job_id = await enqueue(db_client, "test_record", {"n": 3})
+    stale = await claim_job(db_client)
+    assert await claim_job(db_client) is None
+
+    await db_client.jobs.update_one(
+        {"_id": job_id}, {"$set": {"locked_until": datetime.utcnow() - timedelta(seconds=1)}})
+    job = await claim_job(db_client)
+    assert job["_id"] == job_id and job["attempts"] == 2
+    assert await run_job(db_client, job) == DONE
+
+    # Worker lama yang ternyata masih hidup tidak menimpa status dengan lease usang
+    await db_client.jobs.update_one({"_id": job_id}, {"$set": {"status": "running"}})
+    assert await run_job(db_client, stale) == "lost"
+    assert (await db_client.jobs.find_one({"_id": job_id}))["lease"] == job["lease"]
+
+
+@job_handler("test_slow")
+async def slow_job(payload: dict) -> None:
+    await asyncio.sleep(payload["seconds"])
+    calls.append(payload)
+
+
+@pytest.mark.asyncio
+async def test_lease_extended_while_running(db_client, monkeypatch):
+    """Test lease diperpanjang selama handler berjalan sehingga job tidak diambil worker lain"""
+    monkeypatch.setattr(settings, "JOB_LEASE_SECONDS", 0.15)
+    job_id = await enqueue(db_client, "test_slow", {"seconds": 0.4})
+    running = asyncio.create_task(run_job(db_client, await claim_job(db_client)))
+    await asyncio.sleep(0.3)
+    # Lease awal (0.15 detik) sudah lewat, tetapi heartbeat memperpanjangnya
+    assert await claim_job(db_client) is None
+    assert await running == DONE
+    job = await db_client.jobs.find_one({"_id": job_id})
+    assert job["status"] == DONE and job["attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_metric(db_client):
+    """Test gauge job_queue_depth mengikuti jumlah job per status"""
+    await enqueue(db_client, "test_record", {"n": 4})
+    await enqueue(db_client, "test_record", {"n": 5})
+    depth = await sample_queue_depth(db_client)
+    assert depth[PENDING] == 2
+    assert job_queue_depth._values[(PENDING,)] == 2
+    await run_pending_jobs(db_client)
+    assert (await sample_queue_depth(db_client))[PENDING] == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_upload_job(db_client, tmp_path, monkeypatch):
+    """Test penghapusan file upload dijadwalkan lalu dijalankan job"""
+    monkeypatch.setattr(settings, "STATIC_DIR", str(tmp_path))
+    path, url = new_upload_location("hapus.jpg")
+    open(path, "wb").close()
+    open(path + ".webp", "wb").close()
+
+    assert await schedule_upload_removal(db_client, "https://cdn.example.com/x.jpg") is None
+    job_id = await schedule_upload_removal(db_client, url)
+    assert (await db_client.jobs.find_one({"_id": job_id}))["kind"] == DELETE_UPLOAD_JOB
+    assert os.path.exists(path)
+
+    await run_pending_jobs(db_client)
+    assert not os.path.exists(path)
+    assert not os.path.exists(path + ".webp")
+
+
+@pytest.mark.asyncio
+async def test_worker_wakes_on_enqueue(db_client, monkeypatch):
+    """Test worker langsung memproses job baru tanpa menunggu interval polling"""
+    monkeypatch.setattr(jobs, "_wakeup", asyncio.Event())
+    worker = asyncio.create_task(jobs._worker_loop(db_client, 60))
+    try:
+        await asyncio.sleep(0.05)
+        await enqueue(db_client, "test_record", {"n": 6})
+        for _ in range(100):
+            if calls:
+                break
+            await asyncio.sleep(0.01)
+        assert calls == [{"n": 6}]
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
@@ -0,0 +1,40 @@
+import json
+import logging
+import queue
+from app.core.logging_config import (
+    JsonFormatter, NonBlockingQueueHandler, RequestContextFilter, SamplingFilter, request_id_var
+)
+
+logger = logging.getLogger(__name__)
+
+def _record(name="app.test", level=logging.INFO, msg="halo"):
+    return logging.LogRecord(name, level, __file__, 1, msg, None, None)
+
+def test_json_formatter_includes_request_context():
+    """Test record JSON membawa request id dari context"""
+    token = request_id_var.set("req-123")
+    try:
+        record = _record()
+        RequestContextFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+    record.duration_ms = 1.5
+
+    payload = json.loads(JsonFormatter().format(record))
+    assert payload["message"] == "halo"
+    assert payload["request_id"] == "req-123"
+    assert payload["duration_ms"] == 1.5
+
+def test_queue_handler_never_blocks_when_full():
+    """Test record dibuang saat antrian penuh"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record(msg="pertama"))
+    handler.handle(_record(msg="kedua"))
+    assert handler.queue.qsize() == 1
+
+def test_sampling_only_applies_to_info_logs():
+    """Test sampling tidak pernah membuang warning"""
+    sampler = SamplingFilter(0.0, ["app.access"])
+    assert not sampler.filter(_record(name="app.access"))
+    assert sampler.filter(_record(name="app.access", level=logging.WARNING))
+    assert sampler.filter(_record(name="app.api"))
@@ -0,0 +1,49 @@
+import pytest
+from httpx import AsyncClient
+import json
+import logging
+from app.core.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(async_client: AsyncClient):
+    """Test endpoint /metrics mengembalikan format Prometheus"""
+    await async_client.get("/metrics")
+
+    response = await async_client.get("/metrics")
+    logger.info(f"Metrics response: {response.status_code}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_requests_total counter" in body
+    assert 'route="/metrics"' in body
+    assert "http_request_duration_seconds_bucket" in body
+    assert "event_loop_lag_seconds" in body
+
+def test_histogram_render():
+    """Test render histogram kumulatif dengan label"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5, route="/a")
+
+    body = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in body
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in body
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in body
+    assert 'latency_seconds_count{route="/a"} 3' in body
+
+def test_multiprocess_aggregation(tmp_path):
+    """Test metrik dari beberapa worker digabung"""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("route",))
+    counter.inc(route="/a")
+
+    # Snapshot worker lain (pid 1 selalu hidup)
+    other = {"pid": 1, "metrics": {"requests_total": {"values": [[["/a"], 4]]}}}
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other))
+
+    body = registry.render(str(tmp_path))
+    assert 'requests_total{route="/a"} 5' in body
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from passlib.context import CryptContext
+from app.core import security
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def rounds_of(hashed: str) -> int:
+    # Format bcrypt: $2b$<cost>$<salt+hash>
+    return int(hashed.split("$")[2])
+
+
+@pytest.fixture
+def low_cost(monkeypatch):
+    """Pakai cost rendah agar test cepat"""
+    monkeypatch.setattr(security, "pwd_context", security.build_password_context(5))
+    return 5
+
+
+def test_calibrate_rounds_within_bounds():
+    """Test kalibrasi tidak keluar dari batas min/max"""
+    assert security.calibrate_rounds(0.0, min_rounds=4, max_rounds=6) == 4
+    assert security.calibrate_rounds(10 ** 9, min_rounds=4, max_rounds=6) == 6
+
+
+def test_needs_rehash_when_cost_differs(low_cost):
+    """Test hash dengan cost lain (lebih rendah maupun lebih tinggi) ditandai untuk di-hash ulang"""
+    current = security.get_password_hash("rahasia123")
+    weaker = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("rahasia123")
+    stronger = CryptContext(schemes=["bcrypt"], bcrypt__rounds=6).hash("rahasia123")
+
+    assert rounds_of(current) == low_cost
+    assert security.verify_password_and_check_rehash("rahasia123", current) == (True, False)
+    assert security.verify_password_and_check_rehash("rahasia123", weaker) == (True, True)
+    assert security.verify_password_and_check_rehash("rahasia123", stronger) == (True, True)
+    # Password salah tidak pernah memicu rehash
+    assert security.verify_password_and_check_rehash("salah", weaker) == (False, False)
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_hash(async_client: AsyncClient, db_client, low_cost):
+    """Test login berhasil meng-upgrade hash dengan cost lama"""
+    await async_client.post("/auth/register", json={
+        "email": "rehash@example.com", "username": "rehashuser",
+        "full_name": "Rehash User", "password": "testpassword123"
+    })
+    outdated = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("testpassword123")
+    await db_client.users.update_one({"username": "rehashuser"}, {"$set": {"password": outdated}})
+
+    # Password salah: hash tidak berubah
+    response = await async_client.post("/auth/login", data={
+        "username": "rehashuser", "password": "wrongpassword"
+    })
+    assert response.status_code == 401
+    user = await db_client.users.find_one({"username": "rehashuser"})
+    assert user["password"] == outdated
+
+    response = await async_client.post("/auth/login", data={
+        "username": "rehashuser", "password": "testpassword123"
+    })
+    logger.info(f"Login response: {response.status_code} - {response.text}")
+    assert response.status_code == 200
+
+    # Rehash berjalan sebagai background task setelah response
+    for _ in range(50):
+        user = await db_client.users.find_one({"username": "rehashuser"})
+        if user["password"] != outdated:
+            break
+        await asyncio.sleep(0.05)
+    assert rounds_of(user["password"]) == low_cost
+    assert security.verify_password("testpassword123", user["password"])
+
+    response = await async_client.post("/auth/login", data={
+        "username": "rehashuser", "password": "testpassword123"
+    })
+    assert response.status_code == 200
@@ -0,0 +1,70 @@
+import pytest
+import logging
+from httpx import AsyncClient
+from mongomock_motor import AsyncMongoMockClient
+from app.core.rate_limit import (
+    MemoryBackend, MongoBackend, SlidingWindowLimiter, login_rate_limiter
+)
+
+logger = logging.getLogger(__name__)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend_name", ["memory", "mongodb"])
+async def test_sliding_window(backend_name):
+    """Test sliding window menolak setelah batas dan pulih seiring waktu"""
+    backend = MemoryBackend() if backend_name == "memory" else MongoBackend()
+    db = AsyncMongoMockClient()["rate_limit_test"]
+    limiter = SlidingWindowLimiter("test", 60, {"ip": 3}, backend)
+    start = 6000.0  # awal window
+
+    for i in range(3):
+        assert await limiter.hit([("ip", "10.0.0.1")], db, now=start + i) is None
+    wait = await limiter.hit([("ip", "10.0.0.1")], db, now=start + 5)
+    logger.info(f"Retry-After: {wait}")
+    assert wait == 55
+    # IP lain tidak terpengaruh
+    assert await limiter.hit([("ip", "10.0.0.2")], db, now=start + 5) is None
+
+    # Tepat di awal window berikutnya hitungan window sebelumnya masih penuh
+    assert await limiter.hit([("ip", "10.0.0.1")], db, now=start + 60) is not None
+    # 10% window berlalu: 3 * 0.9 = 2.7 < 3
+    assert await limiter.hit([("ip", "10.0.0.1")], db, now=start + 66) is None
+    # 3 * (1 - 7/60) + 1 = 3.65 >= 3
+    assert await limiter.hit([("ip", "10.0.0.1")], db, now=start + 67) is not None
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_bounded():
+    """Test backend memory membuang key paling lama saat penuh"""
+    limiter = SlidingWindowLimiter("test", 60, {"ip": 5}, MemoryBackend(max_keys=100))
+    for i in range(250):
+        await limiter.hit([("ip", f"10.0.{i // 256}.{i % 256}")], now=100.0)
+    assert len(limiter.backend) == 100
+
+@pytest.mark.asyncio
+async def test_login_rejected_before_hashing(async_client: AsyncClient, monkeypatch):
+    """Test login ditolak dengan 429 tanpa verifikasi bcrypt"""
+    from app.api.endpoints import auth
+    await async_client.post("/auth/register", json={
+        "email": "limit@example.com", "username": "limituser",
+        "full_name": "Limit User", "password": "testpassword123"
+    })
+    verify_calls = []
+    original_verify = auth.verify_password_and_check_rehash
+
+    def counting_verify(plain, hashed):
+        verify_calls.append(plain)
+        return original_verify(plain, hashed)
+
+    monkeypatch.setattr(auth, "verify_password_and_check_rehash", counting_verify)
+    monkeypatch.setitem(login_rate_limiter.limits, "username", 3)
+
+    statuses = []
+    for _ in range(5):
+        response = await async_client.post("/auth/login", data={
+            "username": " Limit@Example.com ", "password": "wrongpassword"
+        })
+        statuses.append(response.status_code)
+    logger.info(f"Login statuses: {statuses}")
+    assert statuses == [401, 401, 401, 429, 429]
+    assert len(verify_calls) == 3
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,140 @@
+import pytest
+import logging
+from httpx import AsyncClient
+from app.core.config import settings
+from app.core.revocation import BloomFilter, RevocationList, revocation_list
+
+logger = logging.getLogger(__name__)
+
+@pytest.fixture(autouse=True)
+def clean_revocation_list():
+    """Bloom filter global dikosongkan untuk setiap test"""
+    revocation_list.reset()
+    revocation_list.db = None
+    yield
+    revocation_list.reset()
+    revocation_list.db = None
+
+async def login(async_client: AsyncClient, email="revoke@example.com", username="revokeuser"):
+    await async_client.post("/auth/register", json={
+        "email": email, "username": username,
+        "full_name": "Revoke User", "password": "testpassword123"
+    })
+    response = await async_client.post("/auth/login", data={
+        "username": email, "password": "testpassword123"
+    })
+    assert response.status_code == 200
+    return response.json()
+
+def test_bloom_filter_has_no_false_negatives():
+    """Test bloom filter selalu mengenali key yang sudah ditambahkan"""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"jti:{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+    logger.info(f"False positives: {false_positives}/10000")
+    assert false_positives < 300
+
+@pytest.mark.asyncio
+async def test_logout_revokes_tokens(async_client: AsyncClient):
+    """Test access dan refresh token ditolak setelah logout"""
+    tokens = await login(async_client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    response = await async_client.post(
+        "/auth/logout", json={"refresh_token": tokens["refresh_token"]}, headers=headers)
+    logger.info(f"Logout response: {response.status_code} - {response.text}")
+    assert response.status_code == 200
+
+    response = await async_client.post("/auth/logout", headers=headers)
+    assert response.status_code == 401
+    response = await async_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_other_worker_syncs_incrementally(async_client: AsyncClient, db_client):
+    """Test worker lain melihat token yang dicabut setelah sinkronisasi"""
+    tokens = await login(async_client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    await async_client.post("/auth/logout", headers=headers)
+
+    other_worker = RevocationList(settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_ERROR_RATE)
+    from app.core.security import decode_token
+    payload = decode_token(tokens["access_token"])
+    assert not await other_worker.is_revoked(payload)
+    assert await other_worker.sync(db_client) == 1
+    assert await other_worker.is_revoked(payload)
+    # Sinkronisasi berikutnya hanya membaca entri baru
+    assert await other_worker.sync(db_client) == 0
+
+@pytest.mark.asyncio
+async def test_admin_deactivate_revokes_user_tokens(async_client: AsyncClient, db_client):
+    """Test user yang dinonaktifkan admin langsung kehilangan akses"""
+    tokens = await login(async_client)
+    user = await db_client.users.find_one({"email": "revoke@example.com"})
+    user_headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    await login(async_client, "boss@example.com", "bossuser")
+    await db_client.users.update_one({"email": "boss@example.com"}, {"$set": {"is_admin": True}})
+    admin_tokens = (await async_client.post("/auth/login", data={
+        "username": "boss@example.com", "password": "testpassword123"
+    })).json()
+    admin_headers = {"Authorization": f"Bearer {admin_tokens['access_token']}"}
+
+    response = await async_client.post(f"/auth/users/{user['_id']}/deactivate", headers=user_headers)
+    assert response.status_code == 403
+
+    response = await async_client.post(f"/auth/users/{user['_id']}/deactivate", headers=admin_headers)
+    logger.info(f"Deactivate response: {response.status_code} - {response.text}")
+    assert response.status_code == 200
+
+    response = await async_client.post("/auth/revoke", headers=user_headers)
+    assert response.status_code == 401
+    response = await async_client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    # Token admin tidak terpengaruh
+    response = await async_client.post("/auth/revoke", headers=admin_headers)
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_sync_picks_up_late_commits(db_client):
+    """Test entri dengan revoked_at di bawah watermark (jam worker lain/commit terlambat) tetap tersinkron"""
+    from datetime import datetime, timedelta
+    now = datetime.utcnow()
+    expires_at = now + timedelta(minutes=30)
+    other_worker = RevocationList(settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_ERROR_RATE)
+
+    await db_client.revoked_tokens.insert_one({"_id": "jti:b", "revoked_at": now, "expires_at": expires_at})
+    assert await other_worker.sync(db_client) == 1
+
+    # Worker A mengambil revoked_at lebih awal tetapi commit setelah sync di atas
+    late = now - timedelta(seconds=2)
+    await db_client.revoked_tokens.insert_one({"_id": "jti:a", "revoked_at": late, "expires_at": expires_at})
+    assert await other_worker.sync(db_client) == 1
+    assert await other_worker.is_revoked({"jti": "a", "user_id": "x"}, db_client)
+    # Dibaca ulang di jendela lookback tetapi tidak ditambahkan dua kali
+    assert await other_worker.sync(db_client) == 0
+    assert other_worker.filter.count == 2
+
+@pytest.mark.asyncio
+async def test_periodic_rebuild_drops_expired_entries(db_client):
+    """Test filter dibangun ulang berkala sehingga entri expired tidak lagi memicu query database"""
+    from datetime import datetime, timedelta
+    now = datetime.utcnow()
+    worker = RevocationList(settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_ERROR_RATE)
+    await db_client.revoked_tokens.insert_many([
+        # Sudah expired tetapi belum dihapus TTL monitor
+        {"_id": "user:lama", "revoked_at": now - timedelta(hours=2),
+         "expires_at": now - timedelta(hours=1), "token_version": 1},
+        {"_id": "jti:aktif", "revoked_at": now, "expires_at": now + timedelta(minutes=30)},
+    ])
+    await worker.sync(db_client)
+    assert "user:lama" in worker.filter
+
+    worker.rebuilt_at -= settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    await worker.sync(db_client)
+    assert "user:lama" not in worker.filter
+    assert "jti:aktif" in worker.filter
+    assert await worker.is_revoked({"jti": "aktif", "user_id": "x"}, db_client)
@@ -0,0 +1,123 @@
+import gzip
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from app.core.static_files import CachedStaticFiles, is_hashed_name
+from app.utils.nginx_config import render
+import logging
+
+logger = logging.getLogger(__name__)
+
+HASHED = "20250101_120000_ab12cd34.jpg"
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    (uploads / HASHED).write_bytes(b"\xff\xd8" + bytes(range(256)) * 40)
+    (tmp_path / "logo.svg").write_text("<svg>" + "<g/>" * 500 + "</svg>")
+    (tmp_path / "logo.svg.gz").write_bytes(gzip.compress((tmp_path / "logo.svg").read_bytes()))
+    return tmp_path
+
+
+def client_for(directory, **options):
+    app = Starlette(routes=[Mount("/static", CachedStaticFiles(directory=directory, **options))])
+    return AsyncClient(app=app, base_url="http://test")
+
+
+def test_hashed_name_detection():
+    """Test nama upload ber-hash dikenali, nama biasa tidak"""
+    assert is_hashed_name(HASHED)
+    assert is_hashed_name("generated_00000042.jpg")
+    assert not is_hashed_name("logo.svg")
+    assert not is_hashed_name("gallery1.jpg")
+
+
+@pytest.mark.asyncio
+async def test_immutable_cache_and_conditional_requests(static_dir):
+    """Test file ber-hash immutable, ETag dan Last-Modified dijawab 304"""
+    async with client_for(static_dir) as client:
+        response = await client.get(f"/static/uploads/{HASHED}")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        etag = response.headers["etag"]
+
+        response = await client.get(f"/static/uploads/{HASHED}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert "immutable" in response.headers["cache-control"]
+
+        response = await client.get("/static/logo.svg", headers={"Accept-Encoding": "identity"})
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        response = await client.get("/static/logo.svg", headers={
+            "Accept-Encoding": "identity", "If-Modified-Since": response.headers["last-modified"]
+        })
+        assert response.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_range_request(static_dir):
+    """Test Range request menghasilkan 206 dengan potongan file"""
+    data = (static_dir / "uploads" / HASHED).read_bytes()
+    async with client_for(static_dir) as client:
+        response = await client.get(f"/static/uploads/{HASHED}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == f"bytes 10-19/{len(data)}"
+    assert response.content == data[10:20]
+
+
+@pytest.mark.asyncio
+async def test_precompressed_variant(static_dir):
+    """Test varian .gz dipakai jika client menerima gzip"""
+    original = (static_dir / "logo.svg").read_bytes()
+    async with client_for(static_dir) as client:
+        response = await client.get("/static/logo.svg", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("image/svg+xml")
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) == (static_dir / "logo.svg.gz").stat().st_size
+        assert response.content == original
+
+        response = await client.get("/static/logo.svg", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.content == original
+
+
+@pytest.mark.asyncio
+async def test_accel_redirect_mode(static_dir):
+    """Test mode X-Accel-Redirect hanya mengirim header, isi file dari nginx"""
+    async with client_for(static_dir, accel_prefix="/_static_internal/") as client:
+        response = await client.get(f"/static/uploads/{HASHED}")
+        missing = await client.get("/static/uploads/tidak-ada.jpg")
+    assert response.status_code == 200
+    assert response.headers["x-accel-redirect"] == f"/_static_internal/uploads/{HASHED}"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.content == b""
+    assert missing.status_code == 404
+
+
+def test_nginx_config_modes():
+    """Test konfigurasi nginx untuk mode direct dan accel"""
+    direct = render("127.0.0.1:8000", "/srv/static", mode="direct")
+    logger.info(direct)
+    assert "location ^~ /static/" in direct
+    assert "alias /srv/static/;" in direct
+    assert "sendfile on;" in direct
+    assert "immutable" in direct
+    assert "try_files $uri$lsa_avif $uri$lsa_webp $uri @lsa_static_fallback;" in direct
+    assert "location @lsa_static_fallback" in direct
+    assert "map $uri $lsa_negotiable" in direct
+    # File asli yang dikirim karena varian belum ada tidak immutable
+    assert "add_header Cache-Control $lsa_hashed_cache_control;" in direct
+    assert 'default "public, max-age=3600";' in direct
+
+    accel = render("127.0.0.1:8000", "/srv/static", mode="accel", accel_prefix="/_static_internal/")
+    assert "location ^~ /_static_internal/" in accel
+    assert "internal;" in accel
+    # nginx tidak meneruskan Vary dari aplikasi pada X-Accel-Redirect
+    assert 'add_header Vary "Accept-Encoding, Accept";' in accel
+    assert "lsa_avif" not in accel
+    with pytest.raises(ValueError):
+        render("127.0.0.1:8000", "/srv/static", mode="unknown")
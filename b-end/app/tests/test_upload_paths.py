@@ -0,0 +1,104 @@
+import os
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from app.core.config import settings
+from app.core.static_files import CachedStaticFiles
+from app.utils.migrate_uploads import migrate
+from app.utils.upload_paths import (
+    new_upload_location, remove_upload, shard_dir, sharded_relative, url_to_path
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture
+def static_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    (tmp_path / "uploads").mkdir()
+    return tmp_path
+
+
+def test_sharded_location(static_root):
+    """Test upload baru disimpan di uploads/ab/cd/<nama>"""
+    name = "20250101_120000_ab12cd34.jpg"
+    assert len(shard_dir(name)) == 5 and shard_dir(name)[2] == "/"
+    path, url = new_upload_location(name)
+    assert url == f"/static/uploads/{shard_dir(name)}/{name}"
+    assert path == os.path.join(str(static_root), "uploads", *shard_dir(name).split("/"), name)
+    assert os.path.isdir(os.path.dirname(path))
+
+
+def test_url_to_path(static_root):
+    """Test URL dikonversi dengan aman, termasuk URL datar yang sudah dipindah"""
+    # lstrip("/static/") lama membuang huruf awal nama file seperti "s", "t", "a"
+    assert url_to_path("/static/stats.png") == os.path.join(str(static_root), "stats.png")
+    assert url_to_path("/static/../app/main.py") is None
+    assert url_to_path("/static/uploads/../../etc/passwd") is None
+    assert url_to_path("https://example.com/logo.png") is None
+    assert url_to_path(None) is None
+
+    path, _ = new_upload_location("lama.jpg")
+    open(path, "wb").close()
+    assert url_to_path("/static/uploads/lama.jpg") == path
+    assert remove_upload("/static/uploads/lama.jpg")
+    assert not os.path.exists(path)
+    assert not remove_upload("/static/uploads/lama.jpg")
+
+
+@pytest.mark.asyncio
+async def test_static_serves_flat_url_from_shard(static_root):
+    """Test URL datar lama tetap dilayani setelah file dipindah ke shard"""
+    path, url = new_upload_location("20240101_000000_deadbeef.png")
+    with open(path, "wb") as fp:
+        fp.write(b"\x89PNG\r\n\x1a\n" + b"\x00" * 100)
+    app = Starlette(routes=[Mount("/static", CachedStaticFiles(directory=str(static_root)))])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        old = await client.get("/static/uploads/20240101_000000_deadbeef.png")
+        new = await client.get(url)
+        missing = await client.get("/static/uploads/tidak-ada.png")
+    assert old.status_code == 200 and new.status_code == 200
+    assert old.content == new.content
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_migrate_flat_uploads(static_root, db_client):
+    """Test migrasi memindah file beserta varian dan menulis ulang field image/logo"""
+    uploads = static_root / "uploads"
+    for name in ("a.jpg", "b.png", "orphan.gif"):
+        (uploads / name).write_bytes(name.encode())
+    (uploads / "a.jpg.webp").write_bytes(b"webp")
+    (uploads / "upload.jpg.part").write_bytes(b"sedang ditulis")
+
+    await db_client.gallery.insert_many([
+        {"image": "/static/uploads/a.jpg"},
+        {"image": "/static/uploads/hilang.jpg"},
+        {"image": "https://cdn.example.com/x.jpg"},
+    ])
+    await db_client.partners.insert_one({"logo": "/static/uploads/b.png"})
+
+    dry = await migrate(db_client, batch_size=1, dry_run=True)
+    assert dry["moved"] == 3
+    assert (uploads / "a.jpg").exists()
+
+    stats = await migrate(db_client, batch_size=1)
+    logger.info(f"Migrasi: {stats}")
+    assert stats == {"updated": 2, "missing": 1, "moved": 3}
+    moved = url_to_path("/static/" + sharded_relative("a.jpg"))
+    assert open(moved, "rb").read() == b"a.jpg"
+    assert open(moved + ".webp", "rb").read() == b"webp"
+    assert (uploads / "upload.jpg.part").exists()
+    assert not (uploads / "orphan.gif").exists()
+    assert os.path.exists(url_to_path("/static/" + sharded_relative("orphan.gif")))
+
+    gallery = await db_client.gallery.find_one({"image": {"$regex": "a.jpg$"}})
+    assert gallery["image"] == "/static/" + sharded_relative("a.jpg")
+    partner = await db_client.partners.find_one({})
+    assert partner["logo"] == "/static/" + sharded_relative("b.png")
+
+    # Idempotent: dijalankan ulang tidak ada yang berubah
+    assert await migrate(db_client) == {"updated": 0, "missing": 1, "moved": 0}
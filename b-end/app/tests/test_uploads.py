@@ -0,0 +1,263 @@
+import hashlib
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+import pytest
+from httpx import AsyncClient
+from app.core.config import settings
+from app.utils import upload_session
+from app.utils.upload_session import (
+    COLLECTION, UploadSessionError, cleanup_expired_sessions, create_session, finalize_session,
+    part_path, write_chunk
+)
+from app.utils.upload_paths import new_upload_location, remove_upload, url_to_path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+    # Piksel acak agar PNG tidak terkompresi kecil dan terbagi ke beberapa chunk
+    raw = b"".join(b"\x00" + os.urandom(width * 3) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+@pytest.fixture
+def session_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_SESSION_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_MAX_SIZE", 16 * 1024)
+    return tmp_path
+
+
+async def auth_headers(async_client: AsyncClient) -> dict:
+    await async_client.post("/auth/register", json={
+        "email": "uploader@example.com", "username": "uploader",
+        "full_name": "Upload User", "password": "testpassword123"
+    })
+    response = await async_client.post("/auth/login", data={
+        "username": "uploader", "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def send_chunk(async_client, headers, upload_id, offset, data, checksum=None):
+    return await async_client.put(
+        f"/uploads/{upload_id}", params={"offset": offset}, content=data,
+        headers={**headers, "X-Chunk-SHA256": checksum or hashlib.sha256(data).hexdigest(),
+                 "Content-Type": "application/octet-stream"})
+
+
+@pytest.mark.asyncio
+async def test_chunked_upload_to_gallery(async_client: AsyncClient, session_dir):
+    """Test upload bertahap lalu dipakai endpoint galeri lewat upload_id"""
+    headers = await auth_headers(async_client)
+    data = png_bytes(120, 100)
+    assert len(data) > 2 * settings.UPLOAD_CHUNK_MAX_SIZE
+
+    response = await async_client.post("/uploads", headers=headers, json={
+        "filename": "foto.png", "size": len(data), "sha256": hashlib.sha256(data).hexdigest()})
+    logger.info(f"Create session response: {response.status_code} - {response.text}")
+    assert response.status_code == 201
+    upload_id = response.json()["data"]["upload_id"]
+
+    chunk_size = settings.UPLOAD_CHUNK_MAX_SIZE
+    for offset in range(0, len(data), chunk_size):
+        response = await send_chunk(async_client, headers, upload_id, offset, data[offset:offset + chunk_size])
+        assert response.status_code == 200
+        assert response.json()["data"]["offset"] == min(offset + chunk_size, len(data))
+
+    response = await async_client.get(f"/uploads/{upload_id}", headers=headers)
+    assert response.json()["data"]["offset"] == len(data)
+
+    response = await async_client.post(f"/uploads/{upload_id}/complete", headers=headers)
+    logger.info(f"Complete response: {response.status_code} - {response.text}")
+    assert response.status_code == 200
+    result = response.json()["data"]
+    url = result["url"]
+    try:
+        assert result["status"] == "complete"
+        assert (result["image_meta"]["width"], result["image_meta"]["height"]) == (120, 100)
+        assert not os.path.exists(part_path(upload_id))
+
+        response = await async_client.post(
+            "/gallery", headers=headers, data={"title": "Foto Besar", "upload_id": upload_id})
+        assert response.status_code == 201
+        assert response.json()["data"]["image"] == url
+        assert response.json()["data"]["image_meta"]["width"] == 120
+
+        # Satu sesi hanya bisa dipakai satu kali
+        response = await async_client.post(
+            "/gallery", headers=headers, data={"title": "Foto Lagi", "upload_id": upload_id})
+        assert response.status_code >= 400
+    finally:
+        os.remove(url.lstrip("/"))
+
+
+@pytest.mark.asyncio
+async def test_chunk_offset_checksum_and_retry(async_client: AsyncClient, session_dir):
+    """Test offset salah ditolak dengan offset sesi, checksum salah tidak mengubah offset, retry idempoten"""
+    headers = await auth_headers(async_client)
+    data = os.urandom(40000)
+    response = await async_client.post("/uploads", headers=headers, json={"size": len(data)})
+    upload_id = response.json()["data"]["upload_id"]
+    first = data[:16384]
+
+    response = await send_chunk(async_client, headers, upload_id, 16384, data[16384:32768])
+    assert response.status_code == 409
+    assert response.json()["data"]["offset"] == 0
+
+    response = await send_chunk(async_client, headers, upload_id, 0, first, checksum="0" * 64)
+    assert response.status_code == 400
+    assert os.path.getsize(part_path(upload_id)) == 0
+
+    response = await send_chunk(async_client, headers, upload_id, 0, first)
+    assert response.json()["data"]["offset"] == 16384
+    # Response chunk hilang, client mengirim ulang chunk yang sama
+    response = await send_chunk(async_client, headers, upload_id, 0, first)
+    assert response.status_code == 200
+    assert response.json()["data"]["offset"] == 16384
+
+    response = await async_client.post(f"/uploads/{upload_id}/complete", headers=headers)
+    assert response.status_code == 409
+
+    response = await async_client.delete(f"/uploads/{upload_id}", headers=headers)
+    assert response.status_code == 200
+    assert not os.path.exists(part_path(upload_id))
+
+
+@pytest.mark.asyncio
+async def test_finalize_rejects_non_image(async_client: AsyncClient, session_dir):
+    """Test finalisasi menolak file yang bukan gambar/video berdasarkan isi"""
+    headers = await auth_headers(async_client)
+    data = b"<html>" + b"x" * 1000
+    response = await async_client.post("/uploads", headers=headers, json={"size": len(data)})
+    upload_id = response.json()["data"]["upload_id"]
+    await send_chunk(async_client, headers, upload_id, 0, data)
+
+    response = await async_client.post(f"/uploads/{upload_id}/complete", headers=headers)
+    logger.info(f"Complete response: {response.status_code} - {response.text}")
+    assert response.status_code == 400
+    assert not os.path.exists(part_path(upload_id))
+
+
+@pytest.mark.asyncio
+async def test_expired_session_cleanup(async_client: AsyncClient, db_client, session_dir):
+    """Test sesi kedaluwarsa ditolak dan filenya dibersihkan"""
+    headers = await auth_headers(async_client)
+    response = await async_client.post("/uploads", headers=headers, json={"size": 1000})
+    upload_id = response.json()["data"]["upload_id"]
+    await db_client[COLLECTION].update_one(
+        {"_id": upload_id}, {"$set": {"expires_at": datetime.utcnow() - timedelta(minutes=1)}})
+
+    response = await send_chunk(async_client, headers, upload_id, 0, b"\x00" * 100)
+    assert response.status_code == 410
+
+    assert await cleanup_expired_sessions(db_client) == 1
+    assert not os.path.exists(part_path(upload_id))
+    stored = await db_client[COLLECTION].find_one({"_id": upload_id})
+    assert stored["status"] == "expired"
+
+
+@pytest.mark.asyncio
+async def test_chunk_lock_renewed_and_lost(db_client, session_dir, monkeypatch):
+    """Test kunci diperpanjang selama chunk di-stream; jika diambil request lain, offset tidak dimajukan"""
+    monkeypatch.setattr(upload_session, "LOCK_RENEW_SECONDS", 0)
+    monkeypatch.setattr(upload_session, "WRITE_BUFFER_SIZE", 4096)
+    session = await create_session(db_client, "owner@example.com", 32768)
+    upload_id = session["_id"]
+    data = os.urandom(16384)
+
+    async def slow_body(steal: bool):
+        for start in range(0, len(data), 4096):
+            if steal and start == 8192:
+                # Request lain mengklaim sesi setelah kunci dianggap kedaluwarsa
+                await db_client[COLLECTION].update_one({"_id": upload_id}, {"$set": {"lock_id": "lain"}})
+            yield data[start:start + 4096]
+
+    with pytest.raises(UploadSessionError) as exc:
+        await write_chunk(db_client, upload_id, "owner@example.com", 0, slow_body(True))
+    assert exc.value.status_code == 409
+    stored = await db_client[COLLECTION].find_one({"_id": upload_id})
+    assert stored["received"] == 0 and stored["lock_id"] == "lain"
+
+    await db_client[COLLECTION].update_one({"_id": upload_id}, {"$set": {"locked_until": None}})
+    updated = await write_chunk(db_client, upload_id, "owner@example.com", 0, slow_body(False))
+    assert updated["received"] == 16384
+    assert updated["locked_until"] is None
+    with open(part_path(upload_id), "rb") as fp:
+        assert fp.read() == data
+
+
+@pytest.mark.asyncio
+async def test_finalize_error_after_store_reopens_session(db_client, session_dir, monkeypatch):
+    """Test kesalahan setelah file disimpan (mis. enqueue job gagal) tidak meninggalkan file yatim"""
+    data = png_bytes(32, 32)
+    session = await create_session(db_client, "owner@example.com", len(data))
+    upload_id = session["_id"]
+
+    async def body():
+        yield data
+
+    await write_chunk(db_client, upload_id, "owner@example.com", 0, body())
+    stored_urls = []
+
+    async def broken_schedule(db, url):
+        stored_urls.append(url)
+        raise RuntimeError("database tidak tersedia")
+
+    original_schedule = upload_session.schedule_variants
+    monkeypatch.setattr(upload_session, "schedule_variants", broken_schedule)
+    with pytest.raises(RuntimeError):
+        await finalize_session(db_client, upload_id, "owner@example.com")
+    assert not os.path.exists(url_to_path(stored_urls[0]))
+    stored = await db_client[COLLECTION].find_one({"_id": upload_id})
+    assert stored["status"] == "open" and stored["url"] is None
+    assert os.path.exists(part_path(upload_id))
+
+    monkeypatch.setattr(upload_session, "schedule_variants", original_schedule)
+    completed = await finalize_session(db_client, upload_id, "owner@example.com")
+    try:
+        assert completed["status"] == "complete"
+        assert os.path.exists(url_to_path(completed["url"]))
+    finally:
+        remove_upload(completed["url"])
+
+
+@pytest.mark.asyncio
+async def test_finalize_reclaims_stale_finalizing_session(db_client, session_dir):
+    """Test sesi finalizing milik worker yang mati bisa difinalisasi ulang setelah kuncinya habis"""
+    data = png_bytes(32, 32)
+    session = await create_session(db_client, "owner@example.com", len(data))
+    upload_id = session["_id"]
+
+    async def body():
+        yield data
+
+    await write_chunk(db_client, upload_id, "owner@example.com", 0, body())
+    orphan_path, orphan_url = new_upload_location("yatim.png")
+    open(orphan_path, "wb").close()
+    await db_client[COLLECTION].update_one({"_id": upload_id}, {"$set": {
+        "status": "finalizing", "url": orphan_url,
+        "locked_until": datetime.utcnow() + timedelta(seconds=60)}})
+
+    # Kunci masih berlaku: worker lain mungkin masih memfinalisasi
+    with pytest.raises(UploadSessionError) as error:
+        await finalize_session(db_client, upload_id, "owner@example.com")
+    assert error.value.status_code == 409
+
+    await db_client[COLLECTION].update_one(
+        {"_id": upload_id}, {"$set": {"locked_until": datetime.utcnow() - timedelta(seconds=1)}})
+    completed = await finalize_session(db_client, upload_id, "owner@example.com")
+    try:
+        assert completed["status"] == "complete"
+        assert completed["url"] != orphan_url
+        assert os.path.exists(url_to_path(completed["url"]))
+        assert not os.path.exists(orphan_path)
+    finally:
+        remove_upload(completed["url"])
+        remove_upload(orphan_url)
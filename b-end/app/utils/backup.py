@@ -0,0 +1,350 @@
+"""
+Backup dan restore streaming untuk semua koleksi dan file upload.
+
+Struktur backup:
+    <out>/manifest.json
+    <out>/collections/<koleksi>.bson.gz    (atau .ndjson.gz)
+    <blob-store>/<sha[:2]>/<sha256>       (isi static/uploads, content-addressed)
+
+Dokumen dibaca dengan cursor dan ditulis satu per satu ke file gzip, sehingga
+memori tetap konstan berapapun ukuran data. File upload disimpan berdasarkan
+hash isinya; blob yang sudah ada di blob store tidak disalin ulang, dan file
+yang ukuran/mtime-nya sama dengan manifest sebelumnya tidak di-hash ulang.
+Restore membaca file secara streaming dan menulis dengan ``insert_many``
+paralel lewat antrian berukuran tetap.
+
+Contoh:
+    python -m app.utils.backup dump --out backups/2025-01-01 --blob-store backups/blobs \\
+        --since backups/2024-12-31
+    python -m app.utils.backup restore --from backups/2025-01-01 --drop --workers 8
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+import bson
+from bson import json_util
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.utils.generator import insert_batch
+
+MANIFEST_VERSION = 1
+FORMATS = {"bson": ".bson.gz", "ndjson": ".ndjson.gz"}
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def blob_path(store: str, sha: str) -> str:
+    return os.path.join(store, sha[:2], sha)
+
+
+def load_manifest(backup_dir: str) -> dict:
+    with open(os.path.join(backup_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Versi manifest tidak didukung: {manifest.get('version')}")
+    return manifest
+
+
+def write_manifest(backup_dir: str, manifest: dict) -> None:
+    # Tulis ke file sementara dulu supaya manifest tidak pernah setengah jadi
+    path = os.path.join(backup_dir, "manifest.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+# ---------------------------------------------------------------------------
+# Dump
+# ---------------------------------------------------------------------------
+
+def serialize_indexes(index_information: dict) -> List[dict]:
+    indexes = []
+    for name, info in index_information.items():
+        if name == "_id_":
+            continue
+        options = {k: v for k, v in info.items() if k not in ("key", "v", "ns")}
+        indexes.append({"name": name, "key": [list(k) for k in info["key"]], "options": options})
+    return indexes
+
+
+async def dump_collection(db, name: str, path: str, fmt: str, batch_size: int, level: int) -> dict:
+    collection = db[name]
+    count = 0
+    with gzip.open(path, "wb", compresslevel=level) as out:
+        async for doc in collection.find({}, batch_size=batch_size):
+            if fmt == "bson":
+                out.write(bson.encode(doc))
+            else:
+                out.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS).encode())
+                out.write(b"\n")
+            count += 1
+    return {
+        "file": os.path.relpath(path, os.path.dirname(os.path.dirname(path))),
+        "count": count,
+        "bytes": os.path.getsize(path),
+        "indexes": serialize_indexes(await collection.index_information()),
+    }
+
+
+def dump_uploads(upload_dir: str, store: str, previous: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Simpan isi ``upload_dir`` ke blob store. Hash dari manifest sebelumnya
+    dipakai ulang jika ukuran dan mtime file tidak berubah.
+    """
+    entries: Dict[str, dict] = {}
+    copied = reused = 0
+    for root, _, files in os.walk(upload_dir):
+        for filename in files:
+            path = os.path.join(root, filename)
+            relative = os.path.relpath(path, upload_dir).replace(os.sep, "/")
+            stat = os.stat(path)
+            old = previous.get(relative)
+            if old and old["size"] == stat.st_size and old["mtime"] == int(stat.st_mtime):
+                sha = old["sha256"]
+            else:
+                sha = file_sha256(path)
+            target = blob_path(store, sha)
+            if os.path.exists(target):
+                reused += 1
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.copyfile(path, target + ".tmp")
+                os.replace(target + ".tmp", target)
+                copied += 1
+            entries[relative] = {"sha256": sha, "size": stat.st_size, "mtime": int(stat.st_mtime)}
+    print(f"Upload: {len(entries)} file, {copied} blob baru, {reused} sudah ada di blob store")
+    return entries
+
+
+async def dump(db, out_dir: str, fmt: str = "bson", collections: Optional[List[str]] = None,
+               batch_size: int = 1000, level: int = 6, upload_dir: Optional[str] = None,
+               blob_store: Optional[str] = None, since: Optional[str] = None) -> dict:
+    os.makedirs(os.path.join(out_dir, "collections"), exist_ok=True)
+    names = collections or sorted(await db.list_collection_names())
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "database": db.name,
+        "format": fmt,
+        "collections": {},
+        "uploads": None,
+    }
+
+    for name in names:
+        start = time.perf_counter()
+        path = os.path.join(out_dir, "collections", name + FORMATS[fmt])
+        manifest["collections"][name] = await dump_collection(db, name, path, fmt, batch_size, level)
+        info = manifest["collections"][name]
+        print(f"Dump {name}: {info['count']} dokumen, {info['bytes']} byte, "
+              f"{time.perf_counter() - start:.2f} detik")
+
+    if upload_dir:
+        store = blob_store or os.path.join(out_dir, "blobs")
+        previous = {}
+        if since:
+            previous = (load_manifest(since).get("uploads") or {}).get("files", {})
+        files = await asyncio.to_thread(dump_uploads, upload_dir, store, previous)
+        manifest["uploads"] = {
+            "blob_store": os.path.relpath(store, out_dir),
+            "files": files,
+        }
+
+    write_manifest(out_dir, manifest)
+    return manifest
+
+
+# ---------------------------------------------------------------------------
+# Restore
+# ---------------------------------------------------------------------------
+
+def iter_documents(path: str, fmt: str) -> Iterator[dict]:
+    with gzip.open(path, "rb") as f:
+        if fmt == "bson":
+            yield from bson.decode_file_iter(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json_util.loads(line)
+
+
+def read_batches(path: str, fmt: str, batch_size: int) -> Iterator[List[dict]]:
+    batch = []
+    for doc in iter_documents(path, fmt):
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def restore_collection(db, name: str, path: str, fmt: str, batch_size: int, workers: int) -> dict:
+    """
+    Restore satu koleksi; paling banyak ``workers * 2`` batch ada di memori.
+    Kesalahan pertama dari reader atau consumer menghentikan semua task lalu diteruskan.
+    """
+    collection = db[name]
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    stats = {"inserted": 0, "failed": 0}
+
+    async def consumer():
+        while True:
+            documents = await queue.get()
+            if documents is None:
+                return
+            inserted = await insert_batch(collection, documents)
+            stats["inserted"] += inserted
+            stats["failed"] += len(documents) - inserted
+
+    async def producer():
+        batches = read_batches(path, fmt, batch_size)
+        while True:
+            # Dekompresi dan decode dilakukan di thread agar insert tetap berjalan
+            documents = await asyncio.to_thread(next, batches, None)
+            if documents is None:
+                break
+            await queue.put(documents)
+        for _ in range(workers):
+            await queue.put(None)
+
+    # Producer dan consumer ditunggu bersama: jika semua consumer mati, queue.put
+    # producer tidak pernah selesai, jadi kesalahan harus membatalkan yang lain
+    tasks = [asyncio.create_task(producer())]
+    tasks += [asyncio.create_task(consumer()) for _ in range(workers)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return stats
+
+
+async def restore_indexes(db, name: str, indexes: List[dict]) -> None:
+    for index in indexes:
+        options = dict(index["options"])
+        await db[name].create_index(
+            [tuple(k) for k in index["key"]], name=index["name"], **options)
+
+
+def restore_uploads(backup_dir: str, uploads: dict, upload_dir: str, workers: int) -> Dict[str, int]:
+    store = os.path.join(backup_dir, uploads["blob_store"])
+    stats = {"copied": 0, "skipped": 0, "missing": 0}
+
+    def restore_file(item):
+        relative, entry = item
+        target = os.path.join(upload_dir, *relative.split("/"))
+        source = blob_path(store, entry["sha256"])
+        if os.path.exists(target) and os.path.getsize(target) == entry["size"]:
+            return "skipped"
+        if not os.path.exists(source):
+            return "missing"
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target + ".tmp")
+        os.replace(target + ".tmp", target)
+        os.utime(target, (entry["mtime"], entry["mtime"]))
+        return "copied"
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(restore_file, uploads["files"].items()):
+            stats[result] += 1
+    return stats
+
+
+async def restore(db, backup_dir: str, collections: Optional[List[str]] = None,
+                  batch_size: int = 1000, workers: int = 4, drop: bool = False,
+                  upload_dir: Optional[str] = None) -> dict:
+    manifest = load_manifest(backup_dir)
+    fmt = manifest["format"]
+    results = {}
+    for name, info in manifest["collections"].items():
+        if collections and name not in collections:
+            continue
+        if drop:
+            await db[name].drop()
+        start = time.perf_counter()
+        stats = await restore_collection(
+            db, name, os.path.join(backup_dir, info["file"]), fmt, batch_size, workers)
+        await restore_indexes(db, name, info.get("indexes", []))
+        elapsed = time.perf_counter() - start
+        results[name] = stats
+        rate = stats["inserted"] / elapsed if elapsed else 0
+        print(f"Restore {name}: {stats['inserted']}/{info['count']} dokumen "
+              f"({stats['failed']} gagal), {rate:.0f} docs/s")
+
+    if upload_dir and manifest.get("uploads"):
+        stats = await asyncio.to_thread(
+            restore_uploads, backup_dir, manifest["uploads"], upload_dir, workers)
+        results["uploads"] = stats
+        print(f"Upload: {stats['copied']} disalin, {stats['skipped']} sudah ada, "
+              f"{stats['missing']} blob hilang")
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Backup dan restore database serta file upload")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dump_parser = sub.add_parser("dump", help="Buat backup")
+    dump_parser.add_argument("--out", required=True, help="Direktori backup")
+    dump_parser.add_argument("--format", choices=FORMATS, default="bson",
+                             help="Format dokumen (bson mempertahankan tipe, ndjson mudah dibaca)")
+    dump_parser.add_argument("--level", type=int, default=6, help="Level kompresi gzip (1-9)")
+    dump_parser.add_argument("--blob-store", help="Direktori blob upload (default: <out>/blobs)")
+    dump_parser.add_argument("--since", help="Backup sebelumnya, untuk melewati hashing file yang tidak berubah")
+
+    restore_parser = sub.add_parser("restore", help="Restore dari backup")
+    restore_parser.add_argument("--from", dest="source", required=True, help="Direktori backup")
+    restore_parser.add_argument("--drop", action="store_true", help="Hapus koleksi sebelum restore")
+    restore_parser.add_argument("--workers", type=int, default=4, help="Jumlah insert paralel")
+
+    for p in (dump_parser, restore_parser):
+        p.add_argument("--collections", help="Daftar koleksi dipisah koma (default: semua)")
+        p.add_argument("--batch-size", type=int, default=1000, help="Dokumen per batch")
+        p.add_argument("--no-uploads", action="store_true", help="Lewati file di static/uploads")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    collections = [c.strip() for c in args.collections.split(",")] if args.collections else None
+    upload_dir = None if args.no_uploads else settings.UPLOAD_DIR
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        await client.admin.command('ping')
+        db = client[settings.MONGODB_DATABASE]
+        start = time.perf_counter()
+        if args.command == "dump":
+            await dump(db, args.out, args.format, collections, args.batch_size, args.level,
+                       upload_dir, args.blob_store, args.since)
+        else:
+            await restore(db, args.source, collections, args.batch_size, args.workers,
+                          args.drop, upload_dir)
+        print(f"Selesai dalam {time.perf_counter() - start:.2f} detik")
+    finally:
+        client.close()
+        print("Koneksi database ditutup.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,65 +1,161 @@
 import os
-import shutil
 from fastapi import UploadFile, HTTPException
 from datetime import datetime
+import time
 import uuid
+from typing import Awaitable, Callable, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.jobs import enqueue, job_handler
+from app.core.metrics import upload_size_bytes, upload_duration_seconds, upload_metadata_stripped_bytes_total
+from app.utils.image_meta import extract_image_meta
+from app.utils.image_variants import create_variants, wants_variants
+from app.utils.image_stream import FORMATS, IMAGE_FORMATS, SNIFF_SIZE, make_stripper, sniff_format
+from app.utils.upload_paths import new_upload_location, remove_upload, url_to_path
 
-UPLOAD_DIR = "static/uploads"
+UPLOAD_DIR = settings.UPLOAD_DIR
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+CHUNK_SIZE = 64 * 1024
 
 # Pastikan direktori upload ada
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-async def save_upload_file(file: UploadFile) -> str:
+async def save_upload_file(file: UploadFile) -> Tuple[Optional[str], Optional[dict]]:
+    """
+    Simpan file upload dan kembalikan ``(url, metadata)``. Metadata berisi
+    format, width/height, warna dominan dan placeholder (lihat ``ImageMeta``),
+    atau ``None`` jika gambar tidak bisa dibaca. Varian AVIF/WebP dijadwalkan
+    pemanggil lewat ``schedule_variants``.
+    """
     if not file:
-        return None
-        
-    # Validasi tipe file
-    allowed_types = ["image/jpeg", "image/png", "image/gif"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=400,
-            detail="Tipe file tidak diizinkan. Hanya JPEG, PNG dan GIF yang diperbolehkan"
-        )
-    
-    # Validasi ukuran file
+        return None, None
+
+    start = time.perf_counter()
     try:
-        file_size = 0
-        while chunk := await file.read(8192):
-            file_size += len(chunk)
-            if file_size > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Ukuran file terlalu besar. Maksimal 5MB"
-                )
-        await file.seek(0)  # Reset file pointer
-    except Exception as e:
-        if not isinstance(e, HTTPException):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Gagal memvalidasi file: {str(e)}"
-            )
-        raise e
-    
-    # Generate unique filename
+        path, file_size = await _save_upload_file(file)
+        meta = await extract_image_meta(url_to_path(path))
+    except Exception:
+        upload_duration_seconds.observe(time.perf_counter() - start, outcome="error")
+        raise
+    upload_duration_seconds.observe(time.perf_counter() - start, outcome="success")
+    upload_size_bytes.observe(file_size)
+    return path, meta
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def _save_upload_file(file: UploadFile):
+    try:
+        return await store_stream(file.read, MAX_FILE_SIZE, IMAGE_FORMATS)
+    finally:
+        file.file.close()
+
+
+def _allowed_message(formats: Sequence[str]) -> str:
+    labels = [FORMATS[name][2] for name in formats]
+    return f"Tipe file tidak diizinkan. Hanya {', '.join(labels[:-1])} dan {labels[-1]} yang diperbolehkan"
+
+
+async def store_stream(
+    read: Callable[[int], Awaitable[bytes]],
+    max_size: int,
+    formats: Sequence[str] = IMAGE_FORMATS,
+    digest=None,
+) -> Tuple[str, int]:
+    """
+    Simpan isi stream ``read(n)`` ke UPLOAD_DIR (subdirektori shard, lihat
+    ``upload_paths``) dan kembalikan ``(url, ukuran)``.
+    Dipakai oleh upload multipart biasa maupun finalisasi upload bertahap;
+    ``digest`` (objek hashlib, opsional) di-update dengan byte asli.
+    """
+    # Format ditentukan dari magic bytes, bukan content_type/ekstensi dari client;
+    # file yang bukan gambar ditolak sebelum ada yang ditulis ke disk
+    head = await read(CHUNK_SIZE)
+    image_format = sniff_format(head[:SNIFF_SIZE])
+    if image_format not in formats:
+        raise HTTPException(status_code=400, detail=_allowed_message(formats))
+
+    # Generate unique filename (ekstensi sesuai format sebenarnya)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     unique_id = str(uuid.uuid4())[:8]
-    file_extension = os.path.splitext(file.filename)[1].lower()
-    if not file_extension:
-        file_extension = ".jpg"  # Default extension
-    filename = f"{timestamp}_{unique_id}{file_extension}"
-    
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
+    filename = f"{timestamp}_{unique_id}{FORMATS[image_format][0]}"
+    file_path, url = new_upload_location(filename)
+    temp_path = f"{file_path}.part"
+
+    # Satu kali baca: validasi ukuran, buang EXIF/XMP dan tulis ke disk sekaligus
+    stripper = make_stripper(image_format)
+    file_size = 0
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        with open(temp_path, "wb") as buffer:
+            chunk = head
+            while chunk:
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Ukuran file terlalu besar. Maksimal {max_size // (1024 * 1024)}MB"
+                    )
+                if digest is not None:
+                    digest.update(chunk)
+                buffer.write(stripper.feed(chunk))
+                chunk = await read(CHUNK_SIZE)
+            buffer.write(stripper.finish())
+        os.replace(temp_path, file_path)
+    except HTTPException:
+        _remove_quietly(temp_path)
+        raise
+    except ValueError as e:
+        _remove_quietly(temp_path)
+        raise HTTPException(
+            status_code=400,
+            detail=f"File gambar tidak valid: {str(e)}"
+        )
     except Exception as e:
+        _remove_quietly(temp_path)
         raise HTTPException(
             status_code=500,
             detail=f"Gagal mengunggah file: {str(e)}"
         )
-    finally:
-        file.file.close()
-    
-    return f"/{UPLOAD_DIR}/{filename}"
+
+    if stripper.stripped:
+        upload_metadata_stripped_bytes_total.inc(stripper.stripped, format=image_format)
+    return url, file_size
+
+
+# --- Job background untuk file upload (lihat app.core.jobs) ---
+
+VARIANTS_JOB = "image_variants"
+DELETE_UPLOAD_JOB = "delete_upload"
+
+
+@job_handler(VARIANTS_JOB)
+async def _variants_job(payload: dict) -> None:
+    path = url_to_path(payload["url"])
+    # File sudah dihapus sebelum job berjalan: tidak ada yang perlu dibuat
+    if path is not None and os.path.exists(path):
+        await create_variants(path)
+
+
+@job_handler(DELETE_UPLOAD_JOB)
+async def _delete_upload_job(payload: dict) -> None:
+    await run_in_threadpool(remove_upload, payload["url"])
+
+
+async def schedule_variants(db, url: str) -> Optional[str]:
+    """Jadwalkan pembuatan varian AVIF/WebP; sampai siap /static mengirim file asli."""
+    path = url_to_path(url)
+    if path is None or not wants_variants(path):
+        return None
+    return await enqueue(db, VARIANTS_JOB, {"url": url})
+
+
+async def schedule_upload_removal(db, url: Optional[str]) -> Optional[str]:
+    """Jadwalkan penghapusan file upload (beserta variannya) setelah dokumennya dihapus."""
+    if url_to_path(url) is None:
+        return None
+    return await enqueue(db, DELETE_UPLOAD_JOB, {"url": url})
@@ -0,0 +1,415 @@
+"""
+Generator data sintetis untuk load test.
+
+Berbeda dengan ``seeder.py`` yang hanya mengisi beberapa dokumen contoh,
+generator ini bisa menghasilkan jutaan dokumen realistis untuk semua koleksi
+dengan distribusi yang bisa diatur, lalu menulisnya dengan ``insert_many``
+(unordered) secara paralel dan melaporkan throughput insert.
+
+Contoh:
+    python -m app.utils.generator --count blogs=1000000,gallery=500000 \\
+        --content-length lognormal:2500,0.6 --authors 200 --author-skew 1.1 \\
+        --spread-days 730 --created-at recent --batch-size 1000 --workers 8
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+
+COLLECTIONS = ("blogs", "gallery", "partners", "programs")
+# Koleksi yang dokumennya punya field author
+AUTHORED_COLLECTIONS = ("blogs", "gallery", "partners")
+
+WORDS = (
+    "data kegiatan program pelatihan masyarakat teknologi pendidikan pengembangan "
+    "kolaborasi mitra komunitas digital inovasi penelitian workshop seminar peserta "
+    "materi pemateri dampak sosial ekonomi lingkungan kawasan strategi kebijakan "
+    "analisis hasil evaluasi laporan dokumentasi kerjasama universitas mahasiswa "
+    "relawan kesehatan literasi keberlanjutan transformasi kapasitas jaringan"
+).split()
+
+IMAGE_EXTENSIONS = (".jpg", ".png", ".gif")
+
+
+class Distribution:
+    """
+    Distribusi angka positif dari spesifikasi teks:
+    ``fixed:N``, ``uniform:MIN,MAX``, ``normal:MEAN,STD`` atau
+    ``lognormal:MEDIAN,SIGMA``.
+    """
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, raw = spec.partition(":")
+        try:
+            params = [float(p) for p in raw.split(",") if p]
+        except ValueError:
+            raise ValueError(f"Parameter distribusi tidak valid: {spec}")
+        expected = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(
+                f"Distribusi tidak dikenal: {spec} "
+                "(gunakan fixed:N, uniform:MIN,MAX, normal:MEAN,STD atau lognormal:MEDIAN,SIGMA)")
+        self.kind = kind
+        self.params = params
+
+    def sample(self, rng: random.Random) -> int:
+        if self.kind == "fixed":
+            value = self.params[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            value = rng.gauss(*self.params)
+        else:
+            value = rng.lognormvariate(math.log(self.params[0]), self.params[1])
+        return max(1, int(value))
+
+
+@dataclass
+class GeneratorConfig:
+    counts: Dict[str, int]
+    content_length: Distribution = field(default_factory=lambda: Distribution("lognormal:2000,0.5"))
+    description_length: Distribution = field(default_factory=lambda: Distribution("uniform:40,400"))
+    authors: int = 50
+    author_skew: float = 1.0
+    images: int = 5000
+    missing_title_ratio: float = 0.1
+    spread_days: int = 365
+    created_at: str = "uniform"
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.authors < 1 and self.needs_authors:
+            raise ValueError("authors minimal 1 jika blogs, gallery atau partners dibuat")
+
+    @property
+    def needs_authors(self) -> bool:
+        return any(self.counts.get(name) for name in AUTHORED_COLLECTIONS)
+
+
+class DocumentFactory:
+    """Membuat dokumen satu per satu sesuai ``GeneratorConfig``."""
+
+    def __init__(self, config: GeneratorConfig, seed_offset: int = 0):
+        self.config = config
+        self.rng = random.Random(None if config.seed is None else config.seed + seed_offset)
+        self.now = datetime.utcnow()
+        self.author_emails = author_emails(config)
+        # Bobot kumulatif Zipf: author pertama menulis paling banyak
+        weights = [1 / (rank ** config.author_skew) for rank in range(1, config.authors + 1)]
+        self.author_cum_weights = list(itertools.accumulate(weights))
+        self.builders: Dict[str, Callable[[], dict]] = {
+            "blogs": self.blog,
+            "gallery": self.gallery,
+            "partners": self.partner,
+            "programs": self.program,
+        }
+
+    def text(self, length: int) -> str:
+        words = []
+        size = 0
+        choice = self.rng.choice
+        while size < length:
+            word = choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        text = " ".join(words)[:length]
+        return text[:1].upper() + text[1:]
+
+    def title(self) -> str:
+        return self.text(self.rng.randint(20, 70)).rstrip()
+
+    def author(self) -> str:
+        total = self.author_cum_weights[-1]
+        index = bisect.bisect_left(self.author_cum_weights, self.rng.random() * total)
+        return self.author_emails[min(index, len(self.author_emails) - 1)]
+
+    def image(self) -> str:
+        index = self.rng.randrange(self.config.images)
+        extension = IMAGE_EXTENSIONS[index % len(IMAGE_EXTENSIONS)]
+        return f"/static/uploads/generated_{index:08d}{extension}"
+
+    def created(self) -> datetime:
+        spread = self.config.spread_days * 86400
+        if self.config.created_at == "recent":
+            # Eksponensial: sebagian besar dokumen baru dibuat
+            offset = min(spread, self.rng.expovariate(5 / spread))
+        else:
+            offset = self.rng.uniform(0, spread)
+        return self.now - timedelta(seconds=offset)
+
+    def blog(self) -> dict:
+        return {
+            "title": self.title(),
+            "content": self.text(self.config.content_length.sample(self.rng)),
+            "image": self.image(),
+            "author": self.author(),
+            "created_at": self.created(),
+        }
+
+    def gallery(self) -> dict:
+        missing = self.rng.random() < self.config.missing_title_ratio
+        return {
+            "title": None if missing else self.title(),
+            "description": None if missing else self.text(
+                self.config.description_length.sample(self.rng)),
+            "image": self.image(),
+            "author": self.author(),
+            "created_at": self.created(),
+        }
+
+    def partner(self) -> dict:
+        slug = f"partner{self.rng.randrange(10 ** 9):09d}"
+        return {
+            "name": self.title(),
+            "description": self.text(max(10, self.config.description_length.sample(self.rng))),
+            "website_url": f"https://{slug}.example.com/",
+            "logo": self.image(),
+            "author": self.author(),
+            "created_at": self.created(),
+        }
+
+    def program(self) -> dict:
+        return {
+            "title": self.title(),
+            "subtitle": self.title(),
+            "description": self.text(self.config.description_length.sample(self.rng)),
+            "image": self.image(),
+            "created_at": self.created(),
+        }
+
+    def batch(self, collection: str, size: int) -> List[dict]:
+        build = self.builders[collection]
+        return [build() for _ in range(size)]
+
+
+def author_emails(config: GeneratorConfig) -> List[str]:
+    return [f"author{i}@example.com" for i in range(config.authors)]
+
+
+def author_users(config: GeneratorConfig) -> List[dict]:
+    """User untuk setiap author, semuanya dengan password ``generated123``."""
+    # Hash dihitung sekali saja; bcrypt per user terlalu mahal untuk ribuan author
+    password = get_password_hash("generated123")
+    now = datetime.utcnow()
+    return [
+        {
+            "email": email,
+            "username": f"author{i}",
+            "full_name": f"Author {i}",
+            "password": password,
+            "is_admin": False,
+            "is_active": True,
+            "created_at": now,
+        }
+        for i, email in enumerate(author_emails(config))
+    ]
+
+
+@dataclass
+class InsertReport:
+    collection: str
+    inserted: int = 0
+    failed: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.inserted / self.elapsed if self.elapsed else 0.0
+
+
+async def insert_batch(collection, documents: List[dict]) -> int:
+    """Insert unordered; dokumen yang gagal tidak menghentikan batch."""
+    try:
+        result = await collection.insert_many(documents, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        return e.details.get("nInserted", 0)
+
+
+async def generate_collection(db, name: str, count: int, config: GeneratorConfig,
+                              batch_size: int, workers: int,
+                              progress: Optional[Callable[[InsertReport], None]] = None) -> InsertReport:
+    """
+    Hasilkan ``count`` dokumen dan tulis dengan ``workers`` insert paralel.
+    Antrian dibatasi supaya memori tetap konstan berapapun ``count``.
+    Kesalahan pertama dari producer atau consumer menghentikan semua task lalu diteruskan.
+    """
+    report = InsertReport(collection=name)
+    factory = DocumentFactory(config, seed_offset=COLLECTIONS.index(name))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+    collection = db[name]
+
+    async def consumer():
+        while True:
+            documents = await queue.get()
+            if documents is None:
+                return
+            inserted = await insert_batch(collection, documents)
+            report.inserted += inserted
+            report.failed += len(documents) - inserted
+            report.batches += 1
+            if progress:
+                report.elapsed = time.perf_counter() - start
+                progress(report)
+
+    async def producer():
+        remaining = count
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            await queue.put(factory.batch(name, size))
+            remaining -= size
+        for _ in range(workers):
+            await queue.put(None)
+
+    start = time.perf_counter()
+    # Seperti restore_collection: jika semua consumer mati (mis. AutoReconnect),
+    # queue.put producer tidak pernah selesai, jadi kesalahan membatalkan yang lain
+    tasks = [asyncio.create_task(producer())]
+    tasks += [asyncio.create_task(consumer()) for _ in range(workers)]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+async def generate(db, config: GeneratorConfig, batch_size: int = 1000, workers: int = 4,
+                   drop: bool = False, progress=None) -> List[InsertReport]:
+    if drop:
+        for name in COLLECTIONS:
+            await db[name].drop()
+        # Koleksi users tidak di-drop: akun asli (termasuk admin) dan unique index-nya
+        # harus tetap ada, jadi hanya author sintetis yang dihapus
+        await db.users.delete_many({"email": {"$in": author_emails(config)}})
+
+    if config.needs_authors:
+        users = author_users(config)
+        existing = await db.users.find(
+            {"email": {"$in": [u["email"] for u in users]}}, {"email": 1}).to_list(None)
+        known = {u["email"] for u in existing}
+        missing = [u for u in users if u["email"] not in known]
+        if missing:
+            await insert_batch(db.users, missing)
+
+    reports = []
+    for name in COLLECTIONS:
+        count = config.counts.get(name, 0)
+        if count > 0:
+            reports.append(await generate_collection(
+                db, name, count, config, batch_size, workers, progress))
+    return reports
+
+
+def parse_counts(value: str) -> Dict[str, int]:
+    """``blogs=1000,gallery=500`` atau satu angka untuk semua koleksi."""
+    if value.isdigit():
+        return {name: int(value) for name in COLLECTIONS}
+    counts = {}
+    for part in value.split(","):
+        name, _, raw = part.partition("=")
+        name = name.strip()
+        if name not in COLLECTIONS or not raw.strip().isdigit():
+            raise argparse.ArgumentTypeError(
+                f"Format count tidak valid: '{part}' (contoh: blogs=1000,gallery=500)")
+        counts[name] = int(raw)
+    return counts
+
+
+def print_report(reports: List[InsertReport]) -> None:
+    header = f"{'koleksi':<12}{'inserted':>12}{'gagal':>8}{'batch':>8}{'detik':>10}{'docs/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for r in reports:
+        print(f"{r.collection:<12}{r.inserted:>12}{r.failed:>8}{r.batches:>8}"
+              f"{r.elapsed:>10.2f}{r.rate:>12.0f}")
+    inserted = sum(r.inserted for r in reports)
+    elapsed = sum(r.elapsed for r in reports)
+    print(f"{'TOTAL':<12}{inserted:>12}{sum(r.failed for r in reports):>8}"
+          f"{sum(r.batches for r in reports):>8}{elapsed:>10.2f}"
+          f"{(inserted / elapsed if elapsed else 0):>12.0f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generator data sintetis untuk load test")
+    parser.add_argument("--count", type=parse_counts, default=parse_counts("10000"),
+                        help="Jumlah dokumen: satu angka untuk semua koleksi atau blogs=N,gallery=N,...")
+    parser.add_argument("--content-length", type=Distribution, default=Distribution("lognormal:2000,0.5"),
+                        help="Distribusi panjang konten blog (karakter)")
+    parser.add_argument("--description-length", type=Distribution, default=Distribution("uniform:40,400"),
+                        help="Distribusi panjang deskripsi galeri/partner/program")
+    parser.add_argument("--authors", type=int, default=50, help="Jumlah author berbeda")
+    parser.add_argument("--author-skew", type=float, default=1.0,
+                        help="Eksponen Zipf distribusi author (0 = merata)")
+    parser.add_argument("--images", type=int, default=5000, help="Jumlah referensi gambar berbeda")
+    parser.add_argument("--missing-title-ratio", type=float, default=0.1,
+                        help="Rasio foto galeri tanpa judul/deskripsi")
+    parser.add_argument("--spread-days", type=int, default=365, help="Rentang created_at ke belakang (hari)")
+    parser.add_argument("--created-at", choices=("uniform", "recent"), default="uniform",
+                        help="Sebaran created_at: merata atau condong ke yang terbaru")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Dokumen per insert_many")
+    parser.add_argument("--workers", type=int, default=4, help="Jumlah insert paralel")
+    parser.add_argument("--seed", type=int, help="Seed random agar hasil bisa direproduksi")
+    parser.add_argument("--drop", action="store_true",
+                        help="Hapus koleksi konten dan author sintetis sebelum generate")
+    args = parser.parse_args(argv)
+    if args.authors < 1 and any(args.count.get(name) for name in AUTHORED_COLLECTIONS):
+        parser.error("--authors minimal 1 jika blogs, gallery atau partners dibuat")
+    return args
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    config = GeneratorConfig(
+        counts=args.count,
+        content_length=args.content_length,
+        description_length=args.description_length,
+        authors=args.authors,
+        author_skew=args.author_skew,
+        images=max(1, args.images),
+        missing_title_ratio=args.missing_title_ratio,
+        spread_days=args.spread_days,
+        created_at=args.created_at,
+        seed=args.seed,
+    )
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL, maxPoolSize=max(10, args.workers * 2))
+    try:
+        await client.admin.command('ping')
+        print(f"Berhasil terhubung ke MongoDB, database '{settings.MONGODB_DATABASE}'.")
+        db = client[settings.MONGODB_DATABASE]
+
+        last_print = [time.monotonic()]
+
+        def progress(report: InsertReport):
+            if time.monotonic() - last_print[0] >= 2:
+                last_print[0] = time.monotonic()
+                print(f"  {report.collection}: {report.inserted} dokumen, {report.rate:.0f} docs/s")
+
+        reports = await generate(db, config, args.batch_size, args.workers, args.drop, progress)
+        print_report(reports)
+    finally:
+        client.close()
+        print("Koneksi database ditutup.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,252 @@
+"""
+Deteksi format dari magic bytes dan pembuangan metadata EXIF/XMP secara streaming.
+
+Format ditentukan dari beberapa byte pertama file (bukan ``content_type`` atau
+ekstensi dari client). Stripper menerima chunk satu per satu dan langsung
+mengeluarkan byte yang disimpan, tanpa decode/encode ulang gambar:
+
+- JPEG: segmen APP1 EXIF dan XMP dibuang; data gambar setelah SOS diteruskan apa adanya
+- PNG: chunk ``eXIf`` dan XMP (``iTXt`` dengan keyword ``XML:com.adobe.xmp``) dibuang
+- GIF: tidak memiliki EXIF, diteruskan apa adanya
+- MP4/WebM (hanya lewat upload bertahap di /uploads): diteruskan apa adanya
+
+Orientasi EXIF selain normal dipertahankan dalam EXIF minimal (hanya tag
+Orientation) agar foto dari kamera ponsel tidak tampil terputar. Profil
+warna ICC tidak dibuang karena memengaruhi warna yang ditampilkan.
+"""
+import struct
+import zlib
+from typing import Optional
+
+from app.utils.image_meta import EXIF_ORIENTATION_TAG, exif_orientation
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+EXIF_HEADER = b"Exif\x00\x00"
+XMP_HEADERS = (b"http://ns.adobe.com/xap/1.0/\x00", b"http://ns.adobe.com/xmp/extension/\x00")
+PNG_XMP_KEYWORD = b"XML:com.adobe.xmp"
+
+# format -> (ekstensi, content type, label untuk pesan error)
+FORMATS = {
+    "jpeg": (".jpg", "image/jpeg", "JPEG"),
+    "png": (".png", "image/png", "PNG"),
+    "gif": (".gif", "image/gif", "GIF"),
+    "mp4": (".mp4", "video/mp4", "MP4"),
+    "webm": (".webm", "video/webm", "WebM"),
+}
+IMAGE_FORMATS = ("jpeg", "png", "gif")
+VIDEO_FORMATS = ("mp4", "webm")
+# Jumlah byte minimal untuk sniff_format
+SNIFF_SIZE = 8
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(PNG_SIGNATURE):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    return None
+
+
+def minimal_tiff(orientation: int) -> bytes:
+    """Struktur TIFF/EXIF yang hanya berisi tag Orientation."""
+    return (b"II*\x00" + struct.pack("<I", 8) + struct.pack("<H", 1)
+            + struct.pack("<HHIHH", EXIF_ORIENTATION_TAG, 3, 1, orientation, 0)
+            + struct.pack("<I", 0))
+
+
+class PassthroughStripper:
+    def __init__(self):
+        self.stripped = 0
+
+    def feed(self, data: bytes) -> bytes:
+        return data
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class JpegMetadataStripper:
+    """Parser segmen JPEG bertahap; ``ValueError`` jika struktur segmen rusak."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.state = "start"
+        self.remaining = 0
+        self.stripped = 0
+
+    def _segment(self, payload: bytes) -> bytes:
+        """Isi APP1 yang disimpan (kosong = dibuang)."""
+        if payload.startswith(EXIF_HEADER):
+            orientation = exif_orientation(payload)
+            if orientation not in (0, 1):
+                exif = EXIF_HEADER + minimal_tiff(orientation)
+                segment = b"\xff\xe1" + struct.pack(">H", len(exif) + 2) + exif
+                self.stripped += len(payload) + 4 - len(segment)
+                return segment
+        elif not payload.startswith(XMP_HEADERS):
+            return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+        self.stripped += len(payload) + 4
+        return b""
+
+    def feed(self, data: bytes) -> bytes:
+        buffer = self.buffer
+        buffer += data
+        out = bytearray()
+        while buffer:
+            if self.state == "scan":
+                # Setelah SOS isi file adalah data gambar: teruskan tanpa parsing
+                out += buffer
+                buffer.clear()
+                break
+            if self.state == "copy":
+                n = min(self.remaining, len(buffer))
+                out += buffer[:n]
+                del buffer[:n]
+                self.remaining -= n
+                if self.remaining:
+                    break
+                self.state = "marker"
+                continue
+            if self.state == "start":
+                if len(buffer) < 2:
+                    break
+                if buffer[:2] != b"\xff\xd8":
+                    raise ValueError("Bukan file JPEG")
+                out += buffer[:2]
+                del buffer[:2]
+                self.state = "marker"
+                continue
+
+            # state "marker"
+            if len(buffer) < 2:
+                break
+            if buffer[0] != 0xFF:
+                raise ValueError("Struktur segmen JPEG tidak valid")
+            kind = buffer[1]
+            if kind == 0xFF:
+                # Byte pengisi sebelum marker
+                del buffer[:1]
+                continue
+            if kind == 0x01 or 0xD0 <= kind <= 0xD9:
+                out += buffer[:2]
+                del buffer[:2]
+                if kind == 0xD9:
+                    self.state = "scan"
+                continue
+            if len(buffer) < 4:
+                break
+            length = struct.unpack(">H", buffer[2:4])[0]
+            if length < 2:
+                raise ValueError("Panjang segmen JPEG tidak valid")
+            if kind == 0xE1:
+                # APP1 maksimal 64 KB: kumpulkan utuh lalu putuskan
+                if len(buffer) < length + 2:
+                    break
+                out += self._segment(bytes(buffer[4:length + 2]))
+                del buffer[:length + 2]
+                continue
+            out += buffer[:4]
+            del buffer[:4]
+            if kind == 0xDA:
+                self.state = "scan"
+                continue
+            self.remaining = length - 2
+            self.state = "copy"
+        return bytes(out)
+
+    def finish(self) -> bytes:
+        # File terpotong: sisa byte disimpan apa adanya
+        rest = bytes(self.buffer)
+        self.buffer.clear()
+        return rest
+
+
+class PngMetadataStripper:
+    def __init__(self):
+        self.buffer = bytearray()
+        self.state = "start"
+        self.remaining = 0
+        self.stripped = 0
+
+    def _chunk(self, kind: bytes, data: bytes, raw: bytes) -> bytes:
+        """Chunk yang disimpan (kosong = dibuang); ``raw`` adalah chunk asli lengkap dengan CRC."""
+        length = len(data)
+        if kind == b"eXIf":
+            orientation = exif_orientation(EXIF_HEADER + data)
+            if orientation not in (0, 1):
+                tiff = minimal_tiff(orientation)
+                body = kind + tiff
+                chunk = struct.pack(">I", len(tiff)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+                self.stripped += length + 12 - len(chunk)
+                return chunk
+            self.stripped += length + 12
+            return b""
+        # iTXt: keyword diakhiri byte nol
+        if data.split(b"\x00", 1)[0] == PNG_XMP_KEYWORD:
+            self.stripped += length + 12
+            return b""
+        return raw
+
+    def feed(self, data: bytes) -> bytes:
+        buffer = self.buffer
+        buffer += data
+        out = bytearray()
+        while buffer:
+            if self.state == "tail":
+                out += buffer
+                buffer.clear()
+                break
+            if self.state == "copy":
+                n = min(self.remaining, len(buffer))
+                out += buffer[:n]
+                del buffer[:n]
+                self.remaining -= n
+                if self.remaining:
+                    break
+                self.state = "chunk"
+                continue
+            if self.state == "start":
+                if len(buffer) < 8:
+                    break
+                if buffer[:8] != PNG_SIGNATURE:
+                    raise ValueError("Bukan file PNG")
+                out += buffer[:8]
+                del buffer[:8]
+                self.state = "chunk"
+                continue
+
+            # state "chunk": length (4) + type (4) + data + crc (4)
+            if len(buffer) < 8:
+                break
+            length = struct.unpack(">I", buffer[:4])[0]
+            kind = bytes(buffer[4:8])
+            if kind in (b"eXIf", b"iTXt"):
+                if len(buffer) < length + 12:
+                    break
+                out += self._chunk(kind, bytes(buffer[8:8 + length]), bytes(buffer[:length + 12]))
+                del buffer[:length + 12]
+                continue
+            out += buffer[:8]
+            del buffer[:8]
+            self.remaining = length + 4
+            self.state = "tail" if kind == b"IEND" else "copy"
+        return bytes(out)
+
+    def finish(self) -> bytes:
+        rest = bytes(self.buffer)
+        self.buffer.clear()
+        return rest
+
+
+def make_stripper(image_format: str):
+    if image_format == "jpeg":
+        return JpegMetadataStripper()
+    if image_format == "png":
+        return PngMetadataStripper()
+    return PassthroughStripper()
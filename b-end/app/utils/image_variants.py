@@ -0,0 +1,140 @@
+"""
+Varian AVIF/WebP untuk gambar upload.
+
+Setelah upload JPEG/PNG/GIF disimpan, gambar di-encode ulang ke format modern
+di process pool terpisah (encode AVIF/WebP berat di CPU dan memegang GIL,
+sehingga tidak dijalankan di thread worker). Varian disimpan di samping file
+asli dengan akhiran format, mis. ``20250101_120000_ab12cd34.jpg.webp``, dan
+dipilih oleh ``CachedStaticFiles`` sesuai header ``Accept``. Pembuatan varian
+dijadwalkan sebagai job background (lihat ``app.utils.file_handler``).
+
+File varian ditulis ke file sementara lalu di-rename, sehingga varian yang
+belum selesai tidak pernah terlihat; sampai varian siap, file asli yang
+dikirim. Varian yang tidak lebih kecil dari file asli tidak disimpan, dan
+gambar di atas IMAGE_MAX_PIXELS tidak di-decode (tanpa varian).
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from mimetypes import guess_type
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import image_variants_total
+from app.utils.image_meta import probe_file, too_many_pixels
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # Pillow opsional: tanpa varian
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Urutan preferensi jika client menerima beberapa format dengan q yang sama
+VARIANTS = (("avif", "image/avif"), ("webp", "image/webp"))
+SOURCE_TYPES = ("image/jpeg", "image/png", "image/gif")
+PIL_FORMATS = {"avif": "AVIF", "webp": "WEBP"}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def variant_path(path: str, variant: str) -> str:
+    return f"{path}.{variant}"
+
+
+def enabled_formats() -> List[str]:
+    """Format dari IMAGE_VARIANT_FORMATS yang didukung Pillow yang terpasang."""
+    if Image is None:
+        return []
+    names = [name.strip().lower() for name in settings.IMAGE_VARIANT_FORMATS.split(",")]
+    return [name for name in names if name in PIL_FORMATS and features.check(name)]
+
+
+def transcode(path: str, formats: List[str], qualities: Dict[str, int]) -> Dict[str, Tuple[str, int]]:
+    """Buat varian ``path`` (dijalankan di process pool); ``{format: (hasil, ukuran)}``."""
+    results = {}
+    original_size = os.path.getsize(path)
+    with Image.open(path) as img:
+        if getattr(img, "is_animated", False):
+            return {name: ("skipped", 0) for name in formats}
+        icc_profile = img.info.get("icc_profile")
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        # Orientasi EXIF diterapkan ke piksel karena varian tidak membawa EXIF
+        img = ImageOps.exif_transpose(img)
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+        for name in formats:
+            target = variant_path(path, name)
+            temp_path = f"{target}.tmp"
+            try:
+                img.save(temp_path, PIL_FORMATS[name], quality=qualities.get(name, 75),
+                         icc_profile=icc_profile)
+                size = os.path.getsize(temp_path)
+                if size >= original_size:
+                    os.remove(temp_path)
+                    results[name] = ("larger", size)
+                    continue
+                os.replace(temp_path, target)
+                results[name] = ("created", size)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+    return results
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: proses worker uvicorn sudah memiliki thread (motor, logging) sehingga fork tidak aman
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def wants_variants(path: str) -> bool:
+    return bool(enabled_formats()) and guess_type(path)[0] in SOURCE_TYPES
+
+
+async def create_variants(path: str, formats: Optional[List[str]] = None) -> Dict[str, Tuple[str, int]]:
+    """Buat varian di process pool; kesalahan diteruskan agar job bisa dicoba ulang."""
+    formats = enabled_formats() if formats is None else formats
+    if not formats or guess_type(path)[0] not in SOURCE_TYPES:
+        return {}
+    # Dimensi dari header: gambar yang terlalu besar tidak pernah dibuka Pillow
+    info = await asyncio.to_thread(probe_file, path)
+    if info is None or too_many_pixels(info):
+        outcome = "unreadable" if info is None else "too_large"
+        for name in formats:
+            image_variants_total.inc(format=name, outcome=outcome)
+        return {name: (outcome, 0) for name in formats}
+    qualities = {"avif": settings.IMAGE_VARIANT_AVIF_QUALITY, "webp": settings.IMAGE_VARIANT_WEBP_QUALITY}
+    loop = asyncio.get_running_loop()
+    try:
+        results = await loop.run_in_executor(get_pool(), transcode, path, formats, qualities)
+    except Exception as e:
+        logger.warning(f"Gagal membuat varian gambar {path}: {str(e)}")
+        for name in formats:
+            image_variants_total.inc(format=name, outcome="error")
+        raise
+    for name, (outcome, _) in results.items():
+        image_variants_total.inc(format=name, outcome=outcome)
+    return results
+
+
+def remove_variants(path: str) -> None:
+    for name, _ in VARIANTS:
+        try:
+            os.remove(variant_path(path, name))
+        except OSError:
+            pass
+
+
+async def shutdown_variant_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
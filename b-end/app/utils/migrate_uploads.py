@@ -0,0 +1,159 @@
+"""
+Migrasi online file upload datar (``static/uploads/<nama>``) ke tata letak shard
+(``static/uploads/ab/cd/<nama>``, lihat ``app.utils.upload_paths``).
+
+Aman dijalankan saat aplikasi melayani request:
+
+- File dipindah dengan ``os.replace`` (atomik) bersama varian AVIF/WebP-nya
+- Dokumen yang masih berisi URL lama tetap bisa ditampilkan karena
+  ``CachedStaticFiles`` mencari URL datar di lokasi shard
+- Field ``image``/``logo`` ditulis ulang per batch dengan ``bulk_write``,
+  kondisional pada URL lama sehingga tidak menimpa perubahan yang terjadi
+  bersamaan; ``--pause`` memberi jeda antar batch untuk membatasi beban
+- Idempotent: menjalankan ulang hanya memproses sisa file/dokumen
+
+Dokumen dibaca satu kali per koleksi (bukan satu query per file), lalu file
+datar yang tidak direferensikan dokumen mana pun ikut dipindah.
+
+Contoh:
+    python -m app.utils.migrate_uploads --dry-run
+    python -m app.utils.migrate_uploads --batch-size 500 --pause 0.2
+"""
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.utils.image_variants import VARIANTS, variant_path
+from app.utils.upload_paths import (
+    STATIC_URL, flat_upload_name, relative_to_path, sharded_relative, url_to_relative
+)
+
+# (koleksi, field) yang menyimpan URL file upload
+REFERENCES = (
+    ("programs", "image"),
+    ("blogs", "image"),
+    ("gallery", "image"),
+    ("partners", "logo"),
+    ("upload_sessions", "url"),
+)
+FLAT_URL_PATTERN = "^" + STATIC_URL + "uploads/[^/]+$"
+# File sementara yang sedang ditulis tidak ikut dipindah
+SKIPPED_SUFFIXES = (".part", ".tmp")
+
+
+def move_upload(name: str, dry_run: bool = False) -> bool:
+    """Pindahkan satu file datar (dan variannya) ke shard; ``True`` jika file ada di shard."""
+    source = os.path.join(settings.UPLOAD_DIR, name)
+    target = relative_to_path(sharded_relative(name))
+    if not os.path.exists(source):
+        return os.path.exists(target)
+    if dry_run:
+        return True
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(source, target)
+    for variant, _ in VARIANTS:
+        if os.path.exists(variant_path(source, variant)):
+            os.replace(variant_path(source, variant), variant_path(target, variant))
+    return True
+
+
+def flat_names(upload_dir: str) -> List[str]:
+    """File datar di ``upload_dir``, tanpa file varian yang ikut dipindah bersama aslinya."""
+    if not os.path.isdir(upload_dir):
+        return []
+    names = {
+        entry.name for entry in os.scandir(upload_dir)
+        if entry.is_file() and not entry.name.startswith(".")
+        and not entry.name.endswith(SKIPPED_SUFFIXES)
+    }
+    variants = {
+        name for name in names
+        for variant, _ in VARIANTS
+        if name.endswith("." + variant) and name[:-len(variant) - 1] in names
+    }
+    return sorted(names - variants)
+
+
+async def migrate_references(db, collection: str, field: str, batch_size: int,
+                             pause: float, dry_run: bool, stats: Dict[str, int]) -> None:
+    operations = []
+
+    async def flush():
+        if operations and not dry_run:
+            result = await db[collection].bulk_write(operations, ordered=False)
+            stats["updated"] += result.modified_count
+        elif operations:
+            stats["updated"] += len(operations)
+        operations.clear()
+        if pause:
+            await asyncio.sleep(pause)
+
+    cursor = db[collection].find({field: {"$regex": FLAT_URL_PATTERN}}, {field: 1})
+    async for doc in cursor.batch_size(batch_size):
+        old_url = doc[field]
+        name = flat_upload_name(url_to_relative(old_url) or "")
+        if name is None:
+            continue
+        if not await asyncio.to_thread(move_upload, name, dry_run):
+            # Dokumen menunjuk file yang memang tidak ada (mis. data seed/sintetis)
+            stats["missing"] += 1
+            continue
+        operations.append(UpdateOne(
+            {"_id": doc["_id"], field: old_url},
+            {"$set": {field: STATIC_URL + sharded_relative(name)}}
+        ))
+        if len(operations) >= batch_size:
+            await flush()
+    await flush()
+
+
+async def migrate(db, batch_size: int = 500, pause: float = 0.0, dry_run: bool = False) -> Dict[str, int]:
+    stats = {"updated": 0, "missing": 0, "moved": 0}
+    before = len(flat_names(settings.UPLOAD_DIR))
+    for collection, field in REFERENCES:
+        await migrate_references(db, collection, field, batch_size, pause, dry_run, stats)
+
+    # File tanpa referensi (atau direferensikan di koleksi lain) tetap dipindah
+    names = flat_names(settings.UPLOAD_DIR)
+    for start in range(0, len(names), batch_size):
+        for name in names[start:start + batch_size]:
+            await asyncio.to_thread(move_upload, name, dry_run)
+        if pause:
+            await asyncio.sleep(pause)
+    stats["moved"] = before if dry_run else before - len(flat_names(settings.UPLOAD_DIR))
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pindahkan file upload datar ke tata letak shard")
+    parser.add_argument("--batch-size", type=int, default=500, help="Dokumen/file per batch")
+    parser.add_argument("--pause", type=float, default=0.0, help="Jeda antar batch (detik)")
+    parser.add_argument("--dry-run", action="store_true", help="Hitung saja tanpa memindah/menulis")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    try:
+        await client.admin.command('ping')
+        db = client[settings.MONGODB_DATABASE]
+        start = time.perf_counter()
+        stats = await migrate(db, args.batch_size, args.pause, args.dry_run)
+        prefix = "[dry-run] " if args.dry_run else ""
+        print(f"{prefix}File dipindah: {stats['moved']}, dokumen diperbarui: {stats['updated']}, "
+              f"referensi ke file yang tidak ada: {stats['missing']}")
+        print(f"Selesai dalam {time.perf_counter() - start:.2f} detik")
+    finally:
+        client.close()
+        print("Koneksi database ditutup.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
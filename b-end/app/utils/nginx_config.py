@@ -0,0 +1,167 @@
+"""
+Generator konfigurasi nginx untuk menyajikan ``/static`` tanpa melewati worker Python.
+
+Mode:
+- ``direct``: nginx melayani ``/static/`` langsung dari disk; request gambar
+  tidak pernah sampai ke aplikasi
+- ``accel``: request tetap masuk ke aplikasi (lookup file dan header cache di
+  Python, set ``STATIC_ACCEL_REDIRECT=True``), lalu isi file dikirim nginx
+  lewat location internal ``STATIC_ACCEL_PREFIX`` dengan ``X-Accel-Redirect``
+
+Keduanya memakai ``sendfile`` (zero-copy), Range request, ETag/Last-Modified
+bawaan nginx dan ``gzip_static`` untuk varian ``.gz``. Pada mode ``direct``,
+varian ``.avif``/``.webp`` gambar upload dipilih nginx dari header ``Accept``
+(``map`` + ``try_files``) seperti yang dilakukan ``CachedStaticFiles``.
+
+Contoh:
+    python -m app.utils.nginx_config --server-name api.example.com \\
+        --upstream 127.0.0.1:8000 --static-root /srv/lsa/b-end/static --mode direct \\
+        > /etc/nginx/conf.d/lsa-backend.conf
+"""
+import argparse
+import os
+import sys
+
+from app.core.config import settings
+from app.core.static_files import HASHED_NAME
+
+MODES = ("direct", "accel")
+
+SENDFILE = """\
+        sendfile on;
+        tcp_nopush on;
+        gzip_static on;
+        etag on;"""
+
+# Varian AVIF/WebP hanya untuk JPEG/PNG/GIF dan hanya jika disebut eksplisit di Accept
+VARIANT_MAPS = """\
+map $uri $lsa_negotiable {
+    default 0;
+    "~*\\.(?:jpe?g|png|gif)$" 1;
+}
+
+map "$lsa_negotiable:$http_accept" $lsa_avif {
+    default "";
+    "~^1:.*image/avif" ".avif";
+}
+
+map "$lsa_negotiable:$http_accept" $lsa_webp {
+    default "";
+    "~^1:.*image/webp" ".webp";
+}
+
+"""
+
+# add_header dievaluasi saat header dikirim, jadi $sent_http_content_type menunjukkan
+# hasil try_files: immutable jika client tidak meminta varian atau varian terkirim;
+# jika client meminta varian tetapi file asli yang terkirim (varian belum dibuat)
+# max-age pendek agar varian dipakai setelah siap
+HASHED_CACHE_MAP = """\
+map "$lsa_avif$lsa_webp:$sent_http_content_type" $lsa_hashed_cache_control {{
+    default "public, max-age={max_age}";
+    "~^:" "public, max-age={immutable_max_age}, immutable";
+    "~:image/(?:avif|webp)" "public, max-age={immutable_max_age}, immutable";
+}}
+
+"""
+
+TRY_VARIANTS = "try_files $uri$lsa_avif $uri$lsa_webp $uri @lsa_static_fallback;"
+
+# File yang tidak ada di path URL (mis. upload datar lama yang sudah dipindah ke shard)
+# diteruskan ke aplikasi, yang mencarinya di lokasi shard atau menjawab 404
+STATIC_FALLBACK = """
+    location @lsa_static_fallback {
+        proxy_pass http://lsa_backend;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+    }"""
+
+CACHE_HEADERS = """
+        add_header Vary "Accept-Encoding, Accept";
+        add_header Cache-Control "public, max-age={max_age}";
+        {try_variants}
+
+        location ~ "{hashed}" {{
+            add_header Vary "Accept-Encoding, Accept";
+            add_header Cache-Control $lsa_hashed_cache_control;
+            {try_variants}
+        }}"""
+
+TEMPLATE = """\
+{maps}upstream lsa_backend {{
+    server {upstream};
+    keepalive 32;
+}}
+
+server {{
+    listen {listen};
+    server_name {server_name};
+    client_max_body_size {max_body_mb}m;
+
+{static_location}
+
+    location / {{
+        proxy_pass http://lsa_backend;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
+        proxy_set_header Host $host;
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+    }}
+}}
+"""
+
+
+def render(upstream: str, static_root: str, server_name: str = "_", listen: str = "80",
+           mode: str = "direct", accel_prefix: str = settings.STATIC_ACCEL_PREFIX,
+           max_age: int = settings.STATIC_MAX_AGE,
+           immutable_max_age: int = settings.STATIC_IMMUTABLE_MAX_AGE) -> str:
+    if mode not in MODES:
+        raise ValueError(f"Mode tidak dikenal: {mode} (pilihan: {', '.join(MODES)})")
+    root = os.path.abspath(static_root).rstrip("/") + "/"
+
+    if mode == "direct":
+        cache_headers = CACHE_HEADERS.format(
+            max_age=max_age, hashed=HASHED_NAME.pattern, try_variants=TRY_VARIANTS)
+        static_location = (
+            f"    location ^~ /static/ {{\n        alias {root};\n{SENDFILE}\n{cache_headers}\n    }}\n"
+            + STATIC_FALLBACK)
+        maps = VARIANT_MAPS + HASHED_CACHE_MAP.format(max_age=max_age, immutable_max_age=immutable_max_age)
+    else:
+        # Cache-Control dari aplikasi ikut diteruskan nginx pada X-Accel-Redirect, tetapi Vary
+        # dibuang; tanpa Vary cache bersama bisa mengirim AVIF/WebP atau .br/.gz ke client
+        # yang tidak mendukungnya, jadi ditambahkan lagi di location internal
+        prefix = "/" + accel_prefix.strip("/") + "/"
+        static_location = (
+            f"    location ^~ {prefix} {{\n        internal;\n        alias {root};\n{SENDFILE}\n"
+            f"        add_header Vary \"Accept-Encoding, Accept\";\n    }}")
+        maps = ""
+    # Upload multipart biasa maksimal 5MB, chunk /uploads maksimal UPLOAD_CHUNK_MAX_SIZE
+    max_body_mb = max(6, settings.UPLOAD_CHUNK_MAX_SIZE // (1024 * 1024) + 1)
+    return TEMPLATE.format(
+        maps=maps, max_body_mb=max_body_mb, upstream=upstream, listen=listen, server_name=server_name,
+        static_location=static_location)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Buat konfigurasi nginx untuk API dan /static")
+    parser.add_argument("--upstream", default="127.0.0.1:8000", help="Alamat server aplikasi")
+    parser.add_argument("--static-root", default="static", help="Direktori static di server")
+    parser.add_argument("--server-name", default="_", help="server_name nginx")
+    parser.add_argument("--listen", default="80", help="Port/alamat listen nginx")
+    parser.add_argument("--mode", choices=MODES, default="direct",
+                        help="direct: nginx melayani /static; accel: lewat X-Accel-Redirect")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.stdout.write(render(args.upstream, args.static_root, args.server_name, args.listen, args.mode))
+    if args.mode == "accel" and not settings.STATIC_ACCEL_REDIRECT:
+        print("Catatan: set STATIC_ACCEL_REDIRECT=True agar aplikasi mengirim X-Accel-Redirect",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
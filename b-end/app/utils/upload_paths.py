@@ -0,0 +1,94 @@
+"""
+Tata letak file upload dan konversi URL <-> path di disk.
+
+File upload disimpan di subdirektori berdasarkan hash nama file,
+``static/uploads/ab/cd/<nama>`` dengan ``abcd`` = 4 karakter pertama MD5 nama
+file, sehingga setiap direktori hanya berisi sedikit file berapapun jumlah
+upload. Semua router dan utilitas memakai helper di sini alih-alih menyusun
+path sendiri.
+
+URL lama tanpa shard (``/static/uploads/<nama>``) tetap bisa dibaca:
+``url_to_path`` dan ``CachedStaticFiles`` mencari ke lokasi shard jika file
+datar sudah dipindahkan oleh ``app.utils.migrate_uploads``.
+"""
+import hashlib
+import os
+import posixpath
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.utils.image_variants import remove_variants
+
+STATIC_URL = "/static/"
+UPLOADS = "uploads"
+
+
+def shard_dir(filename: str) -> str:
+    """``"ab/cd"`` untuk ``filename``."""
+    digest = hashlib.md5(filename.encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+def sharded_relative(filename: str) -> str:
+    """Path relatif terhadap direktori static, mis. ``uploads/ab/cd/foto.jpg``."""
+    return f"{UPLOADS}/{shard_dir(filename)}/{filename}"
+
+
+def flat_upload_name(relative: str) -> Optional[str]:
+    """Nama file jika ``relative`` adalah upload datar lama (``uploads/<nama>``)."""
+    directory, _, name = relative.rpartition("/")
+    if directory == UPLOADS and name and not name.startswith("."):
+        return name
+    return None
+
+
+def relative_to_path(relative: str) -> str:
+    return os.path.join(settings.STATIC_DIR, *relative.split("/"))
+
+
+def new_upload_location(filename: str) -> Tuple[str, str]:
+    """``(path di disk, url)`` untuk upload baru; direktori shard dibuat jika belum ada."""
+    relative = sharded_relative(filename)
+    path = relative_to_path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path, STATIC_URL + relative
+
+
+def url_to_relative(url: Optional[str]) -> Optional[str]:
+    """Path relatif terhadap static dari URL ``/static/...``; ``None`` jika bukan URL static yang valid."""
+    if not url or not url.startswith(STATIC_URL):
+        return None
+    relative = posixpath.normpath(url[len(STATIC_URL):])
+    if relative in (".", "") or relative.startswith("../") or relative == ".." or "\\" in relative:
+        return None
+    return relative
+
+
+def url_to_path(url: Optional[str]) -> Optional[str]:
+    """
+    Path di disk untuk URL file static, termasuk URL upload datar yang filenya
+    sudah dipindah ke shard. ``None`` untuk URL di luar ``/static/``.
+    """
+    relative = url_to_relative(url)
+    if relative is None:
+        return None
+    path = relative_to_path(relative)
+    name = flat_upload_name(relative)
+    if name is not None and not os.path.exists(path):
+        sharded = relative_to_path(sharded_relative(name))
+        if os.path.exists(sharded):
+            return sharded
+    return path
+
+
+def remove_upload(url: Optional[str]) -> bool:
+    """Hapus file upload beserta varian AVIF/WebP-nya; ``True`` jika file ada."""
+    path = url_to_path(url)
+    if path is None:
+        return False
+    remove_variants(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    return True
@@ -0,0 +1,419 @@
+"""
+Upload bertahap (resumable) untuk file besar, mis. video dan foto dokumentasi acara.
+
+Alur client:
+
+1. ``POST /uploads`` dengan ukuran total (dan opsional SHA-256 seluruh file)
+2. ``PUT /uploads/{id}?offset=N`` untuk setiap chunk secara berurutan, dengan
+   header ``X-Chunk-SHA256``; chunk ditulis langsung ke posisinya di file
+   ``<UPLOAD_SESSION_DIR>/<id>.part``
+3. Jika koneksi putus, ``GET /uploads/{id}`` mengembalikan offset yang sudah
+   diterima dan upload dilanjutkan dari sana
+4. ``POST /uploads/{id}/complete`` memverifikasi file, membuang metadata dan
+   memindahkannya ke UPLOAD_DIR (lewat ``store_stream`` yang sama dengan upload biasa)
+5. Endpoint create (programs, blogs, gallery, partners) menerima ``upload_id``
+   sebagai pengganti file
+
+Status sesi disimpan di koleksi ``upload_sessions``. Hanya satu request yang
+boleh menulis ke satu sesi pada satu waktu (kunci ``locked_until`` yang
+diklaim secara atomik), sehingga aman dipakai dengan banyak worker. Sesi yang
+kedaluwarsa dibersihkan berkala beserta filenya; dokumennya dihapus TTL index.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from pymongo import ReturnDocument
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import upload_duration_seconds, upload_sessions_total, upload_size_bytes
+from app.utils.file_handler import _remove_quietly, save_upload_file, schedule_variants, store_stream
+from app.utils.image_meta import extract_image_meta
+from app.utils.image_stream import IMAGE_FORMATS, VIDEO_FORMATS
+from app.utils.upload_paths import remove_upload, url_to_path
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "upload_sessions"
+
+OPEN = "open"
+FINALIZING = "finalizing"
+COMPLETE = "complete"
+CONSUMED = "consumed"
+FAILED = "failed"
+EXPIRED = "expired"
+
+# Kunci tulis kedaluwarsa sendiri jika worker mati di tengah request; selama chunk
+# masih di-stream kunci diperpanjang setiap LOCK_RENEW_SECONDS
+LOCK_SECONDS = 60
+LOCK_RENEW_SECONDS = LOCK_SECONDS / 3
+# Byte chunk dikumpulkan dulu sebelum ditulis di threadpool (lebih sedikit pindah thread)
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Dokumen sesi disimpan sehari setelah expires_at sebelum dihapus TTL index
+RETENTION_SECONDS = 24 * 3600
+
+_cleanup_tasks: List[asyncio.Task] = []
+
+
+class UploadSessionError(Exception):
+    def __init__(self, status_code: int, message: str, session: Optional[dict] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.session = session
+
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(settings.UPLOAD_SESSION_DIR, f"{upload_id}.part")
+
+
+def session_view(session: dict) -> dict:
+    """Data sesi untuk response (``UploadSessionResponse``)."""
+    return {
+        "upload_id": session["_id"],
+        "status": session["status"],
+        "size": session["size"],
+        "offset": session["received"],
+        "chunk_size": settings.UPLOAD_CHUNK_MAX_SIZE,
+        "expires_at": session["expires_at"],
+        "url": session.get("url"),
+        "image_meta": session.get("image_meta"),
+    }
+
+
+def _unlocked(now: datetime) -> dict:
+    return {"$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]}
+
+
+async def _release(db, upload_id: str, lock_id: str) -> None:
+    await db[COLLECTION].update_one(
+        {"_id": upload_id, "lock_id": lock_id}, {"$set": {"locked_until": None}})
+
+
+def _write_at(fp, position: int, data: bytes) -> None:
+    fp.seek(position)
+    fp.write(data)
+
+
+async def create_session(db, owner: str, size: int, filename: Optional[str] = None,
+                         sha256: Optional[str] = None) -> dict:
+    if size > settings.UPLOAD_SESSION_MAX_SIZE:
+        raise UploadSessionError(
+            413, f"Ukuran file terlalu besar. Maksimal {settings.UPLOAD_SESSION_MAX_SIZE // (1024 * 1024)}MB")
+
+    now = datetime.utcnow()
+    session = {
+        "_id": uuid.uuid4().hex,
+        "owner": owner,
+        "filename": filename,
+        "size": size,
+        "sha256": sha256.lower() if sha256 else None,
+        "received": 0,
+        "last_chunk": None,
+        "status": OPEN,
+        "locked_until": None,
+        "created_at": now,
+        "expires_at": now + timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS),
+    }
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    open(part_path(session["_id"]), "wb").close()
+    await db[COLLECTION].insert_one(session)
+    upload_sessions_total.inc(outcome="created")
+    return session
+
+
+async def get_session(db, upload_id: str, owner: str) -> dict:
+    session = await db[COLLECTION].find_one({"_id": upload_id, "owner": owner})
+    if session is None:
+        raise UploadSessionError(404, "Sesi upload tidak ditemukan")
+    if session["status"] == EXPIRED or (
+        session["status"] != CONSUMED and session["expires_at"] < datetime.utcnow()
+    ):
+        raise UploadSessionError(410, "Sesi upload sudah kedaluwarsa")
+    return session
+
+
+async def write_chunk(db, upload_id: str, owner: str, offset: int,
+                      body: AsyncIterator[bytes], checksum: Optional[str] = None) -> dict:
+    """
+    Tulis satu chunk pada ``offset``. Chunk harus berurutan (offset sama dengan
+    jumlah byte yang sudah diterima); mengirim ulang chunk terakhir dengan
+    checksum yang sama aman dan tidak menulis apa pun.
+    """
+    session = await get_session(db, upload_id, owner)
+    if session["status"] != OPEN:
+        raise UploadSessionError(409, "Sesi upload sudah difinalisasi", session)
+    checksum = checksum.lower() if checksum else None
+    last = session.get("last_chunk")
+    if checksum and last and last["offset"] == offset and last["sha256"] == checksum:
+        # Response untuk chunk ini hilang di jalan dan client mengirim ulang
+        return session
+    if offset != session["received"]:
+        raise UploadSessionError(409, "Offset chunk tidak sesuai, lanjutkan dari offset sesi", session)
+
+    now = datetime.utcnow()
+    lock_id = uuid.uuid4().hex
+    claimed = await db[COLLECTION].find_one_and_update(
+        {"_id": upload_id, "status": OPEN, "received": offset, **_unlocked(now)},
+        {"$set": {"locked_until": now + timedelta(seconds=LOCK_SECONDS), "lock_id": lock_id}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if claimed is None:
+        raise UploadSessionError(409, "Chunk lain untuk sesi ini sedang ditulis", session)
+
+    lock = {"_id": upload_id, "lock_id": lock_id}
+    lock_lost = UploadSessionError(409, "Kunci sesi upload hilang, kirim ulang chunk dari offset sesi", claimed)
+    renewed_at = time.monotonic()
+
+    async def renew_lock(force: bool = False):
+        nonlocal renewed_at
+        if not force and time.monotonic() - renewed_at < LOCK_RENEW_SECONDS:
+            return
+        result = await db[COLLECTION].update_one(
+            lock, {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=LOCK_SECONDS)}})
+        if not result.matched_count:
+            raise lock_lost
+        renewed_at = time.monotonic()
+
+    limit = min(settings.UPLOAD_CHUNK_MAX_SIZE, session["size"] - offset)
+    digest = hashlib.sha256()
+    written = 0
+    buffer = bytearray()
+    # I/O file di threadpool: chunk sampai UPLOAD_CHUNK_MAX_SIZE tidak menahan event loop
+    fp = await run_in_threadpool(open, part_path(upload_id), "r+b")
+    try:
+        try:
+            async for data in body:
+                written += len(data)
+                if written > limit:
+                    raise UploadSessionError(
+                        413, "Chunk melebihi ukuran maksimal atau sisa ukuran file", claimed)
+                digest.update(data)
+                buffer += data
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    await renew_lock()
+                    await run_in_threadpool(_write_at, fp, offset + written - len(buffer), bytes(buffer))
+                    buffer.clear()
+            if written == 0:
+                raise UploadSessionError(400, "Chunk kosong", claimed)
+            if checksum and digest.hexdigest() != checksum:
+                raise UploadSessionError(400, "Checksum chunk tidak cocok", claimed)
+            await renew_lock(force=True)
+            if buffer:
+                await run_in_threadpool(_write_at, fp, offset + written - len(buffer), bytes(buffer))
+            await run_in_threadpool(fp.truncate, offset + written)
+        except BaseException as e:
+            # Kunci sudah diambil request lain: file kini miliknya, jangan disentuh
+            if e is not lock_lost:
+                # Buang byte chunk yang gagal agar file tetap sama dengan offset sesi
+                await run_in_threadpool(fp.truncate, offset)
+                await _release(db, upload_id, lock_id)
+            raise
+    finally:
+        await run_in_threadpool(fp.close)
+
+    # received hanya dimajukan jika kunci masih dipegang request ini
+    updated = await db[COLLECTION].find_one_and_update(
+        {**lock, "received": offset},
+        {"$set": {
+            "received": offset + written,
+            "locked_until": None,
+            "last_chunk": {"offset": offset, "size": written, "sha256": digest.hexdigest()},
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+    if updated is None:
+        raise lock_lost
+    return updated
+
+
+async def _fail(db, session: dict, status_code: int, message: str):
+    _remove_quietly(part_path(session["_id"]))
+    await db[COLLECTION].update_one(
+        {"_id": session["_id"]}, {"$set": {"status": FAILED, "locked_until": None}})
+    upload_sessions_total.inc(outcome="failed")
+    raise UploadSessionError(status_code, message)
+
+
+async def finalize_session(db, upload_id: str, owner: str) -> dict:
+    """
+    Verifikasi file yang sudah lengkap lalu simpan ke UPLOAD_DIR. Format dicek
+    dari magic bytes dan metadata EXIF/XMP dibuang seperti upload biasa. Sesi
+    ``finalizing`` yang kuncinya habis (worker mati di tengah finalisasi) bisa
+    difinalisasi ulang.
+    """
+    session = await get_session(db, upload_id, owner)
+    if session["status"] == COMPLETE:
+        return session
+    if session["status"] not in (OPEN, FINALIZING):
+        raise UploadSessionError(409, "Sesi upload tidak bisa difinalisasi", session)
+    if session["received"] != session["size"]:
+        raise UploadSessionError(409, "Upload belum lengkap", session)
+
+    now = datetime.utcnow()
+    claimed = await db[COLLECTION].find_one_and_update(
+        {"_id": upload_id, "status": {"$in": [OPEN, FINALIZING]}, **_unlocked(now)},
+        {"$set": {"status": FINALIZING, "url": None,
+                  "locked_until": now + timedelta(seconds=LOCK_SECONDS)}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if claimed is None:
+        raise UploadSessionError(409, "Sesi upload sedang diproses", session)
+    if claimed.get("url"):
+        # File yang sudah disimpan worker sebelumnya (yang mati sebelum selesai) dibuang
+        remove_upload(claimed["url"])
+
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    try:
+        with open(part_path(upload_id), "rb") as fp:
+            url, file_size = await store_stream(
+                lambda n: run_in_threadpool(fp.read, n),
+                settings.UPLOAD_SESSION_MAX_SIZE,
+                IMAGE_FORMATS + VIDEO_FORMATS,
+                digest,
+            )
+    except HTTPException as e:
+        upload_duration_seconds.observe(time.perf_counter() - start, outcome="error")
+        await _fail(db, claimed, e.status_code, e.detail)
+    except Exception:
+        # Kesalahan server (mis. disk): sesi dibuka lagi agar bisa dicoba ulang
+        upload_duration_seconds.observe(time.perf_counter() - start, outcome="error")
+        await db[COLLECTION].update_one(
+            {"_id": upload_id}, {"$set": {"status": OPEN, "locked_until": None}})
+        raise
+
+    if claimed.get("sha256") and digest.hexdigest() != claimed["sha256"]:
+        remove_upload(url)
+        upload_duration_seconds.observe(time.perf_counter() - start, outcome="error")
+        await _fail(db, claimed, 400, "Checksum file tidak cocok")
+
+    try:
+        # URL dicatat dulu agar file bisa dibersihkan jika worker mati sebelum sesi selesai
+        await db[COLLECTION].update_one({"_id": upload_id}, {"$set": {"url": url}})
+        meta = await extract_image_meta(url_to_path(url))
+        await schedule_variants(db, url)
+        completed = await db[COLLECTION].find_one_and_update(
+            {"_id": upload_id},
+            {"$set": {"status": COMPLETE, "url": url, "image_meta": meta,
+                      "locked_until": None, "completed_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER,
+        )
+    except Exception:
+        # File .part masih ada: hasil simpan dibuang dan sesi dibuka lagi agar bisa dicoba ulang
+        remove_upload(url)
+        upload_duration_seconds.observe(time.perf_counter() - start, outcome="error")
+        await db[COLLECTION].update_one(
+            {"_id": upload_id}, {"$set": {"status": OPEN, "url": None, "locked_until": None}})
+        raise
+
+    _remove_quietly(part_path(upload_id))
+    upload_duration_seconds.observe(time.perf_counter() - start, outcome="success")
+    upload_size_bytes.observe(file_size)
+    upload_sessions_total.inc(outcome="completed")
+    return completed
+
+
+async def abort_session(db, upload_id: str, owner: str) -> None:
+    session = await get_session(db, upload_id, owner)
+    if session["status"] not in (OPEN, FAILED):
+        raise UploadSessionError(409, "Sesi upload tidak bisa dibatalkan", session)
+    result = await db[COLLECTION].delete_one(
+        {"_id": upload_id, "status": session["status"], **_unlocked(datetime.utcnow())})
+    if not result.deleted_count:
+        raise UploadSessionError(409, "Chunk lain untuk sesi ini sedang ditulis", session)
+    _remove_quietly(part_path(upload_id))
+    upload_sessions_total.inc(outcome="aborted")
+
+
+async def consume_upload_session(db, upload_id: str, owner: str) -> Tuple[str, Optional[dict]]:
+    """Tandai sesi yang sudah difinalisasi sebagai terpakai; satu sesi untuk satu dokumen."""
+    session = await db[COLLECTION].find_one_and_update(
+        {"_id": upload_id, "owner": owner, "status": COMPLETE,
+         "expires_at": {"$gt": datetime.utcnow()}},
+        {"$set": {"status": CONSUMED, "consumed_at": datetime.utcnow()}},
+    )
+    if session is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Sesi upload tidak ditemukan, belum difinalisasi atau sudah dipakai"
+        )
+    return session["url"], session.get("image_meta")
+
+
+async def resolve_upload(db, file: Optional[UploadFile], upload_id: Optional[str],
+                         owner: str) -> Tuple[str, Optional[dict]]:
+    """``(url, metadata)`` dari file multipart atau dari sesi upload bertahap."""
+    if upload_id:
+        return await consume_upload_session(db, upload_id, owner)
+    if file is None:
+        raise HTTPException(status_code=400, detail="File atau upload_id wajib diisi")
+    url, meta = await save_upload_file(file)
+    await schedule_variants(db, url)
+    return url, meta
+
+
+async def cleanup_expired_sessions(db) -> int:
+    """Hapus file milik sesi yang kedaluwarsa; kembalikan jumlah sesi yang dibersihkan."""
+    now = datetime.utcnow()
+    count = 0
+    async for session in db[COLLECTION].find(
+        {"status": {"$in": [OPEN, FINALIZING, COMPLETE, FAILED]}, "expires_at": {"$lt": now}}
+    ):
+        _remove_quietly(part_path(session["_id"]))
+        if session["status"] in (FINALIZING, COMPLETE) and session.get("url"):
+            # Sudah difinalisasi tapi tidak pernah dipakai endpoint create, atau worker
+            # mati di tengah finalisasi setelah file disimpan
+            remove_upload(session["url"])
+        await db[COLLECTION].update_one(
+            {"_id": session["_id"], "status": session["status"]}, {"$set": {"status": EXPIRED}})
+        upload_sessions_total.inc(outcome="expired")
+        count += 1
+
+    # File .part yang dokumennya sudah dihapus TTL index (mis. worker mati saat finalisasi)
+    if os.path.isdir(settings.UPLOAD_SESSION_DIR):
+        cutoff = time.time() - settings.UPLOAD_SESSION_TTL_HOURS * 3600 - RETENTION_SECONDS
+        for entry in os.scandir(settings.UPLOAD_SESSION_DIR):
+            if entry.name.endswith(".part") and entry.stat().st_mtime < cutoff:
+                if await db[COLLECTION].find_one({"_id": entry.name[:-len(".part")]}) is None:
+                    _remove_quietly(entry.path)
+    return count
+
+
+async def ensure_upload_session_indexes(db) -> None:
+    await db[COLLECTION].create_index("expires_at", expireAfterSeconds=RETENTION_SECONDS)
+
+
+async def _cleanup_loop(db, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            cleaned = await cleanup_expired_sessions(db)
+            if cleaned:
+                logger.info(f"{cleaned} sesi upload kedaluwarsa dibersihkan")
+        except Exception as e:
+            logger.warning(f"Gagal membersihkan sesi upload: {str(e)}")
+
+
+async def start_upload_session_cleanup():
+    """Buat TTL index dan jalankan pembersihan sesi kedaluwarsa berkala (startup)."""
+    from app.core import database
+
+    if database.db is None:
+        return
+    os.makedirs(settings.UPLOAD_SESSION_DIR, exist_ok=True)
+    await ensure_upload_session_indexes(database.db)
+    _cleanup_tasks.append(asyncio.create_task(
+        _cleanup_loop(database.db, settings.UPLOAD_SESSION_CLEANUP_INTERVAL)))
+
+
+async def stop_upload_session_cleanup():
+    while _cleanup_tasks:
+        _cleanup_tasks.pop().cancel()
@@ -0,0 +1,79 @@
+"""
+Load generator async berbasis httpx.
+
+Menjalankan ``concurrency`` worker yang terus mengirim request dari sebuah
+skenario selama ``duration`` detik, lalu menghitung RPS dan persentil
+latency per jenis request maupun total.
+"""
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import httpx
+
+
+@dataclass
+class Stats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    errors: int = 0
+
+    def record(self, latency: float, status_code: int) -> None:
+        self.latencies.append(latency)
+        self.statuses[status_code] += 1
+
+    def summary(self, duration: float) -> dict:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "rps": round(count / duration, 2) if duration else 0.0,
+            "p50_ms": percentile(ordered, 50),
+            "p95_ms": percentile(ordered, 95),
+            "p99_ms": percentile(ordered, 99),
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+        }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return round(ordered[index] * 1000, 2)
+
+
+async def run_load(client: httpx.AsyncClient, scenario, duration: float, concurrency: int) -> dict:
+    """Jalankan skenario dan kembalikan ringkasan per request dan total."""
+    per_request: Dict[str, Stats] = defaultdict(Stats)
+    total = Stats()
+    stop_at = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        iteration = 0
+        while time.perf_counter() < stop_at:
+            name, request_kwargs = scenario.next_request(worker_id, iteration)
+            iteration += 1
+            start = time.perf_counter()
+            try:
+                response = await client.request(**request_kwargs)
+            except httpx.HTTPError:
+                per_request[name].errors += 1
+                total.errors += 1
+                continue
+            latency = time.perf_counter() - start
+            per_request[name].record(latency, response.status_code)
+            total.record(latency, response.status_code)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "duration_s": round(elapsed, 2),
+        "concurrency": concurrency,
+        "total": total.summary(elapsed),
+        "requests": {name: stats.summary(elapsed) for name, stats in sorted(per_request.items())},
+    }
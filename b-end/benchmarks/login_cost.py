@@ -0,0 +1,68 @@
+"""
+Throughput login per cost bcrypt.
+
+Menjalankan skenario ``login_storm`` in-process (MongoDB in-memory) untuk
+beberapa nilai cost, supaya dampak PASSWORD_HASH_ROUNDS terhadap RPS dan
+latensi login terlihat sebelum cost dinaikkan di produksi.
+
+Contoh:
+    python -m benchmarks.login_cost --rounds 10,11,12,13 --duration 5
+"""
+import argparse
+import asyncio
+import sys
+
+from benchmarks.loadgen import run_load
+from benchmarks.run import in_memory_client
+from benchmarks.scenarios import Fixtures, LoginStorm
+
+
+async def measure(rounds: int, duration: float, concurrency: int) -> dict:
+    from app.core import security
+
+    # User benchmark di-register dengan cost yang sedang diukur, jadi tidak ada rehash
+    security.pwd_context = security.build_password_context(rounds)
+    async with in_memory_client(concurrency) as client:
+        fixtures = Fixtures(seed_per_collection=0)
+        await fixtures.setup(client)
+        return await run_load(client, LoginStorm(fixtures), duration, concurrency)
+
+
+def print_report(results: dict) -> None:
+    header = f"{'cost':<6}{'request':<14}{'RPS':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+    print(header)
+    print("-" * len(header))
+    for rounds, result in results.items():
+        rows = [("TOTAL", result["total"])] + sorted(result["requests"].items())
+        for request_name, stats in rows:
+            print(f"{rounds:<6}{request_name:<14}{stats['rps']:>10}{stats['p50_ms']:>10}"
+                  f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+async def main(args) -> int:
+    from app.core.security import MAX_ROUNDS, MIN_ROUNDS
+
+    rounds_list = [int(r) for r in args.rounds.split(",") if r.strip()]
+    invalid = [r for r in rounds_list if not MIN_ROUNDS <= r <= MAX_ROUNDS]
+    if invalid:
+        print(f"Cost harus di antara {MIN_ROUNDS} dan {MAX_ROUNDS}: {invalid}")
+        return 2
+
+    results = {}
+    for rounds in rounds_list:
+        print(f"Mengukur login dengan cost {rounds}...")
+        results[rounds] = await measure(rounds, args.duration, args.concurrency)
+    print_report(results)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput login per cost bcrypt")
+    parser.add_argument("--rounds", default="10,11,12,13", help="Daftar cost dipisah koma")
+    parser.add_argument("--duration", type=float, default=5.0, help="Durasi per cost (detik)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Jumlah worker paralel")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
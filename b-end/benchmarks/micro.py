@@ -0,0 +1,180 @@
+"""
+Microbenchmark untuk helper yang dipanggil di setiap request.
+
+Mengukur keempat salinan ``convert_objectid`` di router, pembuatan
+``ResponseEnvelope[...]``, pembuatan/verifikasi JWT dan ``pwd_context.verify``
+dengan ukuran dokumen yang realistis, dan membandingkannya dengan kandidat
+fast path. Dengan ``--check`` hasil dibandingkan dengan baseline dan proses
+keluar dengan kode 1 jika ada helper yang melambat melewati threshold di
+``micro_thresholds.json``.
+
+Contoh:
+    python -m benchmarks.micro --save-baseline
+    python -m benchmarks.micro --check
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from bson import ObjectId
+from jose import jwt
+
+from app.api.endpoints import blog, gallery, partners, programs
+from app.core.config import settings
+from app.core.security import create_access_token, get_password_hash, pwd_context
+from app.models.schemas import BlogResponse, ResponseEnvelope
+
+HERE = os.path.dirname(__file__)
+BASELINE_PATH = os.path.join(HERE, "baselines", "micro.json")
+THRESHOLDS_PATH = os.path.join(HERE, "micro_thresholds.json")
+
+
+def blog_document(i: int = 0, content_size: int = 4000) -> dict:
+    """Dokumen blog seperti yang dikembalikan Motor (dengan ObjectId)."""
+    return {
+        "_id": ObjectId(),
+        "title": f"Dampaknya Terhadap Stabilitas Global {i}",
+        "content": ("Ketegangan di kawasan semakin meningkat. " * (content_size // 42 + 1))[:content_size],
+        "image": f"/static/uploads/20250101_120000_{i:08x}.jpg",
+        "author": "admin@example.com",
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _convert_objectid_fast(doc):
+    # Kandidat: satu lookup dict, tanpa pengecekan truthiness dokumen
+    oid = doc.get("_id")
+    if oid is not None and oid.__class__ is ObjectId:
+        doc["_id"] = str(oid)
+    return doc
+
+
+def _fresh_docs(count: int) -> List[dict]:
+    return [blog_document(i) for i in range(count)]
+
+
+def build_cases() -> Dict[str, Callable[[], object]]:
+    docs_page = _fresh_docs(10)
+    converted_page = [dict(d, _id=str(d["_id"])) for d in docs_page]
+    list_envelope = ResponseEnvelope[List[BlogResponse]]
+    token_payload = {"sub": "admin@example.com", "user_id": str(ObjectId()), "username": "admin"}
+    token = create_access_token(token_payload, timedelta(minutes=30))
+    password_hash = get_password_hash("benchmark-password")
+
+    cases: Dict[str, Callable[[], object]] = {}
+    for module in (blog, gallery, partners, programs):
+        name = module.__name__.rsplit(".", 1)[-1]
+        cases[f"convert_objectid.{name}"] = (
+            lambda fn=module.convert_objectid: [fn(dict(d)) for d in docs_page])
+    cases["convert_objectid.candidate_fast"] = (
+        lambda: [_convert_objectid_fast(dict(d)) for d in docs_page])
+
+    cases["envelope.list_blog_10.subscript_each_call"] = (
+        lambda: ResponseEnvelope[List[BlogResponse]](
+            status="success", message="Daftar blog berhasil diambil", data=converted_page))
+    cases["envelope.list_blog_10.candidate_cached_class"] = (
+        lambda: list_envelope(
+            status="success", message="Daftar blog berhasil diambil", data=converted_page))
+    cases["envelope.list_blog_10.candidate_validate_and_dump"] = (
+        lambda: list_envelope.model_validate({
+            "status": "success", "message": "Daftar blog berhasil diambil",
+            "data": converted_page}).model_dump(mode="json"))
+
+    cases["jwt.create_access_token"] = (
+        lambda: create_access_token(token_payload, timedelta(minutes=30)))
+    cases["jwt.decode"] = (
+        lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]))
+
+    cases["password.verify"] = lambda: pwd_context.verify("benchmark-password", password_hash)
+    return cases
+
+
+def measure(fn: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Waktu terbaik per panggilan (mikrodetik)."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    # Perbesar jumlah loop sampai satu pengukuran >= min_time
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1_000_000
+
+
+def run(min_time: float, repeat: int, only: str = "") -> Dict[str, float]:
+    results = {}
+    for name, fn in build_cases().items():
+        if only and not name.startswith(only):
+            continue
+        # bcrypt sengaja lambat; cukup satu pengukuran singkat
+        if name.startswith("password."):
+            results[name] = measure(fn, 0.0, 1)
+        else:
+            results[name] = measure(fn, min_time, repeat)
+    return results
+
+
+def check(results: Dict[str, float], baseline: Dict[str, float], thresholds: dict) -> List[str]:
+    default = thresholds.get("default", 0.35)
+    failures = []
+    for name, value in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        limit = thresholds.get("cases", {}).get(name, default)
+        if value > previous * (1 + limit):
+            failures.append(
+                f"{name}: {value:.2f}us > baseline {previous:.2f}us (+{limit:.0%} diizinkan)")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark helper per-request")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Durasi minimal satu pengukuran (detik)")
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah pengulangan pengukuran")
+    parser.add_argument("--only", default="", help="Hanya jalankan case dengan prefix ini")
+    parser.add_argument("--save-baseline", action="store_true", help="Simpan hasil sebagai baseline")
+    parser.add_argument("--check", action="store_true",
+                        help="Gagal jika ada regresi melewati threshold")
+    args = parser.parse_args(argv)
+
+    results = run(args.min_time, args.repeat, args.only)
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"{name:<{width}}  {value:>12.2f} us/op")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.utcnow().isoformat(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                },
+                "results_us": results,
+            }, f, indent=2)
+        print(f"Baseline disimpan ke {BASELINE_PATH}")
+
+    if args.check:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)["results_us"]
+        with open(THRESHOLDS_PATH) as f:
+            thresholds = json.load(f)
+        failures = check(results, baseline, thresholds)
+        if failures:
+            print("Regresi terdeteksi:")
+            for line in failures:
+                print(f"  - {line}")
+            return 1
+        print("Semua helper dalam batas threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
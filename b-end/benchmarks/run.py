@@ -0,0 +1,198 @@
+"""
+CLI benchmark HTTP.
+
+Contoh:
+    # Server yang sudah berjalan (mis. python -m app.server)
+    python -m benchmarks.run --target http://localhost:8000
+
+    # In-process lewat ASGI dengan stand-in MongoDB in-memory (mongomock-motor)
+    python -m benchmarks.run --in-memory --scenarios public_list,detail_reads
+
+    # Simpan hasil sebagai baseline, lalu bandingkan run berikutnya
+    python -m benchmarks.run --in-memory --save-baseline local
+    python -m benchmarks.run --in-memory --compare local --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+import httpx
+
+from benchmarks.loadgen import run_load
+from benchmarks.scenarios import SCENARIOS, Fixtures
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def in_memory_client(concurrency: int) -> httpx.AsyncClient:
+    """Client ASGI ke app dengan database in-memory (tanpa mongod)."""
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("Mode --in-memory membutuhkan paket mongomock-motor (pip install mongomock-motor)")
+
+    from app.core.config import settings
+    from app.core.database import get_database
+    from app.main import app
+
+    # login_storm mengukur biaya login itu sendiri; dengan rate limiter aktif hampir
+    # semua request hanya akan dijawab 429
+    settings.LOGIN_RATE_LIMIT_ENABLED = False
+    # Budget admission control disesuaikan dengan jumlah worker load generator agar
+    # request tidak di-shed (503); yang diukur adalah endpoint, bukan load shedding
+    for name in ("ADMISSION_PUBLIC_READ_LIMIT", "ADMISSION_AUTH_LIMIT",
+                 "ADMISSION_UPLOAD_LIMIT", "ADMISSION_DEFAULT_LIMIT"):
+        limit = getattr(settings, name)
+        if limit:
+            setattr(settings, name, max(limit, concurrency))
+    db = AsyncMongoMockClient()[settings.MONGODB_DATABASE]
+
+    async def override_get_database():
+        return db
+
+    app.dependency_overrides[get_database] = override_get_database
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Kembalikan daftar regresi: RPS turun atau p99 naik lebih dari toleransi."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        cur, prev = current["total"], previous["total"]
+        if prev["rps"] and cur["rps"] < prev["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: RPS {cur['rps']} < baseline {prev['rps']}")
+        if prev["p99_ms"] and cur["p99_ms"] > prev["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {cur['p99_ms']}ms > baseline {prev['p99_ms']}ms")
+    return regressions
+
+
+def unexpected_statuses(results: dict) -> list:
+    """Kembalikan daftar skenario yang menerima status di luar ``expected_statuses``-nya."""
+    problems = []
+    for name, result in results["scenarios"].items():
+        expected = {str(code) for code in result["expected_statuses"]}
+        for request_name, stats in result["requests"].items():
+            unexpected = {code: count for code, count in stats["statuses"].items() if code not in expected}
+            if unexpected:
+                mix = ", ".join(f"{code}x{count}" for code, count in unexpected.items())
+                problems.append(f"{name}/{request_name}: status tak terduga {mix}")
+            if stats["errors"]:
+                problems.append(f"{name}/{request_name}: {stats['errors']} request gagal tanpa respons")
+    return problems
+
+
+def print_report(results: dict) -> None:
+    header = f"{'skenario':<16}{'request':<20}{'RPS':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'err':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results["scenarios"].items():
+        rows = [("TOTAL", result["total"])] + list(result["requests"].items())
+        for request_name, stats in rows:
+            print(f"{name:<16}{request_name:<20}{stats['rps']:>10}{stats['p50_ms']:>10}"
+                  f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>6}")
+
+
+async def main(args) -> int:
+    if args.in_memory:
+        client = in_memory_client(args.concurrency)
+    else:
+        client = httpx.AsyncClient(
+            base_url=args.target, timeout=60,
+            limits=httpx.Limits(max_connections=args.concurrency))
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"Skenario tidak dikenal: {', '.join(unknown)}. Pilihan: {', '.join(SCENARIOS)}")
+        return 2
+
+    results = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "target": "in-memory" if args.in_memory else args.target,
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "scenarios": {},
+    }
+
+    async with client:
+        fixtures = Fixtures(seed_per_collection=args.seed)
+        print(f"Menyiapkan data ({args.seed} dokumen per koleksi)...")
+        await fixtures.setup(client)
+        for name in names:
+            scenario = SCENARIOS[name](fixtures)
+            await scenario.setup(client)
+            print(f"Menjalankan {name}: {scenario.description}")
+            result = await run_load(client, scenario, args.duration, args.concurrency)
+            result["expected_statuses"] = list(scenario.expected_statuses)
+            results["scenarios"][name] = result
+
+    print_report(results)
+
+    problems = unexpected_statuses(results)
+    if problems:
+        # Hasil yang sebagian besar 503/5xx tidak layak dijadikan baseline maupun dibandingkan
+        print("Skenario menerima status di luar yang diharapkan:")
+        for line in problems:
+            print(f"  - {line}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if problems:
+        return 1
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline disimpan ke {path}")
+
+    if args.compare:
+        path = os.path.join(BASELINE_DIR, f"{args.compare}.json")
+        with open(path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regresi terdeteksi:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"Tidak ada regresi dibanding baseline '{args.compare}'")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test HTTP untuk API")
+    parser.add_argument("--target", default="http://localhost:8000", help="Base URL server")
+    parser.add_argument("--in-memory", action="store_true",
+                        help="Jalankan app in-process dengan MongoDB in-memory")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="Daftar skenario dipisah koma")
+    parser.add_argument("--duration", type=float, default=10.0, help="Durasi per skenario (detik)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Jumlah worker paralel")
+    parser.add_argument("--seed", type=int, default=20, help="Jumlah dokumen awal per koleksi")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file ini")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Simpan hasil sebagai baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Bandingkan dengan baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Toleransi regresi relatif (0.15 = 15%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
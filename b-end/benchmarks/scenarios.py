@@ -0,0 +1,203 @@
+"""
+Definisi skenario load test.
+
+Setiap skenario menyiapkan datanya lewat API (sehingga bisa dipakai untuk
+server lokal maupun remote) lalu menghasilkan request satu per satu lewat
+``next_request``.
+"""
+import random
+import struct
+import uuid
+import zlib
+from typing import Dict, List, Tuple
+
+import httpx
+
+COLLECTIONS = {
+    "blogs": "/blogs",
+    "gallery": "/gallery",
+    "partners": "/partners",
+    "programs": "/programs",
+}
+
+
+def make_png(width: int = 16, height: int = 16) -> bytes:
+    """PNG RGB valid yang kecil, tanpa dependensi Pillow."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    color = bytes(random.randrange(256) for _ in range(3))
+    raw = b"".join(b"\x00" + color * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class Fixtures:
+    """User dan dokumen yang dipakai bersama oleh semua skenario."""
+
+    def __init__(self, seed_per_collection: int = 20):
+        self.seed_per_collection = seed_per_collection
+        suffix = uuid.uuid4().hex[:8]
+        self.email = f"bench_{suffix}@example.com"
+        self.username = f"bench_{suffix}"
+        self.password = "benchpassword123"
+        self.token = ""
+        self.ids: Dict[str, List[str]] = {name: [] for name in COLLECTIONS}
+
+    @property
+    def auth_headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def login(self, client: httpx.AsyncClient) -> str:
+        response = await client.post(
+            "/auth/login", data={"username": self.email, "password": self.password})
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        response = await client.post("/auth/register", json={
+            "email": self.email,
+            "username": self.username,
+            "full_name": "Benchmark User",
+            "password": self.password,
+        })
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"Registrasi user benchmark gagal: {response.text}")
+        self.token = await self.login(client)
+
+        for i in range(self.seed_per_collection):
+            for name in COLLECTIONS:
+                response = await create_document(client, name, i, self.auth_headers)
+                if response.status_code != 201:
+                    raise RuntimeError(f"Seed {name} gagal: {response.status_code} {response.text}")
+                self.ids[name].append(response.json()["data"]["_id"])
+
+
+def create_kwargs(name: str, i: int, headers: Dict[str, str]) -> dict:
+    image = ("bench.png", make_png(), "image/png")
+    forms = {
+        "blogs": {"title": f"Blog benchmark {i}", "content": "Lorem ipsum dolor sit amet. " * 40},
+        "gallery": {"title": f"Foto benchmark {i}", "description": "Dokumentasi kegiatan"},
+        "partners": {"name": f"Partner benchmark {i}", "description": "Mitra kegiatan benchmark",
+                     "website_url": "https://example.com"},
+        "programs": {"title": f"Program benchmark {i}", "subtitle": "Sub judul program",
+                     "description": "Deskripsi program benchmark"},
+    }
+    file_field = "logo" if name == "partners" else "image"
+    return {
+        "method": "POST",
+        "url": COLLECTIONS[name],
+        "data": forms[name],
+        "files": {file_field: image},
+        "headers": headers,
+    }
+
+
+async def create_document(client: httpx.AsyncClient, name: str, i: int, headers: Dict[str, str]):
+    return await client.request(**create_kwargs(name, i, headers))
+
+
+class Scenario:
+    name = "base"
+    description = ""
+    # Status yang wajar untuk skenario ini; status lain (mis. 503 dari admission
+    # control) berarti hasilnya tidak lagi mengukur endpoint yang dimaksud
+    expected_statuses: Tuple[int, ...] = (200,)
+
+    def __init__(self, fixtures: Fixtures):
+        self.fixtures = fixtures
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        pass
+
+    def next_request(self, worker_id: int, iteration: int) -> Tuple[str, dict]:
+        raise NotImplementedError
+
+
+class PublicListReads(Scenario):
+    name = "public_list"
+    description = "GET daftar blog/galeri/partner/program"
+
+    def next_request(self, worker_id, iteration):
+        name = list(COLLECTIONS)[(worker_id + iteration) % len(COLLECTIONS)]
+        return f"list_{name}", {"method": "GET", "url": COLLECTIONS[name]}
+
+
+class DetailReads(Scenario):
+    name = "detail_reads"
+    description = "GET detail dokumen berdasarkan ID"
+
+    def next_request(self, worker_id, iteration):
+        name = list(COLLECTIONS)[(worker_id + iteration) % len(COLLECTIONS)]
+        doc_id = random.choice(self.fixtures.ids[name])
+        return f"detail_{name}", {"method": "GET", "url": f"{COLLECTIONS[name]}/{doc_id}"}
+
+
+class LoginStorm(Scenario):
+    name = "login_storm"
+    description = "POST /auth/login, 80% benar dan 20% password salah"
+    expected_statuses = (200, 401)
+
+    def next_request(self, worker_id, iteration):
+        wrong = (worker_id + iteration) % 5 == 4
+        return ("login_wrong" if wrong else "login_ok"), {
+            "method": "POST",
+            "url": "/auth/login",
+            "data": {
+                "username": self.fixtures.email,
+                "password": "salah-password" if wrong else self.fixtures.password,
+            },
+        }
+
+
+class UploadMix(Scenario):
+    name = "upload_mix"
+    description = "POST multipart ke semua endpoint create"
+    expected_statuses = (201,)
+
+    def next_request(self, worker_id, iteration):
+        name = list(COLLECTIONS)[(worker_id + iteration) % len(COLLECTIONS)]
+        return f"create_{name}", create_kwargs(name, iteration, self.fixtures.auth_headers)
+
+
+class MixedAdmin(Scenario):
+    name = "mixed_admin"
+    description = "Campuran baca publik (70%), detail (15%), upload (10%) dan delete (5%)"
+    expected_statuses = (200, 201)
+
+    def __init__(self, fixtures):
+        super().__init__(fixtures)
+        self.lists = PublicListReads(fixtures)
+        self.details = DetailReads(fixtures)
+        self.uploads = UploadMix(fixtures)
+        self.deletable: List[Tuple[str, str]] = []
+
+    async def setup(self, client):
+        # Dokumen khusus untuk dihapus selama skenario berjalan
+        for i in range(self.fixtures.seed_per_collection):
+            response = await create_document(client, "blogs", i, self.fixtures.auth_headers)
+            if response.status_code == 201:
+                self.deletable.append(("blogs", response.json()["data"]["_id"]))
+
+    def next_request(self, worker_id, iteration):
+        roll = random.random()
+        if roll < 0.70:
+            return self.lists.next_request(worker_id, iteration)
+        if roll < 0.85:
+            return self.details.next_request(worker_id, iteration)
+        if roll < 0.95 or not self.deletable:
+            return self.uploads.next_request(worker_id, iteration)
+        name, doc_id = self.deletable.pop()
+        return f"delete_{name}", {
+            "method": "DELETE",
+            "url": f"{COLLECTIONS[name]}/{doc_id}",
+            "headers": self.fixtures.auth_headers,
+        }
+
+
+SCENARIOS = {cls.name: cls for cls in (PublicListReads, DetailReads, LoginStorm, UploadMix, MixedAdmin)}